@@ -1,11 +1,19 @@
+from .animation import Animator
 from .dispmanx import DispmanX
 from .exceptions import DispmanXError, DispmanXRuntimeError
+from .pool import ResourcePool
+from .screen import Screen
+from .stats import FrameStats
 
 
 __version__ = "0.1.0"  # Make sure this is updated in pyproject.toml as well
 __all__ = [
+    "Animator",
     "DispmanX",
     "DispmanXError",
     "DispmanXRuntimeError",
+    "FrameStats",
+    "ResourcePool",
+    "Screen",
     "__version__",
 ]
@@ -0,0 +1,179 @@
+import argparse
+import json
+import signal
+import sys
+from typing import Optional
+
+from . import __version__
+from .exceptions import DispmanXError, DispmanXRuntimeError
+
+
+def parse_size(value: str) -> tuple[int, int]:
+    try:
+        width, height = (int(n) for n in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size (expected WIDTHxHEIGHT): {value!r}")
+    return width, height
+
+
+def parse_list(value: str) -> list[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def bench(args: argparse.Namespace) -> None:
+    from . import bench
+
+    results = bench.run(
+        pixel_formats=args.formats,
+        buffer_types=args.buffer_types,
+        sizes=args.sizes or (None,),
+        frames=args.frames,
+        include_convert=args.convert,
+    )
+    print(json.dumps(results, indent=2) if args.json else bench.format_results(results))
+
+
+def import_time(args: argparse.Namespace) -> int:
+    from . import bench
+
+    result = bench.benchmark_import(args.repeat)
+    print(f"import dispmanx: {result['import_ms']:.1f}ms (budget: {args.budget:g}ms)")
+    if result["library_loaded"]:
+        print("error: the DispmanX library was loaded at import time", file=sys.stderr)
+        return 1
+    if result["import_ms"] > args.budget:
+        print("error: over budget", file=sys.stderr)
+        return 1
+    return 0
+
+
+def serve(args: argparse.Namespace) -> None:
+    from .dispmanx import DispmanX
+    from .server import FrameServer
+
+    display = DispmanX(layer=args.layer, display=args.display, pixel_format=args.format, buffers=args.buffers)
+    try:
+        with FrameServer(display, args.socket) as server:
+            signal.signal(signal.SIGTERM, lambda signum, frame: server.shutdown())
+            print(
+                (
+                    f"Serving {display.width}x{display.height} {display.pixel_format} frames on layer {display.layer}"
+                    f" at {server.path}"
+                ),
+                file=sys.stderr,
+            )
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+    finally:
+        display.destroy()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    from .bench import DEFAULT_BUFFER_TYPES, DEFAULT_FRAMES, DEFAULT_IMPORT_BUDGET_MS, DEFAULT_PIXEL_FORMATS
+    from .dispmanx import PIXEL_FORMATS
+    from .server import DEFAULT_SOCKET_PATH
+
+    parser = argparse.ArgumentParser(prog="python -m dispmanx", description="Python DispmanX command line tools.")
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    parser.add_argument(
+        "--backend",
+        choices=("bcm_host", "sim"),
+        help="use the Raspberry Pi's bcm_host library or a simulated one (default: $DISPMANX_BACKEND or bcm_host)",
+    )
+    parser.add_argument(
+        "--library-path", help="path of libbcm_host.so (default: $DISPMANX_BCM_HOST_PATH or search for it)"
+    )
+    subparsers = parser.add_subparsers(title="commands", required=True)
+
+    bench_parser = subparsers.add_parser(
+        "bench",
+        help="benchmark updates",
+        description=(
+            "Time full-frame updates for each combination of pixel format, buffer type and size. Use --backend sim"
+            " to run without a Raspberry Pi."
+        ),
+    )
+    bench_parser.set_defaults(func=bench)
+    bench_parser.add_argument(
+        "-f",
+        "--formats",
+        type=parse_list,
+        default=DEFAULT_PIXEL_FORMATS,
+        help=f"comma separated pixel formats (default: {','.join(DEFAULT_PIXEL_FORMATS)})",
+    )
+    bench_parser.add_argument(
+        "-b",
+        "--buffer-types",
+        type=parse_list,
+        default=DEFAULT_BUFFER_TYPES,
+        help=f"comma separated buffer types (default: {','.join(DEFAULT_BUFFER_TYPES)})",
+    )
+    bench_parser.add_argument(
+        "-s",
+        "--size",
+        dest="sizes",
+        type=parse_size,
+        action="append",
+        help="render size as WIDTHxHEIGHT, can be repeated (default: the display's size)",
+    )
+    bench_parser.add_argument(
+        "-n", "--frames", type=int, default=DEFAULT_FRAMES, help=f"updates per combination (default: {DEFAULT_FRAMES})"
+    )
+    bench_parser.add_argument("--convert", action="store_true", help="also benchmark staging format conversion")
+    bench_parser.add_argument("--json", action="store_true", help="print results as JSON")
+
+    import_time_parser = subparsers.add_parser(
+        "import-time",
+        help="check how long importing dispmanx takes",
+        description=(
+            "Time importing dispmanx in a fresh interpreter, not counting optional dependencies, and exit with an"
+            " error if it's over budget or loads the DispmanX library. Useful as a regression check in CI."
+        ),
+    )
+    import_time_parser.set_defaults(func=import_time)
+    import_time_parser.add_argument(
+        "--budget",
+        type=float,
+        default=DEFAULT_IMPORT_BUDGET_MS,
+        help=f"maximum import time in milliseconds (default: {DEFAULT_IMPORT_BUDGET_MS})",
+    )
+    import_time_parser.add_argument(
+        "-r", "--repeat", type=int, default=5, help="interpreters to time, keeping the best (default: 5)"
+    )
+
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="draw frames sent by other processes",
+        description=(
+            "Listen on a Unix domain socket for full frames or patches, and draw them on a DispmanX layer. Updates"
+            " are coalesced to at most one per vertical blank. See dispmanx.server.FrameClient for a client."
+        ),
+    )
+    serve_parser.set_defaults(func=serve)
+    serve_parser.add_argument(
+        "-S", "--socket", default=DEFAULT_SOCKET_PATH, help=f"socket path (default: {DEFAULT_SOCKET_PATH})"
+    )
+    serve_parser.add_argument("-l", "--layer", type=int, default=0, help="layer to draw on (default: 0)")
+    serve_parser.add_argument(
+        "-f", "--format", choices=tuple(PIXEL_FORMATS), default="RGBA", help="pixel format (default: RGBA)"
+    )
+    serve_parser.add_argument("-d", "--display", type=int, help="device id of the display (default: the default one)")
+    serve_parser.add_argument(
+        "--buffers", type=int, choices=(1, 2, 3), default=1, help="video memory buffers (default: 1)"
+    )
+
+    args = parser.parse_args(argv)
+    try:
+        if args.backend is not None or args.library_path is not None:
+            from . import bcm_host
+
+            bcm_host.load(backend=args.backend, path=args.library_path)
+        return args.func(args) or 0
+    except (DispmanXError, DispmanXRuntimeError) as e:
+        parser.exit(1, f"error: {e}\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
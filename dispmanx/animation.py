@@ -0,0 +1,444 @@
+import bisect
+import threading
+import time
+from typing import Any, Callable, Optional, Sequence, Union
+
+from . import bcm_host
+from .dispmanx import DispmanX, Rect
+from .exceptions import DispmanXError, DispmanXRuntimeError
+
+
+Easing = Union[str, Callable[[float], float]]
+
+EASINGS: dict[str, Callable[[float], float]] = {
+    "linear": lambda t: t,
+    "ease_in": lambda t: t * t * t,
+    "ease_out": lambda t: 1 - (1 - t) ** 3,
+    "ease_in_out": lambda t: 4 * t * t * t if t < 0.5 else 1 - (2 - 2 * t) ** 3 / 2,
+}
+
+# Attribute -> element change flag
+ATTRIBUTES = {
+    "opacity": bcm_host.DISPMANX_ELEMENT_CHANGE_OPACITY,
+    "dest_rect": bcm_host.DISPMANX_ELEMENT_CHANGE_DEST_RECT,
+    "layer": bcm_host.DISPMANX_ELEMENT_CHANGE_LAYER,
+}
+
+FRAME_INTERVAL = 1 / 60  # How often run() steps when no animated object has measured its display's refresh rate
+
+
+def _current_value(target: DispmanX, attribute: str) -> Any:
+    return {"opacity": target._opacity, "dest_rect": target._dest_rect, "layer": target._layer}[attribute]
+
+
+def _parse_value(attribute: str, value: Any) -> Any:
+    try:
+        if attribute == "dest_rect":
+            rect = Rect(*(int(n) for n in value))
+            if rect.width <= 0 or rect.height <= 0:
+                raise ValueError
+            return rect
+        value = int(value)
+    except (TypeError, ValueError):
+        raise DispmanXError(f"Invalid {attribute}: {value!r}")
+    if attribute == "opacity" and not 0 <= value <= 255:
+        raise DispmanXError(f"Invalid opacity: {value!r}")
+    return value
+
+
+def _is_keyframes(value: Any) -> bool:
+    return (
+        isinstance(value, (list, tuple))
+        and len(value) > 0
+        and all(isinstance(keyframe, (list, tuple)) and len(keyframe) == 2 for keyframe in value)
+    )
+
+
+def _parse_track(attribute: str, value: Any, start: Any) -> tuple[list[float], list[Any]]:
+    # A track is its keyframes' times (fractions of the duration, ascending, from 0) and values
+    if not _is_keyframes(value):
+        return [0.0, 1.0], [start, _parse_value(attribute, value)]
+
+    times: list[float] = []
+    values: list[Any] = []
+    for fraction, keyframe_value in value:
+        fraction = float(fraction)
+        if not 0.0 <= fraction <= 1.0 or (times and fraction < times[-1]):
+            raise DispmanXError(f"Keyframe times must ascend from 0 to 1: {value!r}")
+        times.append(fraction)
+        values.append(_parse_value(attribute, keyframe_value))
+    if times[0] > 0.0:
+        times.insert(0, 0.0)
+        values.insert(0, start)
+    return times, values
+
+
+def _interpolate(start: Any, end: Any, t: float) -> Any:
+    if isinstance(start, Rect):
+        x, y, width, height = (round(a + (b - a) * t) for a, b in zip(start, end))
+        return Rect(x, y, max(width, 1), max(height, 1))  # Easing functions that overshoot mustn't collapse it
+    return round(start + (end - start) * t)
+
+
+class Animation:
+    _tracks: dict[str, tuple[list[float], list[Any]]]
+
+    def __init__(
+        self,
+        target: DispmanX,
+        duration: float,
+        tracks: dict[str, tuple[list[float], list[Any]]],
+        easing: Callable[[float], float],
+        start: float,
+        on_done: Optional[Callable[["Animation"], Any]],
+    ):
+        """An animation of a [DispmanX][dispmanx.DispmanX] object's element
+        attributes, returned by [Animator.animate()][dispmanx.Animator.animate].
+
+        Not instantiated directly.
+
+        Attributes:
+            target DispmanX: The object being animated.
+            duration float: Length of the animation in seconds.
+            done bool: Whether the animation has finished or been cancelled.
+            cancelled bool: Whether the animation was cancelled, or replaced by
+                a later animation of the same attributes.
+        """
+        self.target, self.duration = target, duration
+        self._tracks, self._easing, self._start, self._on_done = tracks, easing, start, on_done
+        self._finished = threading.Event()
+        self._cancelled = False
+
+    def __repr__(self):
+        state = "cancelled" if self._cancelled else "done" if self.done else "running"
+        return f"<{self.__class__.__name__} of {', '.join(self._tracks) or 'nothing'} over {self.duration}s, {state}>"
+
+    @property
+    def done(self) -> bool:
+        return self._finished.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self) -> None:
+        """Stop the animation, leaving the attributes where they are
+
+        Its `on_done` callback isn't called.
+        """
+        self._cancelled = True
+        self._finished.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the animation finishes or is cancelled, for example,
+        while an [Animator][dispmanx.Animator] runs in another thread
+
+        Arguments:
+            timeout: Maximum time to wait in seconds, or `None` to wait forever.
+
+        Returns:
+            Whether the animation is done.
+        """
+        return self._finished.wait(timeout)
+
+    def _values_at(self, now: float) -> tuple[dict[str, Any], bool]:
+        # The attributes' values at a time, and whether the animation has ended. Nothing before its delay is over.
+        if now < self._start:
+            return {}, False
+        progress = 1.0 if self.duration == 0 else min((now - self._start) / self.duration, 1.0)
+        values = {}
+        for attribute, (times, track) in self._tracks.items():
+            index = bisect.bisect_right(times, progress) - 1
+            if index >= len(times) - 1:
+                values[attribute] = track[-1]
+            else:
+                # Eased within each pair of keyframes, like CSS animations
+                span = times[index + 1] - times[index]
+                t = self._easing((progress - times[index]) / span) if span else 1.0
+                values[attribute] = _interpolate(track[index], track[index + 1], t)
+        return values, progress >= 1.0
+
+
+class Animator:
+    _animations: list[Animation]
+
+    def __init__(self):
+        """The Animator Class
+
+        Animates the opacity, position, size and layer of
+        [DispmanX][dispmanx.DispmanX] objects by changing their elements with
+        `vc_dispmanx_element_change_attributes`, so the hardware compositor
+        fades, moves and scales them and no pixels are uploaded again. Every
+        running animation is applied in a single update per frame, whichever
+        objects they belong to.
+
+        ```python
+        from dispmanx import Animator, DispmanX
+
+        toast = DispmanX(layer=10, rect=(1520, 1080, 400, 100))
+        draw(toast.buffer)
+        toast.update()
+
+        animator = Animator()
+        animator.animate(toast, 0.3, dest_rect=(1520, 960, 400, 100), easing="ease_out")
+        animator.animate(toast, 0.3, opacity=[(0.0, 0), (1.0, 255)])
+        animator.run()  # Returns once both are done
+        ```
+
+        Call [run()][dispmanx.Animator.run] to play every animation until
+        they're done, or [step()][dispmanx.Animator.step] once per frame from
+        an existing loop. Objects belonging to a [Screen][dispmanx.Screen]
+        that's inside a [frame()][dispmanx.Screen.frame] are changed when the
+        frame is committed instead.
+
+        Attributes:
+            animations list[Animation]: The animations that haven't finished.
+        """
+        self._animations = []
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {len(self._animations)} animation(s)>"
+
+    @property
+    def animations(self) -> list[Animation]:
+        with self._lock:
+            return list(self._animations)
+
+    def animate(
+        self,
+        target: DispmanX,
+        duration: float,
+        easing: Easing = "ease_in_out",
+        delay: float = 0.0,
+        on_done: Optional[Callable[[Animation], Any]] = None,
+        opacity: Union[None, int, Sequence[tuple[float, int]]] = None,
+        dest_rect: Union[None, Sequence[int], Sequence[tuple[float, Sequence[int]]]] = None,
+        layer: Union[None, int, Sequence[tuple[float, int]]] = None,
+    ) -> Animation:
+        """Start animating attributes of an object's element
+
+        Each attribute is either a value to animate to from its current one,
+        or keyframes as `(time, value)` pairs, where `time` is a fraction of
+        the duration ascending from `0.0` to `1.0`. If the first keyframe is
+        after `0.0`, the animation starts from the current value. The easing
+        curve applies between each pair of keyframes.
+
+        Example:
+            ```python
+            # Pulse twice, then stay half transparent
+            animator.animate(display, 2.0, opacity=[(0.0, 255), (0.25, 64), (0.5, 255), (0.75, 64), (1.0, 128)])
+            ```
+
+        An attribute that's already being animated on the same object is taken
+        over by the new animation, and the old one stops animating it (and is
+        cancelled if that was all it animated).
+
+        Arguments:
+            target: The [DispmanX][dispmanx.DispmanX] object to animate.
+            duration: Length of the animation in seconds.
+            easing: An easing curve mapping progress from `0.0` to `1.0`
+                (where `1.0` is the end value), as a function or the name of
+                one of `'linear'`, `'ease_in'`, `'ease_out'` or
+                `'ease_in_out'` (cubic).
+            delay: Seconds to wait before starting.
+            on_done: Function called with the animation after it finishes.
+            opacity: The opacity, from `0` to `255`, as in
+                [set_opacity()][dispmanx.DispmanX.set_opacity].
+            dest_rect: Where the buffer is shown, as an
+                `(x, y, width, height)` tuple or [Rect][dispmanx.dispmanx.Rect].
+                The hardware scales the buffer to fit, so its size and
+                contents don't change. The window (`rect`) doesn't follow;
+                call [move_to()][dispmanx.DispmanX.move_to] or
+                [resize()][dispmanx.DispmanX.resize] afterwards to lay it out
+                by its window again.
+            layer: The layer, as in [set_layer()][dispmanx.DispmanX.set_layer].
+                Values in between keyframes are rounded, so it steps.
+
+        Returns:
+            The [Animation][dispmanx.animation.Animation].
+
+        Raises:
+            DispmanXError: Raised if no attributes are given, or any argument
+                is invalid.
+        """
+        if target.destroyed:
+            raise DispmanXError(f"{target.__class__.__name__} object has already been destroyed.")
+        if duration < 0 or delay < 0:
+            raise DispmanXError(f"Invalid duration or delay: {duration}, {delay}")
+        if not callable(easing):
+            if easing not in EASINGS:
+                raise DispmanXError(f"Invalid easing: {easing}")
+            easing = EASINGS[easing]
+
+        given = {"opacity": opacity, "dest_rect": dest_rect, "layer": layer}
+        tracks = {
+            attribute: _parse_track(attribute, value, _current_value(target, attribute))
+            for attribute, value in given.items()
+            if value is not None
+        }
+        if not tracks:
+            raise DispmanXError("Nothing to animate")
+
+        animation = Animation(target, float(duration), tracks, easing, time.monotonic() + delay, on_done)
+        with self._lock:
+            for other in self._animations:
+                if other.target is target:
+                    for attribute in tracks:
+                        other._tracks.pop(attribute, None)
+                    if not other._tracks:
+                        other.cancel()
+            self._animations = [other for other in self._animations if not other.done]
+            self._animations.append(animation)
+        return animation
+
+    def cancel(self, target: Optional[DispmanX] = None) -> None:
+        """Cancel every animation, or only those of one object
+
+        Arguments:
+            target: The [DispmanX][dispmanx.DispmanX] object whose animations
+                to cancel, or `None` for all of them.
+        """
+        with self._lock:
+            for animation in self._animations:
+                if target is None or animation.target is target:
+                    animation.cancel()
+            self._animations = [animation for animation in self._animations if not animation.done]
+
+    def step(self, now: Optional[float] = None) -> bool:
+        """Apply every running animation's values for the current time, in a
+        single update
+
+        Attributes that haven't changed since the last step aren't sent.
+        Animations of destroyed objects are dropped.
+
+        Arguments:
+            now: The time to apply, from [time.monotonic()][time.monotonic],
+                or `None` for now.
+
+        Returns:
+            Whether any animations are still running.
+
+        Raises:
+            DispmanXRuntimeError: Raised if there's an error changing the
+                elements.
+        """
+        return self._step(time.monotonic() if now is None else now)
+
+    def run(self, timeout: Optional[float] = None) -> None:
+        """Step the animations once per frame until they're all done
+
+        Each step's update is submitted with `vc_dispmanx_update_submit_sync`,
+        which waits for the display's vertical blank, so on hardware steps are
+        paced by it. When a step returns sooner than a frame (nothing was
+        submitted, for example, during a delay, or the backend doesn't block),
+        this waits for the next vertical blank of an animated object that's
+        listening for them (see [wait_vsync()][dispmanx.DispmanX.wait_vsync]),
+        or otherwise sleeps until the frame's time is up, instead of spinning.
+
+        Arguments:
+            timeout: Maximum time to run in seconds, or `None` until done.
+
+        Raises:
+            DispmanXRuntimeError: Raised if there's an error changing the
+                elements.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            started = time.monotonic()
+            running = self._step(started)
+            now = time.monotonic()
+            if not running or (deadline is not None and now >= deadline):
+                return
+            listening, interval = self._frame_pacing()
+            remaining = started + interval - now
+            if deadline is not None:
+                remaining = min(remaining, deadline - now)
+            if remaining <= 0:
+                continue  # The submit already waited for a vertical blank
+            if listening is not None:
+                try:
+                    listening.wait_vsync(timeout=remaining + interval)
+                    continue
+                except DispmanXRuntimeError:
+                    remaining = started + interval - time.monotonic()  # Callback stalled, fall back to sleeping
+            time.sleep(max(remaining, 0))
+
+    def _frame_pacing(self) -> tuple[Optional[DispmanX], float]:
+        # An animated object whose vsync callback is already running, and the frame interval to step at
+        with self._lock:
+            targets = [animation.target for animation in self._animations if not animation.done]
+        for target in targets:
+            if not target.destroyed and target._vsync_interval is not None:
+                return target, target._vsync_interval
+        return None, FRAME_INTERVAL
+
+    def _step(self, now: float) -> bool:
+        # Returns whether animations are still running
+        with self._lock:
+            animations = [animation for animation in self._animations if not animation.done]
+
+        changes: dict[DispmanX, dict[str, Any]] = {}
+        finished = []
+        for animation in animations:
+            if animation.target.destroyed:
+                animation.cancel()
+                continue
+            values, ended = animation._values_at(now)
+            changes.setdefault(animation.target, {}).update(values)
+            if ended:
+                finished.append(animation)
+
+        batched: list[tuple[DispmanX, dict[str, Any], Callable[[int], None]]] = []
+        for target, values in changes.items():
+            values = {
+                attribute: value for attribute, value in values.items() if value != _current_value(target, attribute)
+            }
+            if not values:
+                continue
+            flags = 0
+            for attribute in values:
+                flags |= ATTRIBUTES[attribute]
+            change = self._make_change(
+                target,
+                flags,
+                values.get("opacity", target._opacity),
+                values.get("dest_rect", target._dest_rect),
+                values.get("layer", target._layer),
+            )
+            if target._screen is not None and target._screen._in_frame:
+                target._apply(change)
+                self._commit_values(target, values)
+            else:
+                batched.append((target, values, change))
+
+        if batched:
+            with DispmanX._start_and_submit_update() as update_handle:
+                for _, _, change in batched:
+                    change(update_handle)
+            # Only once the update went through, so a failed one is retried from the values actually on screen
+            for target, values, _ in batched:
+                self._commit_values(target, values)
+
+        for animation in finished:
+            animation._finished.set()
+        with self._lock:
+            self._animations = [animation for animation in self._animations if not animation.done]
+            running = bool(self._animations)
+        for animation in finished:
+            if animation._on_done is not None and not animation.cancelled:
+                animation._on_done(animation)
+        return running
+
+    @staticmethod
+    def _commit_values(target: DispmanX, values: dict[str, Any]) -> None:
+        target._opacity = values.get("opacity", target._opacity)
+        target._dest_rect = values.get("dest_rect", target._dest_rect)
+        target._layer = values.get("layer", target._layer)
+
+    @staticmethod
+    def _make_change(target: DispmanX, flags: int, opacity: int, dest_rect: Rect, layer: int) -> Callable[[int], None]:
+        # Binds this step's values, since a Screen may apply the change after later steps
+        return lambda update_handle: target._change_attributes(
+            update_handle, flags, opacity=opacity, dest_rect=dest_rect, layer=layer
+        )
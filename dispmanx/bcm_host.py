@@ -1,26 +1,50 @@
 import ctypes as ct
-from ctypes.util import find_library
-import sys
+import os
+import threading
+from typing import Any, Optional
 
+from .exceptions import DispmanXError, DispmanXRuntimeError
 
-_lib_path = find_library("bcm_host")
-if _lib_path is None:
-    print(
-        "Unable to locate bcm_host library. Are you sure the libraspberrypi0 package is installed? Try running:\n"
-        "    $ sudo apt-get install -y --no-install-recommends libraspberrypi0"
-    )
-    sys.exit(1)
 
+# The library is loaded, and each function's prototype is bound, the first time one of the functions in
+# _PROTOTYPES is used (see __getattr__ at the bottom of this file), so importing dispmanx stays fast. Use load() to
+# choose the backend or library path explicitly before that.
+
+# Checked before falling back to find_library(), which runs ldconfig and is slow on small Pis
+LIBRARY_PATHS = (
+    "/opt/vc/lib/libbcm_host.so",
+    "/usr/lib/arm-linux-gnueabihf/libbcm_host.so.0",
+    "/usr/lib/aarch64-linux-gnu/libbcm_host.so.0",
+    "/usr/lib/libbcm_host.so",
+)
+
+BACKEND: Optional[str] = None  # Set to "bcm_host" or "sim" once loaded
+LIBRARY_PATH: Optional[str] = None
 
-_lib = ct.CDLL(_lib_path)
+_lib: Any = None
+_load_lock = threading.Lock()
 
 DISPMANX_FLAGS_ALPHA_FROM_SOURCE = 0
+DISPMANX_FLAGS_ALPHA_MIX = 1 << 17
+DISPMANX_ELEMENT_CHANGE_LAYER = 1 << 0
+DISPMANX_ELEMENT_CHANGE_OPACITY = 1 << 1
+DISPMANX_ELEMENT_CHANGE_DEST_RECT = 1 << 2
+DISPMANX_ELEMENT_CHANGE_SRC_RECT = 1 << 3
+DISPMANX_ELEMENT_CHANGE_MASK_RESOURCE = 1 << 4
+DISPMANX_ELEMENT_CHANGE_TRANSFORM = 1 << 5
 DISPMANX_NO_HANDLE = 0
 DISPMANX_NO_ROTATE = 0
+DISPMANX_ROTATE_90 = 1
+DISPMANX_ROTATE_180 = 2
+DISPMANX_ROTATE_270 = 3
+DISPMANX_FLIP_HRIZ = 1 << 16
+DISPMANX_FLIP_VERT = 1 << 17
 DISPMANX_PROTECTION_NONE = 0
 TV_MAX_ATTACHED_DISPLAYS = 16
 VC_IMAGE_RGB565 = 1
+VC_IMAGE_YUV420 = 3
 VC_IMAGE_RGB888 = 5
+VC_IMAGE_8BPP = 6
 VC_IMAGE_RGBA32 = 15
 VC_IMAGE_RGBA16 = 18
 VC_IMAGE_ARGB8888 = 43
@@ -28,6 +52,10 @@ VC_IMAGE_XRGB8888 = 44
 VC_IMAGE_RGBX8888 = 50
 
 
+DISPMANX_CALLBACK_FUNC_T = ct.CFUNCTYPE(None, ct.c_uint32, ct.c_void_p)
+TVSERVICE_CALLBACK_T = ct.CFUNCTYPE(None, ct.c_void_p, ct.c_uint32, ct.c_uint32, ct.c_uint32)
+
+
 class VC_RECT_T(ct.Structure):
     _fields_ = (
         ("x", ct.c_int32),
@@ -71,63 +99,139 @@ class TV_ATTACHED_DEVICES_T(ct.Structure):
         return cls.TV_ATTACHED_DEVICES_DISPLAY_TO_TEXT_UNKNOWN
 
 
-bcm_host_init = _lib.bcm_host_init
-bcm_host_init.argtypes = ()
-bcm_host_init.restype = None
-
-vc_dispmanx_display_open = _lib.vc_dispmanx_display_open
-vc_dispmanx_display_open.argtypes = (ct.c_uint32,)
-vc_dispmanx_display_open.restype = ct.c_uint32
-
-vc_dispmanx_resource_create = _lib.vc_dispmanx_resource_create
-vc_dispmanx_resource_create.argtypes = (ct.c_uint32, ct.c_uint32, ct.c_uint32, ct.POINTER(ct.c_uint32))
-vc_dispmanx_resource_create.restype = ct.c_uint32
-
-vc_dispmanx_resource_delete = _lib.vc_dispmanx_resource_delete
-vc_dispmanx_resource_delete.argtypes = (ct.c_uint32,)
-vc_dispmanx_resource_delete.restype = ct.c_int
-
-vc_dispmanx_element_add = _lib.vc_dispmanx_element_add
-vc_dispmanx_element_add.argtypes = (
-    ct.c_uint32,
-    ct.c_uint32,
-    ct.c_int32,
-    ct.POINTER(VC_RECT_T),
-    ct.c_uint32,
-    ct.POINTER(VC_RECT_T),
-    ct.c_uint32,
-    ct.POINTER(VC_DISPMANX_ALPHA_T),
-    ct.c_void_p,
-    ct.c_uint32,
-)
-vc_dispmanx_element_add.restype = ct.c_uint32
-
-vc_dispmanx_element_remove = _lib.vc_dispmanx_element_remove
-vc_dispmanx_element_remove.argtypes = (ct.c_uint32, ct.c_uint32)
-vc_dispmanx_element_remove.restype = ct.c_int
-
-vc_dispmanx_resource_write_data = _lib.vc_dispmanx_resource_write_data
-vc_dispmanx_resource_write_data.argtypes = (
-    ct.c_uint32,
-    ct.c_uint32,
-    ct.c_int,
-    ct.c_void_p,
-    ct.POINTER(VC_RECT_T),
-)
-vc_dispmanx_resource_write_data.restype = ct.c_int
-
-vc_dispmanx_update_submit_sync = _lib.vc_dispmanx_update_submit_sync
-vc_dispmanx_update_submit_sync.argtypes = (ct.c_uint32,)
-vc_dispmanx_update_submit_sync.restype = ct.c_int
-
-vc_dispmanx_update_start = _lib.vc_dispmanx_update_start
-vc_dispmanx_update_start.argtypes = (ct.c_int32,)
-vc_dispmanx_update_start.restype = ct.c_uint32
-
-graphics_get_display_size = _lib.graphics_get_display_size
-graphics_get_display_size.argtypes = (ct.c_uint16, ct.POINTER(ct.c_uint32), ct.POINTER(ct.c_uint32))
-graphics_get_display_size.restype = ct.c_int32
-
-vc_tv_get_attached_devices = _lib.vc_tv_get_attached_devices
-vc_tv_get_attached_devices.argtypes = (ct.POINTER(TV_ATTACHED_DEVICES_T),)
-vc_tv_get_attached_devices.restype = ct.c_int
+# Function name -> (argtypes, restype)
+_PROTOTYPES: dict[str, tuple[tuple[Any, ...], Any]] = {
+    "bcm_host_init": ((), None),
+    "vc_dispmanx_display_open": ((ct.c_uint32,), ct.c_uint32),
+    "vc_dispmanx_display_close": ((ct.c_uint32,), ct.c_int),
+    "vc_dispmanx_resource_create": ((ct.c_uint32, ct.c_uint32, ct.c_uint32, ct.POINTER(ct.c_uint32)), ct.c_uint32),
+    "vc_dispmanx_resource_delete": ((ct.c_uint32,), ct.c_int),
+    "vc_dispmanx_resource_set_palette": ((ct.c_uint32, ct.c_void_p, ct.c_int, ct.c_int), ct.c_int),
+    "vc_dispmanx_element_add": (
+        (
+            ct.c_uint32,
+            ct.c_uint32,
+            ct.c_int32,
+            ct.POINTER(VC_RECT_T),
+            ct.c_uint32,
+            ct.POINTER(VC_RECT_T),
+            ct.c_uint32,
+            ct.POINTER(VC_DISPMANX_ALPHA_T),
+            ct.c_void_p,
+            ct.c_uint32,
+        ),
+        ct.c_uint32,
+    ),
+    "vc_dispmanx_element_remove": ((ct.c_uint32, ct.c_uint32), ct.c_int),
+    "vc_dispmanx_element_change_source": ((ct.c_uint32, ct.c_uint32, ct.c_uint32), ct.c_int),
+    "vc_dispmanx_element_change_attributes": (
+        (
+            ct.c_uint32,
+            ct.c_uint32,
+            ct.c_uint32,
+            ct.c_int32,
+            ct.c_uint8,
+            ct.POINTER(VC_RECT_T),
+            ct.POINTER(VC_RECT_T),
+            ct.c_uint32,
+            ct.c_uint32,
+        ),
+        ct.c_int,
+    ),
+    "vc_dispmanx_resource_write_data": (
+        (
+            ct.c_uint32,
+            ct.c_uint32,
+            ct.c_int,
+            ct.c_void_p,
+            ct.POINTER(VC_RECT_T),
+        ),
+        ct.c_int,
+    ),
+    "vc_dispmanx_resource_read_data": ((ct.c_uint32, ct.POINTER(VC_RECT_T), ct.c_void_p, ct.c_uint32), ct.c_int),
+    "vc_dispmanx_snapshot": ((ct.c_uint32, ct.c_uint32, ct.c_uint32), ct.c_int),
+    "vc_dispmanx_update_submit_sync": ((ct.c_uint32,), ct.c_int),
+    "vc_dispmanx_update_submit": ((ct.c_uint32, DISPMANX_CALLBACK_FUNC_T, ct.c_void_p), ct.c_int),
+    "vc_dispmanx_update_start": ((ct.c_int32,), ct.c_uint32),
+    "vc_dispmanx_vsync_callback": ((ct.c_uint32, DISPMANX_CALLBACK_FUNC_T, ct.c_void_p), ct.c_int),
+    "graphics_get_display_size": ((ct.c_uint16, ct.POINTER(ct.c_uint32), ct.POINTER(ct.c_uint32)), ct.c_int32),
+    "vc_tv_get_attached_devices": ((ct.POINTER(TV_ATTACHED_DEVICES_T),), ct.c_int),
+    "vc_tv_register_callback": ((TVSERVICE_CALLBACK_T, ct.c_void_p), None),
+}
+
+
+def _find_library_path() -> str:
+    for path in LIBRARY_PATHS:
+        if os.path.exists(path):
+            return path
+
+    from ctypes.util import find_library
+
+    found = find_library("bcm_host")
+    if found is None:
+        raise DispmanXRuntimeError(
+            "Unable to locate bcm_host library. Are you sure the libraspberrypi0 package is installed? Try running:\n"
+            "    $ sudo apt-get install -y --no-install-recommends libraspberrypi0\n"
+            "Or set DISPMANX_BCM_HOST_PATH to its location, or DISPMANX_BACKEND=sim to use a simulated display."
+        )
+    return found
+
+
+def load(backend: Optional[str] = None, path: Optional[str] = None) -> None:
+    """Load the DispmanX library, if it isn't already
+
+    This happens automatically the first time it's needed, so it's only
+    necessary to call this to pick the backend or library path in code rather
+    than with environment variables.
+
+    Arguments:
+        backend: `"bcm_host"` to use the Raspberry Pi's `libbcm_host.so`, or
+            `"sim"` for the [simulated backend][running-without-a-pi]. Defaults
+            to the `DISPMANX_BACKEND` environment variable, or `"bcm_host"`.
+        path: Path of `libbcm_host.so`. Defaults to the
+            `DISPMANX_BCM_HOST_PATH` environment variable, otherwise a few well
+            known locations are checked before searching for it.
+
+    Raises:
+        DispmanXError: Raised if the backend is unknown, or the library was
+            already loaded with a different backend or path.
+        DispmanXRuntimeError: Raised if the library can't be found or loaded.
+    """
+    global BACKEND, LIBRARY_PATH, _lib
+
+    with _load_lock:
+        if _lib is not None:
+            if (backend is not None and backend != BACKEND) or (path is not None and path != LIBRARY_PATH):
+                raise DispmanXError(f"DispmanX library already loaded ({BACKEND} backend)")
+            return
+
+        backend = backend or os.environ.get("DISPMANX_BACKEND") or "bcm_host"
+        if backend not in ("bcm_host", "sim"):
+            raise DispmanXError(f"Unknown DispmanX backend: {backend} (expected bcm_host or sim)")
+
+        if backend == "sim":
+            from . import sim
+
+            _lib = sim
+        else:
+            path = path or os.environ.get("DISPMANX_BCM_HOST_PATH") or _find_library_path()
+            try:
+                _lib = ct.CDLL(path)
+            except OSError as e:
+                raise DispmanXRuntimeError(f"Unable to load bcm_host library from {path}: {e}")
+            LIBRARY_PATH = path
+        BACKEND = backend
+
+
+def __getattr__(name: str) -> Any:
+    # Only called for attributes that aren't set yet, so each function is looked up here once then cached as a global
+    if name not in _PROTOTYPES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    if _lib is None:
+        load()
+
+    func = getattr(_lib, name)
+    func.argtypes, func.restype = _PROTOTYPES[name]
+    globals()[name] = func
+    return func
@@ -0,0 +1,190 @@
+import platform
+import subprocess
+import sys
+from typing import Any, Iterable, Optional, cast, get_args
+
+from . import __version__, bcm_host, convert
+from .dispmanx import HAVE_NUMPY, PIXEL_FORMATS, BufferType, DispmanX, PixelFormatType
+from .exceptions import DispmanXError
+from .stats import FrameStats
+
+
+DEFAULT_PIXEL_FORMATS = tuple(PIXEL_FORMATS)
+DEFAULT_BUFFER_TYPES = ("numpy", "ctypes") if HAVE_NUMPY else ("ctypes",)
+DEFAULT_FRAMES = 60
+DEFAULT_IMPORT_BUDGET_MS = 50
+
+# Run in a fresh interpreter. Optional dependencies are imported first so only dispmanx's own import is timed.
+IMPORT_TIME_SCRIPT = """
+import time
+try:
+    import numpy
+except ImportError:
+    pass
+start = time.perf_counter()
+import dispmanx
+elapsed = time.perf_counter() - start
+from dispmanx import bcm_host
+print(elapsed, bcm_host._lib is not None)
+"""
+
+
+def benchmark_update(
+    pixel_format: str,
+    buffer_type: str,
+    size: Optional[tuple[int, int]] = None,
+    frames: int = DEFAULT_FRAMES,
+    **kwargs: Any,
+) -> dict[str, Any]:
+    """Time full-frame [update()][dispmanx.DispmanX.update] calls for one
+    configuration
+
+    Arguments:
+        pixel_format: As in [DispmanX][dispmanx.DispmanX].
+        buffer_type: As in [DispmanX][dispmanx.DispmanX].
+        size: Render size `(width, height)`, or `None` for the display's size.
+        frames: Number of updates to time.
+        **kwargs: Any other arguments accepted by [DispmanX][dispmanx.DispmanX].
+
+    Returns:
+        A dictionary describing the configuration, and per-frame averages in
+            milliseconds of the `total_ms` spent updating, the time spent in
+            `vc_dispmanx_resource_write_data` (`write_ms`) and submitting the
+            update (`submit_ms`), and everything else (`python_ms`), as
+            measured by [FrameStats][dispmanx.FrameStats], along with the
+            achieved `fps` and `mb_per_sec` uploaded.
+
+    Raises:
+        DispmanXError: Raised if the pixel format or buffer type is invalid.
+    """
+    if pixel_format not in PIXEL_FORMATS:
+        raise DispmanXError(f"Invalid pixel format: {pixel_format}")
+    if buffer_type not in get_args(BufferType):
+        raise DispmanXError(f"Invalid buffer type: {buffer_type}")
+
+    stats = FrameStats(window=max(frames, 2))
+    display = DispmanX(
+        pixel_format=cast(PixelFormatType, pixel_format),
+        buffer_type=cast(BufferType, buffer_type),
+        render_size=size,
+        stats=stats,
+        **kwargs,
+    )
+    try:
+        display.update()  # Warm up
+        stats.reset()
+        for _ in range(frames):
+            display.update()
+
+        summary = stats.summary()
+        return {
+            "pixel_format": pixel_format,
+            "buffer_type": buffer_type,
+            "width": display.width,
+            "height": display.height,
+            "frames": frames,
+            **{f"{phase}_ms": summary[phase]["mean_ms"] for phase in ("total", "write", "submit", "python")},
+            "fps": 1000 / summary["total"]["mean_ms"],
+            "mb_per_sec": stats.bytes_uploaded / (summary["total"]["mean_ms"] * frames / 1000) / 1e6,
+        }
+    finally:
+        display.destroy()
+
+
+def benchmark_import(repeat: int = 5) -> dict[str, Any]:
+    """Time `import dispmanx` in fresh Python interpreters
+
+    Arguments:
+        repeat: Number of interpreters to time (the best time is kept).
+
+    Returns:
+        A dictionary with the import time in milliseconds as `import_ms`, and
+            whether the DispmanX library was loaded during the import as
+            `library_loaded` (it never should be).
+    """
+    best, library_loaded = float("inf"), False
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_TIME_SCRIPT], check=True, capture_output=True, text=True
+        ).stdout.split()
+        best, library_loaded = min(best, float(output[0])), library_loaded or output[1] == "True"
+    return {"import_ms": best * 1000, "library_loaded": library_loaded}
+
+
+def run(
+    pixel_formats: Iterable[str] = DEFAULT_PIXEL_FORMATS,
+    buffer_types: Iterable[str] = DEFAULT_BUFFER_TYPES,
+    sizes: Iterable[Optional[tuple[int, int]]] = (None,),
+    frames: int = DEFAULT_FRAMES,
+    include_convert: bool = False,
+) -> dict[str, Any]:
+    """Run [benchmark_update()][dispmanx.bench.benchmark_update] for every
+    combination of pixel format, buffer type and size
+
+    Arguments:
+        pixel_formats: Pixel formats to benchmark.
+        buffer_types: Buffer types to benchmark.
+        sizes: Render sizes to benchmark (`None` for the display's size).
+        frames: Number of updates to time for each combination.
+        include_convert: Also benchmark staging buffer conversion with
+            [convert.benchmark()][dispmanx.convert.benchmark].
+
+    Returns:
+        A JSON serializable dictionary with the environment the benchmarks ran
+            in under `"environment"`, and their results under `"update"` (and
+            `"convert"`).
+    """
+    display = DispmanX.get_default_display()
+    results: dict[str, Any] = {
+        "environment": {
+            "version": __version__,
+            "backend": bcm_host.BACKEND,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "numpy": HAVE_NUMPY,
+            "display": {"device_id": display.device_id, "name": display.name, **display.size._asdict()},
+        },
+        "update": [
+            benchmark_update(pixel_format, buffer_type, size, frames)
+            for size in sizes
+            for pixel_format in pixel_formats
+            for buffer_type in buffer_types
+        ],
+    }
+    if include_convert:
+        width, height = display.size
+        results["convert"] = convert.benchmark(width, height)
+    return results
+
+
+def format_results(results: dict[str, Any]) -> str:
+    """Format results from [run()][dispmanx.bench.run] as a table"""
+    environment = results["environment"]
+    display = environment["display"]
+    lines = [
+        (
+            f"dispmanx {environment['version']} ({environment['backend']} backend), Python {environment['python']}"
+            f" on {environment['machine']}, {display['name']} ({display['width']}x{display['height']})"
+        ),
+        "",
+        (
+            f"{'format':<7} {'buffer':<7} {'size':>10} {'update':>9} {'python':>9} {'write':>9} {'submit':>9}"
+            f" {'fps':>7} {'MB/s':>8}"
+        ),
+    ]
+    for result in results["update"]:
+        lines.append(
+            f"{result['pixel_format']:<7} {result['buffer_type']:<7}"
+            f" {str(result['width']) + 'x' + str(result['height']):>10}"
+            + "".join(f" {result[key]:7.2f}ms" for key in ("total_ms", "python_ms", "write_ms", "submit_ms"))
+            + f" {result['fps']:7.1f} {result['mb_per_sec']:8.1f}"
+        )
+
+    if "convert" in results:
+        lines += ["", f"{'staging':<7} {'target':<7} {'dither':<7} {'MB/s':>8}"]
+        for result in results["convert"]:
+            lines.append(
+                f"{result['src_format']:<7} {result['dst_format']:<7} {'yes' if result['dither'] else 'no':<7}"
+                f" {result['mb_per_sec']:8.1f}"
+            )
+    return "\n".join(lines)
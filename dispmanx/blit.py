@@ -0,0 +1,378 @@
+from typing import TYPE_CHECKING, Any, Optional, Sequence, Union
+
+from .convert import DEFAULT_BAND_ROWS, STAGING_FORMATS
+from .dispmanx import HAVE_NUMPY, Rect, RectType
+from .exceptions import DispmanXError
+
+
+if HAVE_NUMPY:
+    import numpy
+
+if TYPE_CHECKING:
+    from .dispmanx import DispmanX
+
+
+# Byte offsets of the (red, green, blue, alpha) channels of the formats that can be blended onto
+_BLEND_FORMATS: dict[str, tuple[int, int, int, Optional[int]]] = {**STAGING_FORMATS, "RGB": (0, 1, 2, None)}
+
+Color = Union[int, Sequence[int]]
+
+
+def _pixels(display: "DispmanX") -> tuple[Any, str]:
+    # A (height, width, channels) NumPy view of the buffer's pixels, without copying, and their format
+    if not HAVE_NUMPY:
+        raise DispmanXError("Blitting requires NumPy")
+    buffer_ref = display._buffer_ref
+    if display.destroyed or buffer_ref is None:
+        raise DispmanXError("No buffer to draw to")
+    pixel_format = buffer_ref.pixel_format
+    if pixel_format.format == "YUV420":
+        raise DispmanXError("Can't draw to planar YUV420 buffers")
+    dtype = numpy.dtype(pixel_format.numpy_dtype_name)
+    width, height = display.size
+    rows = numpy.frombuffer(buffer_ref.data, dtype=numpy.uint8).reshape(height, buffer_ref.pitch)
+    return rows[:, : width * pixel_format.byte_width].view(dtype).reshape(height, width, -1), pixel_format.format
+
+
+def _clip(size: tuple[int, int], x: int, y: int, width: int, height: int) -> Optional[tuple[Rect, int, int]]:
+    # The part of a rectangle on the buffer, and how far it was cut off on the left and top
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + width, size[0]), min(y + height, size[1])
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return Rect(x0, y0, x1 - x0, y1 - y0), x0 - x, y0 - y
+
+
+def _parse_rect(rect: RectType) -> Rect:
+    try:
+        return Rect(*(int(n) for n in rect))
+    except (TypeError, ValueError):
+        raise DispmanXError(f"Invalid rectangle: {rect!r}")
+
+
+def _source(src: Any, src_rect: Optional[RectType], channels: Optional[int], dtype: Any) -> Any:
+    src = numpy.asarray(src)
+    if src.ndim == 2:
+        src = src[..., None]
+    if src.ndim != 3 or (channels is not None and src.shape[2] != channels) or src.dtype != dtype:
+        raise DispmanXError(f"Source of shape {src.shape} and type {src.dtype} doesn't match the buffer's pixels")
+    if src_rect is not None:
+        x, y, width, height = _parse_rect(src_rect)
+        if x < 0 or y < 0 or width <= 0 or height <= 0 or x + width > src.shape[1] or y + height > src.shape[0]:
+            raise DispmanXError(f"Source rectangle {src_rect!r} isn't inside the source")
+        src = src[y : y + height, x : x + width]
+    return src
+
+
+def _pack_color(display: "DispmanX", pixels: Any, pixel_format: str, color: Color) -> Any:
+    # The color as one pixel in the buffer's format
+    if pixel_format == "8BPP":
+        if isinstance(color, int):
+            index = color
+        else:
+            from .palette import quantize
+
+            index = int(quantize(numpy.array([[_rgba(color)]], dtype=numpy.uint8), display.palette)[0, 0])
+        if not 0 <= index <= 255:
+            raise DispmanXError(f"Invalid palette index: {color!r}")
+        return numpy.array([index], dtype=pixels.dtype)
+
+    red, green, blue, alpha = _rgba(color)
+    if pixel_format == "RGB565":
+        return numpy.array([(red >> 3) << 11 | (green >> 2) << 5 | blue >> 3], dtype=pixels.dtype)
+    if pixel_format == "RGBA16":
+        return numpy.array([(red >> 4) << 12 | (green >> 4) << 8 | (blue >> 4) << 4 | alpha >> 4], dtype=pixels.dtype)
+
+    pixel = numpy.full(pixels.shape[2], 255, dtype=pixels.dtype)  # Unused X bytes are left opaque
+    for channel, offset in zip((red, green, blue, alpha), _BLEND_FORMATS[pixel_format]):
+        if offset is not None:
+            pixel[offset] = channel
+    return pixel
+
+
+def _rgba(color: Color) -> tuple[int, int, int, int]:
+    try:
+        channels = tuple(int(channel) for channel in color)  # type: ignore
+    except (TypeError, ValueError):
+        raise DispmanXError(f"Invalid color: {color!r}")
+    if len(channels) == 3:
+        channels += (255,)
+    if len(channels) != 4 or not all(0 <= channel <= 255 for channel in channels):
+        raise DispmanXError(f"Invalid color: {color!r}")
+    return channels  # type: ignore
+
+
+def _divide_by_255(values: Any) -> Any:
+    # Rounded x / 255 for x up to 255 * 255, in place on uint16 values
+    values += 128
+    values += values >> 8
+    values >>= 8
+    return values
+
+
+def _blend_opaque(
+    src: Any, dst: Any, src_channels: list[int], src_alpha: int, dst_channels: list[int], premultiplied: bool
+) -> None:
+    # Over an opaque destination: out = src * alpha + dst * (1 - alpha)
+    alpha = src[..., src_alpha].astype(numpy.uint16)
+    inverse = 255 - alpha
+    for src_channel, dst_channel in zip(src_channels, dst_channels):
+        out = dst[..., dst_channel].astype(numpy.uint16)
+        out *= inverse
+        if premultiplied:
+            _divide_by_255(out)
+            out += src[..., src_channel]
+            numpy.minimum(out, 255, out=out)  # Invalid premultiplied colors brighter than their alpha
+        else:
+            out += src[..., src_channel] * alpha
+            _divide_by_255(out)
+        dst[..., dst_channel] = out
+
+
+def _blend_straight(
+    src: Any,
+    dst: Any,
+    src_channels: list[int],
+    src_alpha: int,
+    dst_channels: list[int],
+    dst_alpha: int,
+    premultiplied: bool,
+) -> None:
+    # Over a destination with straight (not premultiplied) alpha, which is what the hardware composites, so colors
+    # are weighted by both alphas and divided by the combined coverage. All values are scaled by 255 * 255.
+    alpha = src[..., src_alpha].astype(numpy.uint32)
+    weight = dst[..., dst_alpha].astype(numpy.uint32)
+    weight *= 255 - alpha
+    coverage = alpha * 255
+    coverage += weight
+    divisor = numpy.maximum(coverage, 1)
+    for src_channel, dst_channel in zip(src_channels, dst_channels):
+        out = src[..., src_channel].astype(numpy.uint32)
+        out *= 255 * 255 if premultiplied else alpha * 255
+        out += dst[..., dst_channel] * weight
+        out += divisor >> 1
+        out //= divisor
+        numpy.minimum(out, 255, out=out)
+        dst[..., dst_channel] = out
+    coverage += 127
+    coverage //= 255
+    dst[..., dst_alpha] = coverage
+
+
+def fill_rect(display: "DispmanX", rect: RectType, color: Color) -> Optional[Rect]:
+    """Fill a rectangle of a [DispmanX][dispmanx.DispmanX] object's buffer
+    with a color, in place
+
+    Example:
+        ```python
+        from dispmanx import DispmanX, blit
+
+        display = DispmanX(damage_tracking="manual")
+        blit.fill_rect(display, (0, 0, 400, 40), (32, 32, 32))
+        display.update()  # Uploads only the rows filled
+        ```
+
+    Like every drawing function in this module, this requires
+    [NumPy][numpy], works on the buffer in any pixel format (or its
+    `staging_format`), clips to the buffer, and reports what it drew with
+    [mark_damaged()][dispmanx.DispmanX.mark_damaged].
+
+    Arguments:
+        display: The object whose buffer to draw to.
+        rect: The region as a [Rect][dispmanx.dispmanx.Rect] or an
+            `(x, y, width, height)` tuple.
+        color: `(red, green, blue)` or `(red, green, blue, alpha)` with
+            channels from 0 to 255, packed into the buffer's format. For
+            `'8BPP'`, a palette index, or a color mapped to the nearest one.
+
+    Returns:
+        The region drawn to, or `None` if it's entirely outside the buffer.
+
+    Raises:
+        DispmanXError: Raised if NumPy isn't available, there's no buffer, or
+            an argument is invalid.
+    """
+    pixels, pixel_format = _pixels(display)
+    clipped = _clip(display.size, *_parse_rect(rect))
+    if clipped is None:
+        return None
+    (x, y, width, height), _, _ = clipped
+    pixels[y : y + height, x : x + width] = _pack_color(display, pixels, pixel_format, color)
+    display.mark_damaged(clipped[0])
+    return clipped[0]
+
+
+def blit(display: "DispmanX", src: Any, x: int, y: int, src_rect: Optional[RectType] = None) -> Optional[Rect]:
+    """Copy pixels already in the buffer's format onto a
+    [DispmanX][dispmanx.DispmanX] object's buffer, in place
+
+    Parts of the source that fall outside the buffer are clipped, so sprites
+    can move partly off screen.
+
+    Example:
+        ```python
+        icon = numpy.asarray(Image.open("icon.png").convert("RGBA"))
+        blit.blit(display, icon, 20, 20)
+        ```
+
+    Arguments:
+        display: The object whose buffer to draw to.
+        src: A `(height, width, channels)` [NumPy array][numpy.array] (or
+            `(height, width)` for single channel formats) with the same type
+            and number of channels as the buffer.
+        x: Where the source's left edge goes in the buffer.
+        y: Where the source's top edge goes in the buffer.
+        src_rect: The region of the source to copy, for example, one frame of
+            a sprite sheet, or `None` for all of it.
+
+    Returns:
+        The region drawn to, or `None` if it's entirely outside the buffer.
+
+    Raises:
+        DispmanXError: Raised if NumPy isn't available, there's no buffer, or
+            the source doesn't match the buffer's format.
+    """
+    pixels, _ = _pixels(display)
+    src = _source(src, src_rect, pixels.shape[2], pixels.dtype)
+    clipped = _clip(display.size, int(x), int(y), src.shape[1], src.shape[0])
+    if clipped is None:
+        return None
+    (dst_x, dst_y, width, height), src_x, src_y = clipped
+    pixels[dst_y : dst_y + height, dst_x : dst_x + width] = src[src_y : src_y + height, src_x : src_x + width]
+    display.mark_damaged(clipped[0])
+    return clipped[0]
+
+
+def blend(
+    display: "DispmanX",
+    src: Any,
+    x: int,
+    y: int,
+    src_rect: Optional[RectType] = None,
+    src_format: str = "RGBA",
+    premultiplied: bool = False,
+) -> Optional[Rect]:
+    """Composite 32-bit pixels with alpha over a [DispmanX][dispmanx.DispmanX]
+    object's buffer, in place
+
+    The "over" operator, computed in integers a band of rows at a time, so
+    only small temporaries are allocated however large the source is. The
+    buffer's alpha channel (if it has one) becomes the combined coverage, so
+    the result still blends correctly over the layers beneath.
+
+    Example:
+        ```python
+        glyphs = render_text("12:34")  # (height, width, 4) RGBA
+        blit.blend(display, glyphs, 40, 40)
+        ```
+
+    Arguments:
+        display: The object whose buffer to draw to. Its buffer (or
+            `staging_format`) must be in one of the 24 or 32-bit formats.
+            Convert 16-bit and `'8BPP'` objects with a `staging_format`.
+        src: A `(height, width, 4)` uint8 [NumPy array][numpy.array].
+        x: Where the source's left edge goes in the buffer.
+        y: Where the source's top edge goes in the buffer.
+        src_rect: The region of the source to composite, or `None` for all of
+            it.
+        src_format: The layout of the source's pixels, `'RGBA'` or `'ARGB'`.
+        premultiplied: Whether the source's colors are already multiplied by
+            its alpha, as produced by cairo, for example.
+
+    Returns:
+        The region drawn to, or `None` if it's entirely outside the buffer.
+
+    Raises:
+        DispmanXError: Raised if NumPy isn't available, there's no buffer,
+            the buffer's format can't be blended onto, or an argument is
+            invalid.
+    """
+    pixels, pixel_format = _pixels(display)
+    if pixel_format not in _BLEND_FORMATS:
+        raise DispmanXError(f"Can't blend onto the {pixel_format} pixel format, use a staging_format")
+    if src_format not in ("RGBA", "ARGB"):
+        raise DispmanXError(f"Invalid source format: {src_format}")
+    src = _source(src, src_rect, 4, numpy.uint8)
+    clipped = _clip(display.size, int(x), int(y), src.shape[1], src.shape[0])
+    if clipped is None:
+        return None
+    (dst_x, dst_y, width, height), src_x, src_y = clipped
+    src = src[src_y : src_y + height, src_x : src_x + width]
+    dst = pixels[dst_y : dst_y + height, dst_x : dst_x + width]
+
+    *src_channels, src_alpha = STAGING_FORMATS[src_format]
+    *dst_channels, dst_alpha = _BLEND_FORMATS[pixel_format]
+    assert src_alpha is not None  # Both source formats have alpha
+    for top in range(0, height, DEFAULT_BAND_ROWS):
+        src_band, dst_band = src[top : top + DEFAULT_BAND_ROWS], dst[top : top + DEFAULT_BAND_ROWS]
+        if dst_alpha is None:
+            _blend_opaque(src_band, dst_band, src_channels, src_alpha, dst_channels, premultiplied)
+        else:
+            _blend_straight(src_band, dst_band, src_channels, src_alpha, dst_channels, dst_alpha, premultiplied)
+
+    display.mark_damaged(clipped[0])
+    return clipped[0]
+
+
+def scroll(
+    display: "DispmanX", dx: int, dy: int, rect: Optional[RectType] = None, fill: Optional[Color] = None
+) -> Optional[Rect]:
+    """Shift the contents of a region of a [DispmanX][dispmanx.DispmanX]
+    object's buffer, in place
+
+    Copied a band of rows at a time in the order that never overwrites pixels
+    before they're read, so scrolling the whole buffer doesn't need a second
+    copy of it. Good for terminals, logs
+    and charts that only draw their newest line.
+
+    Example:
+        ```python
+        # Scroll a log up by a line of text, then draw the new line at the bottom
+        blit.scroll(display, 0, -line_height, fill=(0, 0, 0))
+        ```
+
+    Arguments:
+        display: The object whose buffer to scroll.
+        dx: Pixels to move the contents right (or left if negative).
+        dy: Pixels to move the contents down (or up if negative).
+        rect: The region to scroll within, as a [Rect][dispmanx.dispmanx.Rect]
+            or an `(x, y, width, height)` tuple, or `None` for the whole
+            buffer. Contents moved outside of it are dropped.
+        fill: Color to fill the uncovered strips with (as in
+            [fill_rect()][dispmanx.blit.fill_rect]), or `None` to leave the
+            old pixels there.
+
+    Returns:
+        The region scrolled, or `None` if it's entirely outside the buffer.
+
+    Raises:
+        DispmanXError: Raised if NumPy isn't available, there's no buffer, or
+            an argument is invalid.
+    """
+    pixels, pixel_format = _pixels(display)
+    clipped = _clip(display.size, *(_parse_rect(rect) if rect is not None else (0, 0, *display.size)))
+    if clipped is None:
+        return None
+    x, y, width, height = clipped[0]
+    dx, dy = int(dx), int(dy)
+    region = pixels[y : y + height, x : x + width]
+
+    if abs(dx) < width and abs(dy) < height and (dx or dy):
+        src = region[max(-dy, 0) : height - max(dy, 0), max(-dx, 0) : width - max(dx, 0)]
+        dst = region[max(dy, 0) : height - max(-dy, 0), max(dx, 0) : width - max(-dx, 0)]
+        # A band of rows at a time, working away from where the rows go, so none are overwritten before they're read
+        # and NumPy only needs a band sized copy where a band overlaps its own destination
+        starts = range(0, src.shape[0], DEFAULT_BAND_ROWS)
+        for top in reversed(starts) if dy > 0 else starts:
+            dst[top : top + DEFAULT_BAND_ROWS] = src[top : top + DEFAULT_BAND_ROWS]
+
+    if fill is not None and (dx or dy):
+        color = _pack_color(display, pixels, pixel_format, fill)
+        uncovered_x, uncovered_y = min(abs(dx), width), min(abs(dy), height)
+        region[: uncovered_y if dy > 0 else 0] = color
+        region[height - uncovered_y if dy < 0 else height :] = color
+        region[:, : uncovered_x if dx > 0 else 0] = color
+        region[:, width - uncovered_x if dx < 0 else width :] = color
+
+    display.mark_damaged(clipped[0])
+    return clipped[0]
@@ -0,0 +1,250 @@
+import functools
+import time
+from typing import Any, Literal, Optional
+
+
+try:
+    import numpy
+except ImportError:
+    HAVE_NUMPY = False
+else:
+    HAVE_NUMPY = True
+
+
+StagingFormat = Literal["RGBA", "RGBX", "ARGB", "XRGB"]
+TargetFormat = Literal["RGB565", "RGBA16", "RGB"]
+
+# Byte offsets of the red, green, blue and alpha channels in each 32-bit staging pixel
+STAGING_FORMATS: dict[str, tuple[int, int, int, Optional[int]]] = {
+    "RGBA": (0, 1, 2, 3),
+    "RGBX": (0, 1, 2, None),
+    "ARGB": (1, 2, 3, 0),
+    "XRGB": (1, 2, 3, None),
+}
+TARGET_BYTE_WIDTHS = {"RGB565": 2, "RGBA16": 2, "RGB": 3}
+DEFAULT_BAND_ROWS = 32
+
+# 4x4 ordered dithering matrix, with values from 0 to 15
+BAYER_4X4 = ((0, 8, 2, 10), (12, 4, 14, 6), (3, 11, 1, 9), (15, 7, 13, 5))
+
+
+def _quantize(value: int, threshold: int, step: int) -> int:
+    # Adds a dithering threshold in [0, step) before truncating to a multiple of step
+    return min(value + (threshold * step) // 16, 255) & ~(step - 1) & 0xFF
+
+
+def _make_tables(step: int, shift_left: int, mask: int = 0xFF) -> list[bytes]:
+    """Translation tables, one per dithering threshold, quantizing a channel and moving it into place in a byte"""
+    tables = []
+    for threshold in range(16):
+        table = bytearray(256)
+        for value in range(256):
+            quantized = _quantize(value, threshold, step)
+            table[value] = ((quantized << shift_left) if shift_left >= 0 else (quantized >> -shift_left)) & mask
+        tables.append(bytes(table))
+    return tables
+
+
+@functools.lru_cache(maxsize=None)
+def _get_byte_tables(target_format: str) -> tuple[tuple[Optional[list[bytes]], ...], ...]:
+    """(high byte, low byte) tables for each of the (red, green, blue, alpha) channels, built on first use. RGB565 is
+    RRRRRGGG GGGBBBBB and RGBA16 is RRRRGGGG BBBBAAAA, stored little endian (low byte first)."""
+    if target_format == "RGB565":
+        return (
+            (_make_tables(8, 0, 0xF8), _make_tables(4, -5), None, None),
+            (None, _make_tables(4, 3, 0xE0), _make_tables(8, -3), None),
+        )
+    return (
+        (_make_tables(16, 0, 0xF0), _make_tables(16, -4), None, None),
+        (None, None, _make_tables(16, 0, 0xF0), _make_tables(16, -4)),
+    )
+
+
+_numpy_luts: dict[str, Any] = {}
+
+
+def _get_numpy_luts(target_format: str) -> Any:
+    # (channel, threshold, value) -> uint16 contribution of that channel to the packed pixel
+    if target_format not in _numpy_luts:
+        high_tables, low_tables = _get_byte_tables(target_format)
+        luts = numpy.zeros((4, 16, 256), dtype=numpy.uint16)
+        for channel in range(4):
+            for tables, shift in ((high_tables[channel], 8), (low_tables[channel], 0)):
+                if tables is not None:
+                    luts[channel] |= (
+                        numpy.frombuffer(b"".join(tables), dtype=numpy.uint8).reshape(16, 256).astype(numpy.uint16)
+                        << shift
+                    )
+        _numpy_luts[target_format] = luts
+    return _numpy_luts[target_format]
+
+
+def _convert_band_numpy(src: Any, dst: Any, offsets: tuple, target_format: str, y: int, x: int, dither: bool) -> None:
+    if target_format == "RGB":
+        for channel in range(3):
+            dst[:, channel::3] = src[:, offsets[channel] :: 4]
+        return
+
+    luts = _get_numpy_luts(target_format)
+    if dither:
+        rows = numpy.arange(y, y + src.shape[0])[:, None] % 4
+        columns = numpy.arange(x, x + src.shape[1] // 4)[None, :] % 4
+        thresholds = numpy.array(BAYER_4X4, dtype=numpy.intp)[rows, columns]
+    else:
+        thresholds = 0
+
+    out = dst.view("<u2")
+    out[...] = 0x000F if offsets[3] is None and target_format == "RGBA16" else 0
+    for channel, offset in enumerate(offsets):
+        if offset is not None and (channel < 3 or target_format == "RGBA16"):
+            out |= luts[channel][thresholds, src[:, offset::4]]
+
+
+def _convert_row_bytes(src: memoryview, offsets: tuple, target_format: str, x: int, y: int, dither: bool) -> bytearray:
+    """Converts one row of staging pixels without NumPy, using bytes.translate() and big integer ORs"""
+    width = len(src) // 4
+    out = bytearray(width * TARGET_BYTE_WIDTHS[target_format])
+
+    if target_format == "RGB":
+        for channel in range(3):
+            out[channel::3] = src[offsets[channel] :: 4]
+        return out
+
+    # With dithering, each of the 4 columns of the matrix is processed separately
+    step = 4 if dither else 1
+    for phase in range(min(step, width)):
+        threshold = BAYER_4X4[y % 4][(x + phase) % 4] if dither else 0
+        channels = [None if offset is None else bytes(src[phase * 4 + offset :: step * 4]) for offset in offsets]
+        count = len(range(phase, width, step))
+
+        for byte_index, tables in enumerate(reversed(_get_byte_tables(target_format))):  # Low byte, then high byte
+            value = 0x0F if byte_index == 0 and target_format == "RGBA16" and offsets[3] is None else 0
+            value = int.from_bytes(bytes([value]) * count, "little")
+            for table, channel_bytes in zip(tables, channels):
+                if table is not None and channel_bytes is not None:
+                    value |= int.from_bytes(channel_bytes.translate(table[threshold]), "little")
+            out[phase * 2 + byte_index :: step * 2] = value.to_bytes(count, "little")
+
+    return out
+
+
+def convert(
+    src: memoryview,
+    src_format: StagingFormat,
+    src_pitch: int,
+    dst: memoryview,
+    dst_format: TargetFormat,
+    dst_pitch: int,
+    rect: tuple[int, int, int, int],
+    dither: bool = False,
+    band_rows: int = DEFAULT_BAND_ROWS,
+    use_numpy: Optional[bool] = None,
+) -> None:
+    """Pack a rectangle of 32-bit staging pixels into a smaller pixel format
+
+    Both buffers are flat, unsigned byte memoryviews of whole frames. The
+    rectangle is processed in bands of rows so the working set stays in cache.
+
+    Arguments:
+        src: The staging buffer
+        src_format: The staging buffer's pixel format
+        src_pitch: The staging buffer's row stride in bytes
+        dst: The buffer to pack pixels into
+        dst_format: The pixel format to pack pixels into
+        dst_pitch: The destination buffer's row stride in bytes
+        rect: The `(x, y, width, height)` to convert
+        dither: Apply 4x4 ordered dithering before truncating channels
+        band_rows: Number of rows to convert at a time
+        use_numpy: Whether to use NumPy (vectorized) or the pure Python
+            fallback. If `None`, NumPy is used when it's available.
+    """
+    offsets = STAGING_FORMATS[src_format]
+    byte_width = TARGET_BYTE_WIDTHS[dst_format]
+    x, y, width, height = rect
+
+    if use_numpy is None:
+        use_numpy = HAVE_NUMPY
+
+    if use_numpy:
+        src_rows = numpy.frombuffer(src, dtype=numpy.uint8)[: src_pitch * (y + height)].reshape(-1, src_pitch)
+        dst_rows = numpy.frombuffer(dst, dtype=numpy.uint8)[: dst_pitch * (y + height)].reshape(-1, dst_pitch)
+        for band_y in range(y, y + height, band_rows):
+            band_end = min(band_y + band_rows, y + height)
+            _convert_band_numpy(
+                src_rows[band_y:band_end, x * 4 : (x + width) * 4],
+                dst_rows[band_y:band_end, x * byte_width : (x + width) * byte_width],
+                offsets,
+                dst_format,
+                band_y,
+                x,
+                dither,
+            )
+    else:
+        for row in range(y, y + height):
+            src_start, dst_start = row * src_pitch + x * 4, row * dst_pitch + x * byte_width
+            dst[dst_start : dst_start + width * byte_width] = _convert_row_bytes(
+                src[src_start : src_start + width * 4], offsets, dst_format, x, row, dither
+            )
+
+
+def benchmark(
+    width: int = 1920, height: int = 1080, repeat: int = 3, use_numpy: Optional[bool] = None
+) -> list[dict[str, Any]]:
+    """Measure conversion throughput for every pair of staging and target formats
+
+    Arguments:
+        width: Width of the frame to convert
+        height: Height of the frame to convert
+        repeat: Number of times to convert each frame (the best time is kept)
+        use_numpy: As in [convert()][dispmanx.convert.convert]
+
+    Returns:
+        One dictionary per format pair and dithering setting, with the keys
+            `src_format`, `dst_format`, `dither`, `numpy`, `seconds` and `mb_per_sec`
+            (megabytes of staging pixels converted per second).
+    """
+    if use_numpy is None:
+        use_numpy = HAVE_NUMPY
+
+    src = memoryview(bytearray(range(256)) * (width * height * 4 // 256 + 1))[: width * height * 4]
+    results = []
+
+    for dst_format, byte_width in TARGET_BYTE_WIDTHS.items():
+        dst = memoryview(bytearray(width * height * byte_width))
+        for src_format in STAGING_FORMATS:
+            for dither in (False, True) if dst_format != "RGB" else (False,):
+                best = float("inf")
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    convert(
+                        src,
+                        src_format,  # type: ignore
+                        width * 4,
+                        dst,
+                        dst_format,  # type: ignore
+                        width * byte_width,
+                        (0, 0, width, height),
+                        dither=dither,
+                        use_numpy=use_numpy,
+                    )
+                    best = min(best, time.perf_counter() - start)
+                results.append(
+                    {
+                        "src_format": src_format,
+                        "dst_format": dst_format,
+                        "dither": dither,
+                        "numpy": use_numpy,
+                        "seconds": best,
+                        "mb_per_sec": len(src) / best / 1e6,
+                    }
+                )
+
+    return results
+
+
+if __name__ == "__main__":
+    for result in benchmark():
+        print(
+            f"{result['src_format']:>4} -> {result['dst_format']:<6}"
+            f" {'dithered' if result['dither'] else '':<8} {result['mb_per_sec']:8.1f} MB/s"
+        )
@@ -0,0 +1,108 @@
+from typing import Any, Iterable
+
+
+# Internal module, not publicly exposed. Rectangles are plain (x, y, width, height) tuples here, the DispmanX class
+# converts them to Rect objects.
+
+DEFAULT_TILE_SIZE = 32
+DEFAULT_MAX_RECTS = 8
+
+
+def damaged_tile_rows_numpy(
+    current: Any, previous: Any, row_bytes: int, tile_width_bytes: int, tile_height: int
+) -> Iterable[tuple[int, list[int]]]:
+    """Yields (tile_row, damaged_tile_columns) by comparing two (height, pitch) uint8 NumPy arrays"""
+    import numpy
+
+    # Compare using the widest word that evenly divides both a row and a tile
+    word = next(n for n in (8, 4, 2, 1) if row_bytes % n == 0 and tile_width_bytes % n == 0)
+    dtype = numpy.dtype(f"u{word}")
+    current, previous = current[:, :row_bytes].view(dtype), previous[:, :row_bytes].view(dtype)
+    column_starts = numpy.arange(0, row_bytes // word, tile_width_bytes // word)
+
+    for tile_row, y in enumerate(range(0, current.shape[0], tile_height)):
+        changed = (current[y : y + tile_height] != previous[y : y + tile_height]).any(axis=0)
+        tiles = numpy.logical_or.reduceat(changed, column_starts)
+        if tiles.any():
+            yield tile_row, numpy.flatnonzero(tiles).tolist()
+
+
+def damaged_tile_rows_bytes(
+    current: memoryview,
+    previous: memoryview,
+    height: int,
+    pitch: int,
+    row_bytes: int,
+    tile_width_bytes: int,
+    tile_height: int,
+) -> Iterable[tuple[int, list[int]]]:
+    """Yields (tile_row, damaged_tile_columns) by comparing two flat byte memoryviews (fallback without NumPy)"""
+    num_columns = -(-row_bytes // tile_width_bytes)
+
+    for tile_row, y in enumerate(range(0, height, tile_height)):
+        columns: set[int] = set()
+        for row in range(y, min(y + tile_height, height)):
+            offset = row * pitch
+            if current[offset : offset + row_bytes] == previous[offset : offset + row_bytes]:
+                continue
+            for column in range(num_columns):
+                if column not in columns:
+                    start = offset + column * tile_width_bytes
+                    end = min(start + tile_width_bytes, offset + row_bytes)
+                    if current[start:end] != previous[start:end]:
+                        columns.add(column)
+            if len(columns) == num_columns:
+                break
+        if columns:
+            yield tile_row, sorted(columns)
+
+
+def tiles_to_rects(
+    tile_rows: Iterable[tuple[int, list[int]]], width: int, height: int, tile_size: int, max_rects: int
+) -> list[tuple[int, int, int, int]]:
+    """Merge damaged tiles into a few non-overlapping horizontal bands.
+
+    Uploads always transfer whole buffer rows, so bands never share rows. Adjacent
+    tile rows are joined, then the bands separated by the smallest gaps are joined
+    until there are no more than max_rects left.
+    """
+    bands: list[list[int]] = []  # [y0, y1, x0, x1] in tiles, end exclusive
+
+    for tile_row, columns in tile_rows:
+        x0, x1 = columns[0], columns[-1] + 1
+        if bands and bands[-1][1] == tile_row:
+            band = bands[-1]
+            band[1], band[2], band[3] = tile_row + 1, min(band[2], x0), max(band[3], x1)
+        else:
+            bands.append([tile_row, tile_row + 1, x0, x1])
+
+    _join_bands(bands, max_rects)
+
+    rects = []
+    for y0, y1, x0, x1 in bands:
+        x, y = x0 * tile_size, y0 * tile_size
+        rects.append((x, y, min(x1 * tile_size, width) - x, min(y1 * tile_size, height) - y))
+    return rects
+
+
+def merge_rects(rects: Iterable[tuple[int, int, int, int]], max_rects: int) -> list[tuple[int, int, int, int]]:
+    """Merge rectangles into a few non-overlapping horizontal bands, like tiles_to_rects(). Rectangles sharing rows
+    are joined, then the bands separated by the smallest gaps until there are no more than max_rects left."""
+    bands: list[list[int]] = []  # [y0, y1, x0, x1] in pixels, end exclusive
+
+    for x, y, width, height in sorted(rects, key=lambda rect: rect[1]):
+        if bands and y < bands[-1][1]:
+            band = bands[-1]
+            band[1], band[2], band[3] = max(band[1], y + height), min(band[2], x), max(band[3], x + width)
+        else:
+            bands.append([y, y + height, x, x + width])
+
+    _join_bands(bands, max_rects)
+    return [(x0, y0, x1 - x0, y1 - y0) for y0, y1, x0, x1 in bands]
+
+
+def _join_bands(bands: list[list[int]], max_rects: int) -> None:
+    while len(bands) > max(max_rects, 1):
+        i = min(range(len(bands) - 1), key=lambda i: bands[i + 1][0] - bands[i][1])
+        first, second = bands[i], bands.pop(i + 1)
+        first[1], first[2], first[3] = second[1], min(first[2], second[2]), max(first[3], second[3])
@@ -1,7 +1,25 @@
 from contextlib import contextmanager
 import ctypes
 from functools import wraps
-from typing import Any, ClassVar, Generator, Literal, NamedTuple, Union
+import itertools
+import math
+import threading
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    Callable,
+    ClassVar,
+    Generator,
+    Iterable,
+    Literal,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Union,
+    get_args,
+)
 
 
 try:
@@ -12,8 +30,21 @@ except ImportError:
 else:
     HAVE_NUMPY = True
 
-from . import bcm_host
+from . import bcm_host, convert, damage
 from .exceptions import DispmanXError, DispmanXRuntimeError
+from .palette import Color, _Quantizer, default_palette, normalize_palette, pack_palette
+from .stats import FrameRecord, FrameStats
+
+
+if TYPE_CHECKING:
+    import asyncio
+    import mmap
+    from multiprocessing.shared_memory import SharedMemory
+    import os
+
+    from .player import PlaybackStats
+    from .pool import ResourcePool
+    from .screen import Screen
 
 
 class Size(NamedTuple):
@@ -32,6 +63,73 @@ class Size(NamedTuple):
     height: int
 
 
+class Rect(NamedTuple):
+    """A rectangular region of a [DispmanX][dispmanx.DispmanX] object's buffer.
+
+    Anywhere a rectangle is accepted, a plain `(x, y, width, height)` tuple works
+    too.
+
+    Attributes:
+        x int: The horizontal offset from the left edge
+        y int: The vertical offset from the top edge
+        width int: The width component
+        height int: The height component
+    """
+
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+RectType = Union[Rect, tuple[int, int, int, int]]
+
+
+class UploadStats(NamedTuple):
+    """Returned by [update()][dispmanx.DispmanX.update].
+
+    Not instantiated directly.
+
+    Attributes:
+        bytes_uploaded int: Number of bytes transferred to video memory. Uploads
+            always transfer whole rows of the buffer, so this is the buffer's row
+            pitch times the height of each uploaded rectangle.
+        bytes_skipped int: Number of bytes of the buffer that didn't need to be
+            transferred, compared to a full-frame upload.
+        rects tuple[Rect, ...]: The [Rects][dispmanx.dispmanx.Rect] that were
+            uploaded. Empty if nothing was uploaded.
+    """
+
+    bytes_uploaded: int
+    bytes_skipped: int
+    rects: tuple[Rect, ...]
+
+
+class YUVPlanes(NamedTuple):
+    """The buffer of a [DispmanX][dispmanx.DispmanX] object with the `'YUV420'`
+    pixel format.
+
+    Not instantiated directly. The planes are views of one block of memory,
+    laid out the way the firmware reads it: the luma plane's rows are
+    [pitch][dispmanx.DispmanX] bytes apart and padded to a height that's a
+    multiple of 16 rows, followed by each chroma plane at half the pitch and
+    height.
+
+    Attributes:
+        y: The luma plane, a `(height, width)` uint8
+            [NumPy array][numpy.array], or a flat [memoryview][] spanning the
+            padding for `'ctypes'` buffers (the default without
+            [NumPy][numpy]).
+        u: The blue difference plane, at half the width and height (rounded
+            up), likewise.
+        v: The red difference plane, likewise.
+    """
+
+    y: Any
+    u: Any
+    v: Any
+
+
 class Display(NamedTuple):
     """Returned by various interactions with the [DispmanX][dispmanx.DispmanX] class.
 
@@ -51,14 +149,27 @@ class Display(NamedTuple):
     size: Size
 
 
+PixelFormatType = Literal["RGB", "ARGB", "RGBA", "RGBX", "XRGB", "RGBA16", "RGB565", "8BPP", "YUV420"]
+BufferType = Literal["auto", "numpy", "ctypes", "shared", "mmap", "external"]
+
+
 class PixelFormat(NamedTuple):
     # Internal object, not publicly exposed
-    format: Literal["RGB", "ARGB", "RGBA", "RGBX", "XRGB", "RGBA16", "RGB565"]
+    format: PixelFormatType
     byte_width: int
     vc_image_type: int
     numpy_dtype_name: str = "uint8"
 
 
+class BufferRef(NamedTuple):
+    # Internal object, not publicly exposed
+    address: int
+    data: memoryview  # Flat, unsigned bytes
+    keepalive: Any
+    pitch: int
+    pixel_format: PixelFormat
+
+
 def only_if_not_destroyed(func):
     @wraps(func)
     def wrapped(self, *args, **kwargs):
@@ -69,6 +180,75 @@ def only_if_not_destroyed(func):
     return wrapped
 
 
+# Updates submitted by update_async() that haven't completed yet, keyed by the argument passed to the callback
+_pending_async_updates: dict[int, tuple["asyncio.AbstractEventLoop", Callable[[], None]]] = {}
+_async_update_ids = itertools.count(1)
+
+
+@bcm_host.DISPMANX_CALLBACK_FUNC_T
+def _async_update_callback(update_handle: int, arg: int) -> None:
+    # Called from a thread owned by the DispmanX library
+    loop, callback = _pending_async_updates.pop(arg)
+    loop.call_soon_threadsafe(callback)
+
+
+# Objects listening for vertical blanks, keyed by the display handle passed as the callback's argument
+_vsync_listeners: dict[int, list["DispmanX"]] = {}
+
+
+@bcm_host.DISPMANX_CALLBACK_FUNC_T
+def _vsync_callback(update_handle: int, arg: int) -> None:
+    # Called from a thread owned by the DispmanX library
+    for listener in _vsync_listeners.get(arg, ()):
+        listener._on_vsync()
+
+
+@bcm_host.TVSERVICE_CALLBACK_T
+def _tv_callback(arg: int, reason: int, param1: int, param2: int) -> None:
+    # Called from a thread owned by the DispmanX library on hotplug and mode changes, where it's not safe to call back
+    # into the library, so displays are refreshed from another thread
+    DispmanX._displays = None  # Invalidate the cache
+    threading.Thread(target=DispmanX.refresh_displays, daemon=True).start()
+
+
+def _buffer_view(memory: Any, size: Size, pixel_format: PixelFormat, pitch: Optional[int] = None) -> Any:
+    # A NumPy array (if available) or ctypes array of a frame's pixels, backed by existing writable memory with rows
+    # pitch bytes apart. The ctypes array is flat, padding included.
+    pitch = size.width * pixel_format.byte_width if pitch is None else pitch
+    if HAVE_NUMPY:
+        dtype = numpy.dtype(pixel_format.numpy_dtype_name)
+        shape = (size.height, size.width, pixel_format.byte_width // dtype.itemsize)
+        strides = (pitch, pixel_format.byte_width, dtype.itemsize)
+        return numpy.ndarray(shape=shape, dtype=dtype, buffer=memory, strides=strides)
+    return (ctypes.c_char * (pitch * size.height)).from_buffer(memory)
+
+
+def _align(value: int, alignment: int) -> int:
+    return -(-value // alignment) * alignment
+
+
+def _clear_resource(
+    resource: int, vc_image_type: int, width: int, height: int, pitch: int, blank: Optional[bytes] = None
+) -> None:
+    # Reused resources still hold the last frame drawn to them, which shouldn't flash up on screen. Formats where
+    # zeros aren't black pass in a blank frame of pitch * height bytes.
+    zeros = ctypes.create_string_buffer(pitch * height) if blank is None else ctypes.create_string_buffer(blank)
+    rect = bcm_host.VC_RECT_T(width=width, height=height, x=0, y=0)
+    if (
+        bcm_host.vc_dispmanx_resource_write_data(
+            resource, vc_image_type, pitch, ctypes.addressof(zeros), ctypes.byref(rect)
+        )
+        != 0
+    ):
+        raise DispmanXRuntimeError("Error clearing image resource")
+
+
+HUGE_PAGE_SIZE = 2 * 1024 * 1024
+DEFAULT_MMAP_PITCH_ALIGNMENT = 64  # A cache line on the Pi's Cortex-A53 and A72, and a multiple of the GPU's bursts
+YUV420_PITCH_ALIGNMENT = 32  # Required of the luma plane by the firmware, so chroma pitches are multiples of 16
+YUV420_HEIGHT_ALIGNMENT = 16  # One macroblock
+
+
 PIXEL_FORMATS = {
     "RGB": PixelFormat("RGB", 3, bcm_host.VC_IMAGE_RGB888),
     "ARGB": PixelFormat("ARGB", 4, bcm_host.VC_IMAGE_ARGB8888),
@@ -77,33 +257,117 @@ PIXEL_FORMATS = {
     "XRGB": PixelFormat("XRGB", 4, bcm_host.VC_IMAGE_XRGB8888),
     "RGB565": PixelFormat("RGB565", 2, bcm_host.VC_IMAGE_RGB565, "uint16"),
     "RGBA16": PixelFormat("RGBA16", 2, bcm_host.VC_IMAGE_RGBA16, "uint16"),
+    "8BPP": PixelFormat("8BPP", 1, bcm_host.VC_IMAGE_8BPP),
+    "YUV420": PixelFormat("YUV420", 1, bcm_host.VC_IMAGE_YUV420),  # Bytes per luma sample, the chroma planes follow
+}
+
+
+def _i420_size(size: Size) -> int:
+    # Bytes in a tightly packed I420 frame, with chroma planes half the width and height (rounded up)
+    return size.width * size.height + 2 * -(-size.width // 2) * -(-size.height // 2)
+
+
+TransformType = Literal[
+    "none", "rotate_90", "rotate_180", "rotate_270", "flip_horizontal", "flip_vertical", "transpose", "transverse"
+]
+
+# Name -> DISPMANX_TRANSFORM_T. Flips apply after rotating, so transpose mirrors across the top left to bottom right
+# diagonal, and transverse across the other one.
+TRANSFORMS = {
+    "none": bcm_host.DISPMANX_NO_ROTATE,
+    "rotate_90": bcm_host.DISPMANX_ROTATE_90,
+    "rotate_180": bcm_host.DISPMANX_ROTATE_180,
+    "rotate_270": bcm_host.DISPMANX_ROTATE_270,
+    "flip_horizontal": bcm_host.DISPMANX_FLIP_HRIZ,
+    "flip_vertical": bcm_host.DISPMANX_FLIP_VERT,
+    "transpose": bcm_host.DISPMANX_ROTATE_90 | bcm_host.DISPMANX_FLIP_HRIZ,
+    "transverse": bcm_host.DISPMANX_ROTATE_270 | bcm_host.DISPMANX_FLIP_HRIZ,
 }
 
 
 class DispmanX:
     _bcm_initialized: ClassVar[bool] = False
+    _displays: ClassVar[Optional[list[Display]]] = None
+    _last_displays: ClassVar[Optional[list[Display]]] = None
+    _displays_lock: ClassVar[threading.Lock] = threading.Lock()
+    _display_change_callbacks: ClassVar[list[Callable[[list[Display]], Any]]] = []
     _buffer: Any
+    _buffer_format: PixelFormat
+    _buffer_pitch: int
+    _buffer_ref: Optional[BufferRef]
+    _buffer_type: Literal["numpy", "ctypes", "shared", "mmap", "external"]
+    _buffers: int
+    _convert: Callable[..., None]
+    _damage_shadow: Any
+    _damage_tile_size: int
+    _damage_tracking: Literal["none", "auto", "manual"]
+    _dither: bool
     _display_handle: int
+    _owns_display_handle: bool
     _display: Display
+    _dest_rect: Rect
     _destroyed: bool
+    _front_resource: int
+    _last_upload: Optional[UploadStats]
     _layer: int
+    _marked_damage: list[Rect]
+    _max_damage_rects: int
+    _max_updates_in_flight: int
+    _missed_vsyncs: int
     _needs_destroying: int
+    _opacity: int
+    _packed_ref: Optional[BufferRef]
+    _pitch: int
     _pixel_format: PixelFormat
+    _resource_damage: list[list[Rect]]
+    _screen: Optional["Screen"]
+    _mapped_memory: Optional["mmap.mmap"]
+    _shared_memory: Optional["SharedMemory"]
+    _snapshot_resource_handle: int
+    _snapshot_rows: Optional["ctypes.Array[ctypes.c_char]"]
+    _size: Size
+    _stats: Optional[FrameStats]
     _surface_element_handle: int
-    _video_resource_handle: int
+    _transform: TransformType
+    _update_semaphore: Optional["asyncio.Semaphore"]
+    _vsync_condition: threading.Condition
+    _vsync_count: int
+    _vsync_interval: Optional[float]
+    _vsync_time: Optional[float]
+    _video_resource_handles: list[int]
 
     @classmethod
     def _bcm_host_init(cls) -> None:
         if not cls._bcm_initialized:
             bcm_host.bcm_host_init()
+            bcm_host.vc_tv_register_callback(_tv_callback, None)
             cls._bcm_initialized = True
 
     def __init__(
         self,
         layer: int = 0,
         display: Union[None, int, Display] = None,
-        pixel_format: Literal["RGB", "ARGB", "RGBA", "RGBX", "XRGB", "RGBA16", "RGB565"] = "RGBA",
-        buffer_type: Literal["auto", "numpy", "ctypes"] = "auto",
+        pixel_format: PixelFormatType = "RGBA",
+        buffer_type: BufferType = "auto",
+        damage_tracking: Literal["none", "auto", "manual"] = "none",
+        damage_tile_size: int = damage.DEFAULT_TILE_SIZE,
+        max_damage_rects: int = damage.DEFAULT_MAX_RECTS,
+        buffers: Literal[1, 2, 3] = 1,
+        max_updates_in_flight: int = 1,
+        screen: Optional["Screen"] = None,
+        rect: Optional[RectType] = None,
+        render_size: Optional[tuple[int, int]] = None,
+        scale: Optional[float] = None,
+        letterbox: bool = False,
+        staging_format: Optional[Literal["RGBA", "RGBX", "ARGB", "XRGB"]] = None,
+        dither: bool = False,
+        stats: Union[bool, FrameStats] = False,
+        pool: Optional["ResourcePool"] = None,
+        palette: Optional[Iterable[Sequence[int]]] = None,
+        transform: TransformType = "none",
+        pitch_alignment: Optional[int] = None,
+        hugepages: bool = False,
+        lock_memory: bool = False,
     ):
         """The DispmanX Class
 
@@ -141,6 +405,19 @@ class DispmanX:
                 * `'RGB565'` &mdash; 16-bit red, green, blue packed as follows:
                     5 bits red, 6 bits green, 5 bits green (represented as unsigned
                     16-bit integers when using [NumPy][numpy])
+                * `'8BPP'` &mdash; 8-bit indices into a palette of 256 colors
+                    set with `palette` and
+                    [set_palette()][dispmanx.DispmanX.set_palette]. Uploads a
+                    quarter of the bytes of 32-bit formats for graphics with
+                    few colors.
+                * `'YUV420'` &mdash; planar YUV 4:2:0 (I420), as produced by
+                    cameras and video decoders. The buffer is a
+                    [YUVPlanes][dispmanx.dispmanx.YUVPlanes], and the
+                    hardware scaler converts it to RGB while scaling it, so
+                    frames are uploaded as is at 12 bits per pixel. Whole
+                    frames are always uploaded, so `damage_tracking` must be
+                    `'none'`. See
+                    [update_yuv()][dispmanx.DispmanX.update_yuv].
 
             buffer_type: Type of buffer to write to the display from. Choices:
 
@@ -152,6 +429,157 @@ class DispmanX:
                 * `'ctypes` &mdash; a [ctypes][] [Array][ctypes.Array] of
                     [c_char][ctypes.c_char] created with
                     [create_string_buffer()][ctypes.create_string_buffer]
+                * `'shared'` &mdash; a [NumPy array][numpy.array] (or [ctypes][]
+                    [Array][ctypes.Array] without [NumPy][numpy]) backed by a
+                    [SharedMemory][multiprocessing.shared_memory.SharedMemory]
+                    segment that other processes can render into, for example
+                    with [BandRenderer][dispmanx.shared.BandRenderer]. The
+                    segment is removed when this object is destroyed.
+                * `'mmap'` &mdash; a [NumPy array][numpy.array] (or [ctypes][]
+                    [Array][ctypes.Array] without [NumPy][numpy]) backed by a
+                    page aligned anonymous [mmap][mmap.mmap], with rows
+                    padded to `pitch_alignment`. See also `hugepages` and
+                    `lock_memory`.
+                * `'external'` &mdash; no buffer is allocated. Attach your own
+                    with [attach_buffer()][dispmanx.DispmanX.attach_buffer], for
+                    example, a pygame surface's or a cairo surface's pixels, to
+                    upload from it without an extra copy.
+
+            damage_tracking: What [update()][dispmanx.DispmanX.update] uploads
+                when it's called without any rectangles. Choices:
+
+                * `'none'` &mdash; always upload the full buffer
+                * `'auto'` &mdash; compare the buffer against the last uploaded
+                    frame in tiles (vectorized with [NumPy][numpy] if it's
+                    available), upload only the changed regions and skip the
+                    upload entirely when nothing changed. This keeps a copy of
+                    the last uploaded frame in memory.
+                * `'manual'` &mdash; upload only the regions reported with
+                    [mark_damaged()][dispmanx.DispmanX.mark_damaged] since the
+                    last upload (which the drawing functions in
+                    [dispmanx.blit][dispmanx.blit.fill_rect] do for you), and
+                    skip the upload when there are none. Nothing is compared
+                    or copied. The first upload is always the full buffer.
+
+            damage_tile_size: Size in pixels of the square tiles compared when
+                `damage_tracking` is `'auto'`.
+
+            max_damage_rects: Maximum number of rectangles uploaded per frame when
+                `damage_tracking` is `'auto'` or `'manual'`. Nearby changed regions get merged
+                together until there are no more than this many.
+
+            pitch_alignment: Pad each row of the buffer (and of the packed
+                copy of a `staging_format` buffer) to a multiple of this many
+                bytes, so rows start on cache line and GPU transfer
+                boundaries whatever the width and pixel format. The padded
+                `pitch` is passed to `vc_dispmanx_resource_write_data`. A
+                [NumPy][numpy] `buffer` becomes a strided view that skips
+                the padding, while a [ctypes][] one spans all of it. Defaults
+                to `64` for `'mmap'` buffers and `1` (tightly packed) for the
+                rest. Buffers passed to
+                [attach_buffer()][dispmanx.DispmanX.attach_buffer] and
+                `update(source=...)` may be padded or tightly packed.
+
+            hugepages: Back an `'mmap'` buffer with huge pages, so rendering
+                into it makes fewer TLB misses. Reserved huge pages are used
+                if the kernel has any, otherwise transparent huge pages are
+                requested.
+
+            lock_memory: Lock an `'mmap'` buffer in RAM with `mlock()`, so it's
+                never paged out in the middle of a frame. Subject to
+                `RLIMIT_MEMLOCK` (see `ulimit -l`).
+
+            buffers: Number of video resources to allocate in video memory. With
+                `1`, [update()][dispmanx.DispmanX.update] writes into the
+                resource currently on screen, which can cause tearing. With `2`
+                (double buffering) or `3` (triple buffering), each frame is
+                written into a resource that's off screen and then swapped onto
+                the screen in a single update.
+
+            max_updates_in_flight: Maximum number of updates submitted by
+                [update_async()][dispmanx.DispmanX.update_async] that may be
+                waiting on the DispmanX layer at once. Further calls wait for a
+                pending update to complete first. With more than one buffer, this
+                can be at most one less than `buffers`, so a resource is never
+                written to while it's on screen or about to be.
+
+            screen: A [Screen][dispmanx.Screen] to share a display handle and
+                update transactions with. Usually you'll want to call
+                [Screen.create_layer()][dispmanx.Screen.create_layer] instead of
+                passing this directly. The `display` argument is ignored.
+
+            rect: Show this object in a window of the display, as a
+                [Rect][dispmanx.dispmanx.Rect] or `(x, y, width, height)`
+                tuple, instead of covering all of it. The buffer and resource
+                are only the window's size, so a small widget costs a small
+                buffer, small uploads and blending a small area. The window
+                can be partly off the display, and moved or resized later with
+                [move_to()][dispmanx.DispmanX.move_to] and
+                [resize()][dispmanx.DispmanX.resize].
+
+            render_size: Render at this `(width, height)` instead of the
+                display's (or `rect`'s) size. The buffer and the resource in
+                video memory are this size, and the display's hardware scaler
+                (HVS) stretches it to fill the screen (or `rect`) for free.
+                Rendering and uploading at half the width and height costs a
+                quarter as much.
+
+            scale: Shortcut for `render_size` as a fraction of the display's
+                (or `rect`'s) size, for example `0.5` to render at half the
+                width and height. Can't be combined with `render_size`.
+
+            letterbox: If `True`, keep the aspect ratio of `render_size` when
+                scaling it onto the display (or `rect`), centering it and
+                leaving the borders uncovered.
+
+            staging_format: Render into a 32-bit buffer in this format and have
+                [update()][dispmanx.DispmanX.update] pack it into `pixel_format`
+                before uploading. Lets renderers that only produce 32-bit
+                pixels (Pillow, cairo, pygame) upload half the bytes using
+                `'RGB565'` or `'RGBA16'`, or three quarters using `'RGB'`.
+                Only the regions being uploaded are converted, vectorized with
+                [NumPy][numpy] if it's available. With `'8BPP'`, pixels are
+                mapped to the nearest color in the palette with
+                [palette.quantize()][dispmanx.palette.quantize], which requires
+                [NumPy][numpy]. One of `'RGBA'`, `'RGBX'`, `'ARGB'` or
+                `'XRGB'`, or `None` for no conversion.
+
+            dither: Apply ordered dithering when packing a `staging_format`
+                buffer into `'RGB565'` or `'RGBA16'`, which hides banding in
+                gradients.
+
+            stats: Time each phase of every update. Pass `True`, or a
+                [FrameStats][dispmanx.FrameStats] object to configure the
+                window, frame budget or callbacks. Disabled by default, in
+                which case updates carry no instrumentation at all.
+
+            pool: A [ResourcePool][dispmanx.ResourcePool] to borrow video
+                resources and an element from, and return them to when this
+                object is destroyed, instead of creating and deleting them.
+
+            palette: The colors of an `'8BPP'` object's palette, as in
+                [set_palette()][dispmanx.DispmanX.set_palette], or `None` for
+                [palette.default_palette()][dispmanx.palette.default_palette].
+
+            transform: Rotate or flip the buffer onto the display in the
+                hardware, instead of reordering pixels on the CPU every frame,
+                for example, for a portrait-mounted display. Choices:
+
+                * `'none'` &mdash; shown as is
+                * `'rotate_90'`, `'rotate_180'` or `'rotate_270'` &mdash;
+                    rotated clockwise by that many degrees
+                * `'flip_horizontal'` or `'flip_vertical'` &mdash; mirrored
+                * `'transpose'` &mdash; rotated 90 degrees and mirrored
+                    horizontally, so the top left corner stays put
+                * `'transverse'` &mdash; rotated 270 degrees and mirrored
+                    horizontally
+
+                With a 90 or 270 degree rotation (including `'transpose'` and
+                `'transverse'`), the buffer's width and height are swapped
+                relative to the display (or `rect`), so a 1920x1080 display is
+                drawn to as a 1080x1920 buffer. `render_size` and `letterbox`
+                are in the buffer's orientation. Some firmware only supports
+                flips and 180 degree rotation in the hardware scaler.
 
         Raises:
             DispmanXError: A user error occured by specifying an incorrect
@@ -163,79 +591,201 @@ class DispmanX:
             buffer: A buffer representing underlying raw pixel data. It will be
                 a [NumPy array][numpy.array] or [ctypes][] [Array][ctypes.Array]
                 of [c_char][ctypes.c_char] depending on the value of the
-                `buffer_type` argument.
-            buffer_type str: Whether the buffer is a [NumPy array][numpy.array]
-                or a [ctypes][] [Array][ctypes.Array]. (Either `"numpy"` or
-                `"ctypes"`.)
+                `buffer_type` argument (or a
+                [YUVPlanes][dispmanx.dispmanx.YUVPlanes] of them for
+                `'YUV420'`), or the object passed to
+                [attach_buffer()][dispmanx.DispmanX.attach_buffer] (`None` if
+                nothing's been attached yet).
+            buffer_type str: Whether the buffer is a [NumPy array][numpy.array],
+                a [ctypes][] [Array][ctypes.Array] or an attached external
+                buffer. (One of `"numpy"`, `"ctypes"`, `"shared"`, `"mmap"` or
+                `"external"`.)
+            pitch int: The number of bytes from the start of one row of the
+                buffer to the next, including any padding added by
+                `pitch_alignment`.
+            shared_memory_name str: The name of the shared memory segment
+                backing the buffer if `buffer_type` is `"shared"`, otherwise
+                `None`.
             display Display: The display for which this object is attached to
             pixel_format str: The pixel format for this object. (One of `"RGB"`,
-                `"ARGB"`, `"RGBA"`, `"RGBX"`, `"XRGB"`, `"RGBA16"` or `"RGB565"`.)
+                `"ARGB"`, `"RGBA"`, `"RGBX"`, `"XRGB"`, `"RGBA16"`, `"RGB565"`,
+                `"8BPP"` or `"YUV420"`.)
+            staging_format str: The pixel format of the buffer if it's packed
+                into `pixel_format` on update, otherwise `None`.
             size Size: The [Size][dispmanx.dispmanx.Size] object representing
-                the dimensions of the current display.
-            width int: The width of the current display.
-            height int: The height of the current display.
+                the dimensions of the buffer. This is the size of the current
+                display (or `rect`), unless `render_size` or `scale` was
+                specified.
+            width int: The width of the buffer.
+            height int: The height of the buffer.
+            rect Rect: The [Rect][dispmanx.dispmanx.Rect] of the display's
+                window this object is shown in, which is the whole display
+                unless `rect` was specified.
+            dest_rect Rect: The [Rect][dispmanx.dispmanx.Rect] of the display
+                this object's buffer is shown in. This is `rect`, unless
+                `letterbox` was specified.
             layer int: The layer of this object.
+            opacity int: The opacity the element is blended with, from `0`
+                (invisible) to `255`, multiplied with the buffer's alpha
+                channel if it has one.
+            vsync_count int: Number of vertical blanks seen on this object's
+                display since [wait_vsync()][dispmanx.DispmanX.wait_vsync] or
+                [run()][dispmanx.DispmanX.run] first started listening for
+                them.
+            missed_vsyncs int: Number of vertical blanks that
+                [run()][dispmanx.DispmanX.run] missed because rendering and
+                updating a frame took too long.
+            refresh_rate float: The measured refresh rate of this object's
+                display in Hz, or `None` if it hasn't been measured yet.
+            buffers int: The number of video resources allocated for this object.
             destroyed bool: Whether or not this object has been destroyed,
                 is currently unusable, and no longer is available to display.
+            last_upload UploadStats: The [UploadStats][dispmanx.dispmanx.UploadStats]
+                of the most recent call to [update()][dispmanx.DispmanX.update],
+                or `None` if it hasn't been called yet.
+            stats FrameStats: The [FrameStats][dispmanx.FrameStats] timing this
+                object's updates, or `None` if `stats` wasn't enabled.
+            pool ResourcePool: The [ResourcePool][dispmanx.ResourcePool] this
+                object borrows from, or `None`.
+            palette list[tuple[int, int, int, int]]: The 256
+                `(red, green, blue, alpha)` colors of an `'8BPP'` object's
+                palette, or `None` for other pixel formats.
+            transform str: How the buffer is rotated or flipped onto the
+                display. (See `transform` above.)
         """
         self._destroyed = self._needs_destroying = False
-        self._layer = layer
+        self._layer, self._opacity = layer, 255
         pixel_format_obj = PIXEL_FORMATS.get(pixel_format)
 
         if pixel_format_obj is None:
             raise DispmanXError(f"Invalid pixel format: {pixel_format}")
-        self._pixel_format = pixel_format_obj
-
-        if buffer_type not in ("numpy", "ctypes", "auto"):
+        self._pixel_format = self._buffer_format = pixel_format_obj
+
+        if staging_format is not None:
+            if staging_format not in convert.STAGING_FORMATS:
+                raise DispmanXError(f"Invalid staging format: {staging_format}")
+            if pixel_format not in convert.TARGET_BYTE_WIDTHS and pixel_format != "8BPP":
+                raise DispmanXError(f"Pixel format {pixel_format} can't be converted to from a staging format")
+            if pixel_format == "8BPP" and not HAVE_NUMPY:
+                raise DispmanXError("Converting to the 8BPP pixel format requires NumPy")
+            self._buffer_format = PIXEL_FORMATS[staging_format]
+        self._dither = dither
+
+        self._palette = self._quantizer = None
+        if pixel_format == "8BPP":
+            self._palette = default_palette()
+            if palette is not None:
+                colors = normalize_palette(palette)
+                if len(colors) > len(self._palette):
+                    raise DispmanXError(f"Palette has more than {len(self._palette)} colors")
+                self._palette[: len(colors)] = colors
+        elif palette is not None:
+            raise DispmanXError(f"Pixel format {pixel_format} doesn't have a palette")
+
+        if damage_tracking not in ("none", "auto", "manual"):
+            raise DispmanXError(f"Invalid damage tracking mode: {damage_tracking}")
+        if damage_tile_size < 1:
+            raise DispmanXError(f"Invalid damage tile size: {damage_tile_size}")
+        if pixel_format == "YUV420" and damage_tracking != "none":
+            raise DispmanXError("YUV420 frames are always uploaded whole, so damage tracking must be 'none'")
+        self._damage_tracking = damage_tracking
+        self._damage_tile_size = damage_tile_size
+        self._max_damage_rects = max_damage_rects
+        self._damage_shadow = self._last_upload = None
+
+        if buffers not in (1, 2, 3):
+            raise DispmanXError(f"Invalid number of buffers: {buffers}")
+        self._buffers = buffers
+
+        if not 1 <= max_updates_in_flight <= max(buffers - 1, 1):
+            raise DispmanXError(f"Invalid maximum number of updates in flight for {buffers} buffer(s)")
+        self._max_updates_in_flight = max_updates_in_flight
+        self._update_semaphore = None
+
+        if not isinstance(stats, (bool, FrameStats)):
+            raise DispmanXError(f"Invalid stats: {stats!r}")
+        self._stats = FrameStats() if stats is True else (stats or None)
+
+        self._convert = convert.convert
+        if self._palette is not None and staging_format is not None:
+            self._convert = self._quantizer = _Quantizer(self._palette)
+
+        self._vsync_condition = threading.Condition()
+        self._vsync_count = self._missed_vsyncs = 0
+        self._vsync_interval = self._vsync_time = None
+
+        if buffer_type not in get_args(BufferType):
             raise DispmanXError(f"Invalid buffer type: {buffer_type}")
         elif buffer_type == "numpy" and not HAVE_NUMPY:
             raise DispmanXError("numpy buffer type requested, but numpy not found!")
+        elif buffer_type == "shared" and pixel_format == "YUV420":
+            raise DispmanXError("shared buffer type isn't supported with the YUV420 pixel format")
         elif buffer_type == "auto":
             buffer_type = "numpy" if HAVE_NUMPY else "ctypes"
-
-        device_id = display.device_id if isinstance(display, Display) else display
-
-        self._bcm_host_init()
-
-        # Select a display (first one by default)
-        if device_id is None:
-            self._display = self.get_default_display()
+        self._buffer_type = buffer_type
+
+        if pitch_alignment is None:
+            pitch_alignment = DEFAULT_MMAP_PITCH_ALIGNMENT if buffer_type == "mmap" else 1
+        if pitch_alignment < 1:
+            raise DispmanXError(f"Invalid pitch alignment: {pitch_alignment}")
+        if (hugepages or lock_memory) and buffer_type != "mmap":
+            raise DispmanXError('hugepages and lock_memory require buffer_type="mmap"')
+        self._pitch_alignment, self._hugepages, self._lock_memory = pitch_alignment, hugepages, lock_memory
+
+        if pool is not None and pool.closed:
+            raise DispmanXError("Resource pool has already been closed.")
+        self._pool = pool
+
+        self._snapshot_resource_handle = 0
+        self._snapshot_rows = None
+        self._screen = screen
+        if screen is None and pool is not None:
+            # Hidden elements are pooled per display handle, so the pool holds them open
+            self._display = self._resolve_display(display)
+            self._display_handle, self._owns_display_handle = pool._open_display(self._display.device_id), False
+        elif screen is None:
+            self._display = self._resolve_display(display)
+            handle = bcm_host.vc_dispmanx_display_open(self._display.device_id)
+            if handle == 0:
+                raise DispmanXRuntimeError(f"Error opening device ID #{self._display.device_id}")
+            self._display_handle, self._owns_display_handle = handle, True
         else:
-            displays = self.list_displays()
-
-            for display in displays:
-                if display.device_id == device_id:
-                    self._display = display
-                    break
-            else:
-                raise DispmanXError(f"No display with device ID #{device_id} found!")
-
-        handle = bcm_host.vc_dispmanx_display_open(self._display.device_id)
-        if handle == 0:
-            raise DispmanXRuntimeError(f"Error opening device ID #{self._display.device_id}")
-        self._display_handle = handle
-
-        buffer_size = self._display.size.width * self._display.size.height * self._pixel_format.byte_width
-        if buffer_type == "numpy":
-            dtype = numpy.dtype(self._pixel_format.numpy_dtype_name).type
-            pixel_shape = self._pixel_format.byte_width // dtype().nbytes
-            array_shape = (self._display.size.height, self._display.size.width, pixel_shape)
-            self._buffer = numpy.zeros(shape=array_shape, dtype=dtype)
-        else:
-            self._buffer = ctypes.create_string_buffer(buffer_size)
-
-        self._create_video_resource_handle()
+            self._display = screen.display
+            self._display_handle, self._owns_display_handle = screen._display_handle, False
+
+        if transform not in TRANSFORMS:
+            raise DispmanXError(f"Invalid transform: {transform}")
+        self._transform = transform
+
+        if render_size is not None and scale is not None:
+            raise DispmanXError("Only one of render_size and scale can be specified")
+        if scale is not None and scale <= 0:
+            raise DispmanXError(f"Invalid scale: {scale}")
+        self._render_size, self._scale, self._letterbox = render_size, scale, letterbox
+        self._rect = Rect(0, 0, *self._display.size) if rect is None else self._parse_rect(rect)
+        if self._rect.width <= 0 or self._rect.height <= 0:
+            raise DispmanXError(f"Invalid rectangle: {rect!r}")
+        self._size, self._dest_rect = self._get_geometry(self._rect)
+
+        self._shared_memory = self._mapped_memory = None
+        self._allocate_buffers()
+        self._create_video_resource_handles()
         self._create_surface_element()
         self._needs_destroying = True
+        if pool is not None:
+            pool._users.add(self)
 
     def __repr__(self):
         if self._destroyed:
             return f"<{self.__class__.__name__} (destroyed)>"
         else:
-            bufsize = len(self._buffer) if isinstance(self._buffer, ctypes.Array) else self._buffer.nbytes
+            bufsize = 0 if self._buffer_ref is None else len(self._buffer_ref.data)
+            rendered_at = ""
+            if self._size != self._display.size:
+                rendered_at = f" rendered at {self._size.width}x{self._size.height},"
             return (
                 f"<{self.__class__.__name__} {self._pixel_format.format} on"
-                f" {self._display.name} ({self._display.size.width}x{self._display.size.height}),"
+                f" {self._display.name} ({self._display.size.width}x{self._display.size.height}),{rendered_at}"
                 f" layer {self._layer}, {self.buffer_type} buffer of {bufsize} bytes>"
             )
 
@@ -250,17 +800,32 @@ class DispmanX:
     @property  # type: ignore
     @only_if_not_destroyed
     def size(self) -> Size:
-        return self._display.size
+        return self._size
 
     @property  # type: ignore
     @only_if_not_destroyed
     def width(self) -> int:
-        return self._display.size.width
+        return self._size.width
 
     @property  # type: ignore
     @only_if_not_destroyed
     def height(self) -> int:
-        return self._display.size.height
+        return self._size.height
+
+    @property  # type: ignore
+    @only_if_not_destroyed
+    def rect(self) -> Rect:
+        return self._rect
+
+    @property  # type: ignore
+    @only_if_not_destroyed
+    def dest_rect(self) -> Rect:
+        return self._dest_rect
+
+    @property  # type: ignore
+    @only_if_not_destroyed
+    def transform(self) -> TransformType:
+        return self._transform
 
     @property  # type: ignore
     @only_if_not_destroyed
@@ -269,104 +834,1515 @@ class DispmanX:
 
     @property  # type: ignore
     @only_if_not_destroyed
-    def pixel_format(self) -> Literal["RGB", "ARGB", "RGBA", "RGBX", "XRGB", "RGBA16", "RGB565"]:
+    def pixel_format(self) -> PixelFormatType:
         return self._pixel_format.format
 
     @property  # type: ignore
     @only_if_not_destroyed
-    def buffer_type(self) -> Literal["numpy", "ctypes"]:
-        return "ctypes" if isinstance(self._buffer, ctypes.Array) else "numpy"
+    def staging_format(self) -> Optional[Literal["RGBA", "RGBX", "ARGB", "XRGB"]]:
+        return None if self._packed_ref is None else self._buffer_format.format  # type: ignore
+
+    @property  # type: ignore
+    @only_if_not_destroyed
+    def buffer_type(self) -> Literal["numpy", "ctypes", "shared", "mmap", "external"]:
+        return self._buffer_type
+
+    @property  # type: ignore
+    @only_if_not_destroyed
+    def pitch(self) -> int:
+        return self._buffer_pitch
+
+    @property  # type: ignore
+    @only_if_not_destroyed
+    def shared_memory_name(self) -> Optional[str]:
+        return None if self._shared_memory is None else self._shared_memory.name
 
     @property  # type: ignore
     @only_if_not_destroyed
     def layer(self) -> int:
         return self._layer
 
+    @property  # type: ignore
+    @only_if_not_destroyed
+    def opacity(self) -> int:
+        return self._opacity
+
+    @property  # type: ignore
+    @only_if_not_destroyed
+    def buffers(self) -> int:
+        return self._buffers
+
+    @property  # type: ignore
+    @only_if_not_destroyed
+    def vsync_count(self) -> int:
+        return self._vsync_count
+
+    @property  # type: ignore
+    @only_if_not_destroyed
+    def missed_vsyncs(self) -> int:
+        return self._missed_vsyncs
+
+    @property  # type: ignore
+    @only_if_not_destroyed
+    def refresh_rate(self) -> Optional[float]:
+        return None if self._vsync_interval is None else 1 / self._vsync_interval
+
+    @property  # type: ignore
+    @only_if_not_destroyed
+    def stats(self) -> Optional[FrameStats]:
+        return self._stats
+
+    @property  # type: ignore
+    @only_if_not_destroyed
+    def pool(self) -> Optional["ResourcePool"]:
+        return self._pool
+
+    @property  # type: ignore
+    @only_if_not_destroyed
+    def palette(self) -> Optional[list[Color]]:
+        return None if self._palette is None else list(self._palette)
+
+    @only_if_not_destroyed
+    def set_palette(self, colors: Iterable[Sequence[int]], offset: int = 0) -> None:
+        """Change colors in an `'8BPP'` object's palette
+
+        Only the changed entries are sent to video memory with
+        `vc_dispmanx_resource_set_palette` (4 bytes per color, so at most 1 KB),
+        and they take effect on screen without an
+        [update()][dispmanx.DispmanX.update]. This makes color cycling and
+        switching themes nearly free.
+
+        With a `staging_format`, quantizing to a palette needs a lookup table
+        that takes around 100 ms to build. Each object keeps the tables of the
+        last 16 palettes it quantized to, so cycling through that many only
+        pays for each one once.
+
+        Example:
+            ```python
+            # Cycle the colors of a spinner drawn with indices 1 to 8
+            display.set_palette(colors[frame % 8 :] + colors[: frame % 8], offset=1)
+            ```
+
+        Arguments:
+            colors: `(red, green, blue)` or `(red, green, blue, alpha)` colors
+                with channels from 0 to 255.
+            offset: The palette index of the first color.
+
+        Raises:
+            DispmanXError: Raised if this object's pixel format isn't `'8BPP'`,
+                a color is invalid, or the colors don't fit in the palette.
+            DispmanXRuntimeError: Raised if there's an error setting the palette.
+        """
+        if self._palette is None:
+            raise DispmanXError(f"Pixel format {self._pixel_format.format} doesn't have a palette")
+        colors = normalize_palette(colors)
+        if offset < 0 or offset + len(colors) > len(self._palette):
+            raise DispmanXError(f"Colors don't fit in the palette at offset {offset}")
+
+        self._palette[offset : offset + len(colors)] = colors
+        if self._quantizer is not None:
+            self._quantizer.colors = tuple(self._palette)
+        for handle in self._video_resource_handles:
+            self._upload_palette(handle, offset, len(colors))
+
+    def _upload_palette(self, handle: int, offset: int = 0, count: Optional[int] = None) -> None:
+        assert self._palette is not None
+        colors = self._palette[offset : None if count is None else offset + count]
+        entries = ctypes.create_string_buffer(pack_palette(colors), len(colors) * 4)
+        if (
+            bcm_host.vc_dispmanx_resource_set_palette(
+                handle, ctypes.addressof(entries), offset * 4, len(colors) * 4  # Offset and size are in bytes
+            )
+            != 0
+        ):
+            raise DispmanXRuntimeError("Error setting palette")
+
     @property
     def destroyed(self) -> bool:
         return self._destroyed
 
-    def _create_video_resource_handle(self) -> None:
+    @property  # type: ignore
+    @only_if_not_destroyed
+    def last_upload(self) -> Optional[UploadStats]:
+        return self._last_upload
+
+    def _get_geometry(self, rect: Rect, transform: Optional[TransformType] = None) -> tuple[Size, Rect]:
+        # The buffer's size, and where it's shown when the object's window is at rect
+        transform = self._transform if transform is None else transform
+        swapped = TRANSFORMS[transform] & 1 == 1  # A 90 or 270 degree rotation turns the buffer on its side
+        rect_width, rect_height = (rect.height, rect.width) if swapped else (rect.width, rect.height)
+
+        render_size = self._render_size
+        if self._scale is not None:
+            render_size = (max(round(rect_width * self._scale), 1), max(round(rect_height * self._scale), 1))
+        elif render_size is None:
+            render_size = (rect_width, rect_height)
+
+        try:
+            size = Size(*(int(n) for n in render_size))
+        except (TypeError, ValueError):
+            raise DispmanXError(f"Invalid render size: {render_size!r}")
+        if size.width <= 0 or size.height <= 0:
+            raise DispmanXError(f"Invalid render size: {render_size!r}")
+
+        if not self._letterbox:
+            return size, rect
+
+        ratio = min(rect_width / size.width, rect_height / size.height)
+        width, height = round(size.width * ratio), round(size.height * ratio)
+        if swapped:
+            width, height = height, width
+        return size, Rect(rect.x + (rect.width - width) // 2, rect.y + (rect.height - height) // 2, width, height)
+
+    def _create_video_resource_handles(self) -> None:
         self._bcm_host_init()
-
-        unused = ctypes.c_uint32()
-        handle = bcm_host.vc_dispmanx_resource_create(
-            self._pixel_format.vc_image_type,
-            self._display.size.width,
-            self._display.size.height,
-            ctypes.byref(unused),
+        self._video_resource_handles, self._resource_damage, self._front_resource = [], [], 0
+
+        for _ in range(self._buffers):
+            handle = None if self._pool is None else self._pool._take_resource(self._resource_key)
+            if handle is not None and not self._planar:
+                _clear_resource(handle, *self._resource_key, self._pitch)
+            elif handle is None:
+                unused = ctypes.c_uint32()
+                handle = bcm_host.vc_dispmanx_resource_create(*self._resource_key, ctypes.byref(unused))
+                if handle == 0:
+                    self._delete_video_resource_handles()
+                    raise DispmanXRuntimeError("Error creating image resource")
+
+            if self._planar:
+                # Zeros are green rather than black in YUV, so new resources are cleared too
+                _clear_resource(
+                    handle,
+                    self._pixel_format.vc_image_type,
+                    self._size.width,
+                    self._buffer_rows,
+                    self._pitch,
+                    blank=self._blank_yuv420_frame(),
+                )
+            self._video_resource_handles.append(handle)
+            self._resource_damage.append([])
+            if self._palette is not None:
+                self._upload_palette(handle)
+
+    def _delete_video_resource_handles(self) -> None:
+        handles, self._video_resource_handles = self._video_resource_handles, []
+        self._release_resources(handles, self._resource_key)
+
+    def _release_resources(self, handles: list[int], key: tuple[int, int, int]) -> None:
+        if self._pool is not None:
+            self._pool._give_resources(key, handles)
+            return
+
+        failed = False
+        for handle in handles:
+            failed = bcm_host.vc_dispmanx_resource_delete(handle) != 0 or failed
+
+        if failed:
+            raise DispmanXRuntimeError("Error destroying image resource")
+
+    def _allocate_buffers(self) -> None:
+        # (Re)allocates the buffer and staging buffer for the current size
+        self._pitch = _align(self._size.width * self._pixel_format.byte_width, self._pitch_alignment)
+        self._buffer_pitch = _align(self._size.width * self._buffer_format.byte_width, self._pitch_alignment)
+        self._buffer_rows = self._size.height
+        if self._planar:
+            # All three planes in one block, uploaded as if they were rows of an 8-bit image
+            self._pitch = self._buffer_pitch = _align(
+                self._size.width, math.lcm(YUV420_PITCH_ALIGNMENT, self._pitch_alignment)
+            )
+            self._buffer_rows = _align(self._size.height, YUV420_HEIGHT_ALIGNMENT) * 3 // 2
+        self._buffer = self._buffer_ref = None
+        self._free_shared_memory()
+        self._free_mapped_memory()
+
+        size = self._buffer_pitch * self._buffer_rows
+        memory: Union[None, memoryview, "mmap.mmap", "numpy.typing.NDArray[numpy.uint8]", "ctypes.Array[ctypes.c_char]"]
+        if self._buffer_type == "shared":
+            from multiprocessing.shared_memory import SharedMemory
+
+            self._shared_memory = SharedMemory(create=True, size=size)
+            memory = self._shared_memory.buf
+            self._buffer = _buffer_view(memory, self._size, self._buffer_format, self._buffer_pitch)
+        elif self._buffer_type == "mmap":
+            memory = self._mapped_memory = self._map_memory(size)
+            self._buffer = _buffer_view(memory, self._size, self._buffer_format, self._buffer_pitch)
+        elif self._buffer_type == "numpy":
+            memory = numpy.zeros(size, dtype=numpy.uint8)
+            self._buffer = _buffer_view(memory, self._size, self._buffer_format, self._buffer_pitch)
+        elif self._buffer_type == "ctypes":
+            memory = self._buffer = ctypes.create_string_buffer(size)  # Spans any padding
+        else:
+            memory = None
+        self._buffer_ref = None if memory is None else self._make_buffer_ref(memory, pitch=self._buffer_pitch)
+        if self._planar and self._buffer_ref is not None:
+            self._buffer_ref.data[:] = self._blank_yuv420_frame()
+            self._buffer = self._yuv_planes(memory, flat=self._buffer_type == "ctypes")
+
+        self._packed_ref = None
+        if self._buffer_format is not self._pixel_format:
+            packed = self._allocate_memory(self._pitch * self._size.height)
+            self._packed_ref = self._make_buffer_ref(packed, pitch=self._pitch, pixel_format=self._pixel_format)
+        self._damage_shadow = self._last_upload = None
+        self._marked_damage = [Rect(0, 0, *self._size)]
+
+    def _yuv420_geometry(self) -> tuple[int, int, int, int]:
+        # (Bytes in the luma plane, bytes in each chroma plane, chroma width, chroma height)
+        aligned_height = self._buffer_rows * 2 // 3
+        return (
+            self._pitch * aligned_height,
+            self._pitch * aligned_height // 4,
+            -(-self._size.width // 2),
+            -(-self._size.height // 2),
         )
-        if handle == 0:
-            raise DispmanXRuntimeError("Error creating image resource")
 
-        self._video_resource_handle = handle
+    def _blank_yuv420_frame(self) -> bytes:
+        # Black, since zeros would be green. Limited range, like the HVS's default conversion.
+        luma_bytes, chroma_bytes, _, _ = self._yuv420_geometry()
+        return b"\x10" * luma_bytes + b"\x80" * (2 * chroma_bytes)
+
+    def _yuv_planes(self, memory: Any, flat: bool = False) -> YUVPlanes:
+        luma_bytes, chroma_bytes, chroma_width, chroma_height = self._yuv420_geometry()
+        offsets = (0, luma_bytes, luma_bytes + chroma_bytes, luma_bytes + 2 * chroma_bytes)
+        if HAVE_NUMPY and not flat:
+            data = numpy.frombuffer(memory, dtype=numpy.uint8)
+            pitches = (self._pitch, self._pitch // 2, self._pitch // 2)
+            sizes = (self._size, (chroma_width, chroma_height), (chroma_width, chroma_height))
+            return YUVPlanes(
+                *(
+                    data[start:end].reshape(-1, pitch)[:height, :width]
+                    for start, end, pitch, (width, height) in zip(offsets, offsets[1:], pitches, sizes)
+                )
+            )
+        view = memoryview(memory).cast("B")
+        return YUVPlanes(*(view[start:end] for start, end in zip(offsets, offsets[1:])))
+
+    def _map_memory(self, size: int) -> "mmap.mmap":
+        import mmap
+
+        mapped = None
+        if self._hugepages:
+            try:
+                mapped = mmap.mmap(
+                    -1,
+                    _align(size, HUGE_PAGE_SIZE),
+                    flags=mmap.MAP_PRIVATE | getattr(mmap, "MAP_HUGETLB", 0x40000),  # Linux's value, before 3.10
+                )
+            except OSError:
+                pass  # No huge pages reserved (see /proc/sys/vm/nr_hugepages), so ask for transparent ones below
+        if mapped is None:
+            mapped = mmap.mmap(-1, size, flags=mmap.MAP_PRIVATE)
+            if self._hugepages and hasattr(mmap, "MADV_HUGEPAGE"):
+                mapped.madvise(mmap.MADV_HUGEPAGE)
+
+        if self._lock_memory:
+            import os
+
+            libc = ctypes.CDLL(None, use_errno=True)
+            address = ctypes.addressof(ctypes.c_char.from_buffer(mapped))
+            if libc.mlock(ctypes.c_void_p(address), ctypes.c_size_t(len(mapped))) != 0:
+                error = ctypes.get_errno()
+                mapped.close()
+                raise DispmanXRuntimeError(f"Error locking buffer in memory: {os.strerror(error)}")
+        return mapped
+
+    def _free_mapped_memory(self) -> None:
+        if self._mapped_memory is not None:
+            try:
+                self._mapped_memory.close()  # Also unlocks it
+            except BufferError:
+                pass  # The buffer is still referenced somewhere, it's unmapped when that's garbage collected
+            self._mapped_memory = None
+
+    def _free_shared_memory(self) -> None:
+        if self._shared_memory is not None:
+            self._shared_memory.unlink()
+            try:
+                self._shared_memory.close()
+            except BufferError:
+                pass  # The buffer is still referenced somewhere, it's unmapped when that's garbage collected
+            self._shared_memory = None
+
+    @property
+    def _resource_key(self) -> tuple[int, int, int]:
+        # The arguments resources are created with
+        width, height = self._size
+        if self._planar:
+            # The luma plane's pitch and padded height go in the top 16 bits, so they're part of the key
+            width, height = width | self._pitch << 16, height | self._buffer_rows * 2 // 3 << 16
+        return (self._pixel_format.vc_image_type, width, height)
+
+    @property
+    def _planar(self) -> bool:
+        return self._pixel_format.vc_image_type == bcm_host.VC_IMAGE_YUV420
+
+    @property
+    def _pools_element(self) -> bool:
+        # Only elements on display handles held by the pool are pooled, not those on a Screen's
+        return self._pool is not None and self._screen is None
+
+    def _src_rect(self) -> bcm_host.VC_RECT_T:
+        # Source rectangles are in 16.16 fixed point. If the sizes differ, the HVS scales the resource onto the display.
+        return bcm_host.VC_RECT_T(width=self._size.width << 16, height=self._size.height << 16, x=0, y=0)
+
+    def _change_attributes(
+        self,
+        update_handle: int,
+        change_flags: int,
+        opacity: Optional[int] = None,
+        dest_rect: Optional[Rect] = None,
+        layer: Optional[int] = None,
+    ) -> None:
+        src_rect = self._src_rect()
+        dest = bcm_host.VC_RECT_T(*(self._dest_rect if dest_rect is None else dest_rect))
+        if (
+            bcm_host.vc_dispmanx_element_change_attributes(
+                update_handle,
+                self._surface_element_handle,
+                change_flags,
+                self._layer if layer is None else layer,
+                self._opacity if opacity is None else opacity,
+                ctypes.byref(dest),
+                ctypes.byref(src_rect),
+                bcm_host.DISPMANX_NO_HANDLE,
+                TRANSFORMS[self._transform],
+            )
+            != 0
+        ):
+            raise DispmanXRuntimeError("Couldn't change surface element attributes")
 
     def _create_surface_element(self) -> None:
-        src_width, src_height = self._display.size.width << 16, self._display.size.height << 16
-        src_rect = bcm_host.VC_RECT_T(width=src_width, height=src_height, x=0, y=0)
-        self._dest_rect = bcm_host.VC_RECT_T(width=self._display.size.width, height=self._display.size.height, x=0, y=0)
-        alpha = bcm_host.VC_DISPMANX_ALPHA_T(flags=bcm_host.DISPMANX_FLAGS_ALPHA_FROM_SOURCE, opacity=255, mask=0)
+        element = None if not self._pools_element else self._pool._take_element(self._display_handle)  # type: ignore
+        if element is not None:
+            # Show a pooled element again, with this object's attributes and resource
+            self._surface_element_handle = element
+            with self._start_and_submit_update() as update_handle:
+                self._change_attributes(
+                    update_handle,
+                    bcm_host.DISPMANX_ELEMENT_CHANGE_LAYER
+                    | bcm_host.DISPMANX_ELEMENT_CHANGE_OPACITY
+                    | bcm_host.DISPMANX_ELEMENT_CHANGE_DEST_RECT
+                    | bcm_host.DISPMANX_ELEMENT_CHANGE_SRC_RECT
+                    | bcm_host.DISPMANX_ELEMENT_CHANGE_TRANSFORM,
+                )
+                if (
+                    bcm_host.vc_dispmanx_element_change_source(
+                        update_handle, element, self._video_resource_handles[self._front_resource]
+                    )
+                    != 0
+                ):
+                    raise DispmanXRuntimeError("Couldn't change surface element source")
+            return
+
+        src_rect = self._src_rect()
+        dest_rect = bcm_host.VC_RECT_T(*self._dest_rect)
+        # Mixing in the fixed opacity, so fades work whether or not the pixels have an alpha channel
+        alpha = bcm_host.VC_DISPMANX_ALPHA_T(
+            flags=bcm_host.DISPMANX_FLAGS_ALPHA_FROM_SOURCE | bcm_host.DISPMANX_FLAGS_ALPHA_MIX,
+            opacity=self._opacity,
+            mask=0,
+        )
 
         with self._start_and_submit_update() as update_handle:
             self._surface_element_handle = bcm_host.vc_dispmanx_element_add(
                 update_handle,
                 self._display_handle,
                 self._layer,
-                ctypes.byref(self._dest_rect),
-                self._video_resource_handle,
+                ctypes.byref(dest_rect),
+                self._video_resource_handles[self._front_resource],
                 ctypes.byref(src_rect),
                 bcm_host.DISPMANX_PROTECTION_NONE,
                 ctypes.byref(alpha),
                 None,
-                bcm_host.DISPMANX_NO_ROTATE,
+                TRANSFORMS[self._transform],
             )
             if self._surface_element_handle == 0:
                 raise DispmanXRuntimeError("Couldn't create surface element")
 
+    def _apply(self, change: Callable[[int], None]) -> None:
+        # Changes the element in its own update, or with the Screen's frame when inside one
+        if self._screen is not None and self._screen._in_frame:
+            self._screen._defer_change(self, change)
+        else:
+            with self._start_and_submit_update() as update_handle:
+                change(update_handle)
+
+    @only_if_not_destroyed
+    def move_to(self, x: int, y: int) -> None:
+        """Move this object's window on the display
+
+        Only the element's position changes, with
+        `vc_dispmanx_element_change_attributes`. Nothing is reallocated or
+        uploaded again.
+
+        Arguments:
+            x: The new horizontal position of the window's top left corner.
+            y: The new vertical position of the window's top left corner.
+
+        Note:
+            If this object belongs to a [Screen][dispmanx.Screen] and is called
+            inside its [frame()][dispmanx.Screen.frame], the move happens when
+            the frame is committed.
+
+        Raises:
+            DispmanXRuntimeError: Raised if there's an error changing the
+                element.
+        """
+        dx, dy = int(x) - self._rect.x, int(y) - self._rect.y
+        self._rect = self._rect._replace(x=self._rect.x + dx, y=self._rect.y + dy)
+        self._dest_rect = dest_rect = self._dest_rect._replace(x=self._dest_rect.x + dx, y=self._dest_rect.y + dy)
+        self._apply(
+            lambda update_handle: self._change_attributes(
+                update_handle, bcm_host.DISPMANX_ELEMENT_CHANGE_DEST_RECT, dest_rect=dest_rect
+            )
+        )
+
+    @only_if_not_destroyed
+    def set_opacity(self, opacity: int) -> None:
+        """Change the opacity this object is blended onto the display with
+
+        Only the element changes, with `vc_dispmanx_element_change_attributes`,
+        so nothing is uploaded again. To fade smoothly, see
+        [Animator][dispmanx.Animator].
+
+        Arguments:
+            opacity: From `0` (invisible) to `255` (opaque).
+
+        Note:
+            If this object belongs to a [Screen][dispmanx.Screen] and is called
+            inside its [frame()][dispmanx.Screen.frame], the change happens
+            when the frame is committed.
+
+        Raises:
+            DispmanXError: Raised if the opacity is invalid.
+            DispmanXRuntimeError: Raised if there's an error changing the
+                element.
+        """
+        if not 0 <= opacity <= 255:
+            raise DispmanXError(f"Invalid opacity: {opacity}")
+        self._opacity = opacity = int(opacity)
+        self._apply(
+            lambda update_handle: self._change_attributes(
+                update_handle, bcm_host.DISPMANX_ELEMENT_CHANGE_OPACITY, opacity=opacity
+            )
+        )
+
+    @only_if_not_destroyed
+    def set_layer(self, layer: int) -> None:
+        """Move this object to another layer, above or below other elements
+
+        Only the element changes, with `vc_dispmanx_element_change_attributes`.
+
+        Arguments:
+            layer: The new layer.
+
+        Note:
+            If this object belongs to a [Screen][dispmanx.Screen] and is called
+            inside its [frame()][dispmanx.Screen.frame], the change happens
+            when the frame is committed.
+
+        Raises:
+            DispmanXRuntimeError: Raised if there's an error changing the
+                element.
+        """
+        self._layer = layer = int(layer)
+        self._apply(
+            lambda update_handle: self._change_attributes(
+                update_handle, bcm_host.DISPMANX_ELEMENT_CHANGE_LAYER, layer=layer
+            )
+        )
+
+    @only_if_not_destroyed
+    def resize(self, width: int, height: int) -> None:
+        """Resize this object's window on the display, keeping its top left
+        corner in place
+
+        If the buffer's size doesn't change, because `render_size` was
+        specified, only the element changes, with
+        `vc_dispmanx_element_change_attributes`, and the hardware scaler fits
+        the buffer to the new size. Otherwise, a new buffer and video
+        resources are allocated at the new size, and the new buffer is blank
+        until it's drawn to and updated. (An `"external"` buffer is detached
+        and must be attached again.)
+
+        Arguments:
+            width: The new width of the window.
+            height: The new height of the window.
+
+        Raises:
+            DispmanXError: Raised if the size is invalid, or the buffer's size
+                would change inside a [Screen][dispmanx.Screen]
+                [frame()][dispmanx.Screen.frame].
+            DispmanXRuntimeError: Raised if there's an error changing the
+                element or allocating resources.
+        """
+        rect = self._rect._replace(width=int(width), height=int(height))
+        if rect.width <= 0 or rect.height <= 0:
+            raise DispmanXError(f"Invalid size: {(width, height)!r}")
+        size, dest_rect = self._get_geometry(rect)
+
+        if size == self._size:
+            self._rect, self._dest_rect = rect, dest_rect
+            self._apply(
+                lambda update_handle: self._change_attributes(
+                    update_handle, bcm_host.DISPMANX_ELEMENT_CHANGE_DEST_RECT, dest_rect=dest_rect
+                )
+            )
+            return
+
+        if self._screen is not None and self._screen._in_frame:
+            raise DispmanXError("resize() can't change the buffer's size inside a Screen frame")
+        self._reallocate(rect, size, dest_rect, bcm_host.DISPMANX_ELEMENT_CHANGE_DEST_RECT)
+
     @only_if_not_destroyed
-    def update(self) -> None:
+    def set_transform(self, transform: TransformType) -> None:
+        """Change how this object's buffer is rotated or flipped onto the
+        display
+
+        Flips and 180 degree rotations (or any change that keeps the buffer's
+        size) only change the element, with
+        `vc_dispmanx_element_change_attributes`. The pixels aren't touched.
+        Switching between landscape and portrait swaps the buffer's width and
+        height, so a new buffer and video resources are allocated, as in
+        [resize()][dispmanx.DispmanX.resize].
+
+        Arguments:
+            transform: One of the choices for `transform` when creating a
+                [DispmanX][dispmanx.DispmanX] object.
+
+        Note:
+            If this object belongs to a [Screen][dispmanx.Screen] and is called
+            inside its [frame()][dispmanx.Screen.frame], the change happens
+            when the frame is committed.
+
+        Raises:
+            DispmanXError: Raised if the transform is invalid, or the buffer's
+                size would change inside a [Screen][dispmanx.Screen]
+                [frame()][dispmanx.Screen.frame].
+            DispmanXRuntimeError: Raised if there's an error changing the
+                element or allocating resources.
+        """
+        if transform not in TRANSFORMS:
+            raise DispmanXError(f"Invalid transform: {transform}")
+        size, dest_rect = self._get_geometry(self._rect, transform)
+        change_flags = bcm_host.DISPMANX_ELEMENT_CHANGE_TRANSFORM | bcm_host.DISPMANX_ELEMENT_CHANGE_DEST_RECT
+
+        if size == self._size:
+            self._transform, self._dest_rect = transform, dest_rect
+            self._apply(lambda update_handle: self._change_attributes(update_handle, change_flags, dest_rect=dest_rect))
+            return
+
+        if self._screen is not None and self._screen._in_frame:
+            raise DispmanXError("set_transform() can't change the buffer's size inside a Screen frame")
+        self._transform = transform
+        self._reallocate(self._rect, size, dest_rect, change_flags)
+
+    def _reallocate(self, rect: Rect, size: Size, dest_rect: Rect, change_flags: int) -> None:
+        # Swaps in a buffer and video resources of a new size, then releases the old resources once they're off screen
+        old_handles, old_key = self._video_resource_handles, self._resource_key
+        self._rect, self._size, self._dest_rect = rect, size, dest_rect
+        self._allocate_buffers()
+        self._create_video_resource_handles()
+        with self._start_and_submit_update() as update_handle:
+            self._change_attributes(update_handle, change_flags | bcm_host.DISPMANX_ELEMENT_CHANGE_SRC_RECT)
+            self._show_resource(update_handle, self._front_resource, force=True)
+        self._release_resources(old_handles, old_key)
+
+    @only_if_not_destroyed
+    def update(self, rects: Optional[Iterable[RectType]] = None, source: Any = None) -> UploadStats:
         """Update the pixels based on what's in the buffer
 
+        Example:
+            ```python
+            # Only upload the regions of the buffer a clock widget drew to
+            display.update(rects=[(0, 0, 300, 80)])
+            ```
+
+        Arguments:
+            rects: Regions of the buffer to upload as [Rects][dispmanx.dispmanx.Rect]
+                or `(x, y, width, height)` tuples. Regions are clipped to the
+                buffer. If `None`, the full buffer is uploaded, or only the
+                regions that changed since the last upload if `damage_tracking`
+                is `'auto'`, or those marked with
+                [mark_damaged()][dispmanx.DispmanX.mark_damaged] if it's
+                `'manual'`. Nothing is uploaded if there are no regions.
+            source: Upload this frame from an object supporting the buffer
+                protocol instead of the buffer, without attaching it. It's
+                validated like [attach_buffer()][dispmanx.DispmanX.attach_buffer].
+                With `'YUV420'`, a tightly packed I420 frame (the Y, U and V
+                planes one after another, like `ffmpeg -pix_fmt yuv420p`
+                outputs) works too, and is copied into the buffer first.
+
+        Returns:
+            [UploadStats][dispmanx.dispmanx.UploadStats] describing what was
+                uploaded.
+
+        Note:
+            If this object belongs to a [Screen][dispmanx.Screen] and is called
+            inside its [frame()][dispmanx.Screen.frame], the buffer is uploaded
+            right away but only shown on screen when the frame is committed.
+
+        Raises:
+            DispmanXError: Raised if any of the rectangles or `source` are
+                invalid, or there's no buffer to upload from
+            DispmanXRuntimeError: Raises if there's an error writing to the
+                video memory
+        """
+        frame = None if self._stats is None else self._stats._start_frame()
+        resource, upload_stats = self._upload(rects, source, frame)
+
+        if resource is not None:
+            if self._screen is not None and self._screen._in_frame:
+                self._screen._defer_update(self, resource)
+            else:
+                with self._start_and_submit_update() as update_handle:
+                    self._show_resource(update_handle, resource)
+
+        self._end_frame(frame, upload_stats)
+        return upload_stats
+
+    @only_if_not_destroyed
+    async def update_async(self, rects: Optional[Iterable[RectType]] = None, source: Any = None) -> UploadStats:
+        """Update the pixels based on what's in the buffer without blocking
+
+        Works like [update()][dispmanx.DispmanX.update], except the update is
+        submitted to the DispmanX layer asynchronously and the running event
+        loop is free to do other work until it completes. No more than
+        `max_updates_in_flight` updates are waited on at once.
+
+        Example:
+            ```python
+            async def main():
+                display = DispmanX(buffers=2)
+                while True:
+                    draw(display.buffer)
+                    await display.update_async()
+            ```
+
+        Arguments:
+            rects: Regions of the buffer to upload, as in
+                [update()][dispmanx.DispmanX.update].
+            source: Object to upload this frame from instead of the buffer, as
+                in [update()][dispmanx.DispmanX.update].
+
+        Returns:
+            [UploadStats][dispmanx.dispmanx.UploadStats] describing what was
+                uploaded.
+
+        Raises:
+            DispmanXError: Raised if any of the rectangles or `source` are
+                invalid, there's no buffer to upload from, or it's called
+                inside a [Screen][dispmanx.Screen] frame
+            DispmanXRuntimeError: Raises if there's an error writing to the
+                video memory or submitting the update
+        """
+        if self._screen is not None and self._screen._in_frame:
+            raise DispmanXError("update_async() can't be used inside a Screen frame")
+
+        import asyncio  # Only imported when needed, since it's slow to import
+
+        loop = asyncio.get_running_loop()
+        if self._update_semaphore is None:
+            self._update_semaphore = asyncio.Semaphore(self._max_updates_in_flight)
+        semaphore = self._update_semaphore
+
+        frame = None if self._stats is None else self._stats._start_frame()
+        await semaphore.acquire()
+        try:
+            resource, upload_stats = self._upload(rects, source, frame)
+            if resource is None:
+                semaphore.release()
+                self._end_frame(frame, upload_stats)
+                return upload_stats
+
+            update_handle = self._start_update()
+            self._show_resource(update_handle, resource)
+        except BaseException:
+            semaphore.release()
+            raise
+
+        future = loop.create_future()
+
+        def completed():
+            # The slot is freed when the update completes, even if the awaiting task was cancelled
+            semaphore.release()
+            if not future.done():
+                future.set_result(upload_stats)
+
+        update_id = next(_async_update_ids)
+        _pending_async_updates[update_id] = (loop, completed)
+        if bcm_host.vc_dispmanx_update_submit(update_handle, _async_update_callback, update_id) != 0:
+            del _pending_async_updates[update_id]
+            semaphore.release()
+            raise DispmanXRuntimeError("Error submitting update")
+
+        await future
+        self._end_frame(frame, upload_stats)
+        return upload_stats
+
+    def _end_frame(self, frame: Optional[FrameRecord], upload_stats: UploadStats) -> None:
+        if frame is not None and self._stats is not None:
+            self._stats._end_frame(frame, upload_stats.bytes_uploaded)
+
+    def _upload(
+        self, rects: Optional[Iterable[RectType]], source: Any = None, frame: Optional[FrameRecord] = None
+    ) -> tuple[Optional[int], UploadStats]:
+        # Writes the buffer to an off screen resource (if there is one) and returns it to be shown by an update. With
+        # stats enabled, the time spent converting and writing is added to the frame's record.
+        if source is None:
+            buffer_ref = self._buffer_ref
+        elif self._planar:
+            buffer_ref = self._yuv420_source_ref(source)
+        else:
+            buffer_ref = self._make_buffer_ref(source)
+        if buffer_ref is None:
+            raise DispmanXError("No buffer attached to upload from")
+
+        if rects is not None:
+            upload_rects = [rect for rect in map(self._clip_rect, rects) if rect is not None]
+        elif self._damage_tracking == "auto":
+            upload_rects = self._find_damage(buffer_ref)
+        elif self._damage_tracking == "manual":
+            marked, self._marked_damage = self._marked_damage, []
+            upload_rects = [Rect(*rect) for rect in damage.merge_rects(marked, self._max_damage_rects)]
+        else:
+            upload_rects = [Rect(0, 0, *self._size)]
+        if self._planar and upload_rects:
+            upload_rects = [Rect(0, 0, *self._size)]  # The firmware only accepts whole planar frames
+
+        resource, resource_rects = None, upload_rects
+        write_rects = upload_rects
+        if upload_rects:
+            resource = self._back_resource()
+            write_rects = resource_rects = self._take_resource_damage(resource, upload_rects)
+            if self._planar:
+                write_rects = [Rect(0, 0, self._size.width, self._buffer_rows)]
+
+            upload_ref = buffer_ref
+            if self._packed_ref is not None:
+                phase_start = 0.0 if frame is None else time.perf_counter()
+                for rect in upload_rects:
+                    self._convert(
+                        buffer_ref.data,
+                        buffer_ref.pixel_format.format,  # type: ignore
+                        buffer_ref.pitch,
+                        self._packed_ref.data,
+                        self._pixel_format.format,  # type: ignore
+                        self._pitch,
+                        rect,
+                        dither=self._dither,
+                    )
+                upload_ref = self._packed_ref
+                if frame is not None:
+                    frame.convert += time.perf_counter() - phase_start
+
+            phase_start = 0.0 if frame is None else time.perf_counter()
+            for rect in write_rects:
+                if (
+                    bcm_host.vc_dispmanx_resource_write_data(
+                        self._video_resource_handles[resource],
+                        self._pixel_format.vc_image_type,
+                        upload_ref.pitch,
+                        upload_ref.address,
+                        ctypes.byref(bcm_host.VC_RECT_T(*rect)),
+                    )
+                    != 0
+                ):
+                    raise DispmanXRuntimeError("Error writing buffer to video memory")
+            if frame is not None:
+                frame.write += time.perf_counter() - phase_start
+
+            if self._damage_shadow is not None:
+                self._update_damage_shadow(upload_rects, buffer_ref)
+
+        bytes_uploaded = sum(self._pitch * rect.height for rect in write_rects)
+        bytes_skipped = max(self._pitch * self._buffer_rows - bytes_uploaded, 0)
+        self._last_upload = UploadStats(bytes_uploaded, bytes_skipped, tuple(resource_rects))
+        if frame is not None:
+            frame.upload_end = time.perf_counter()
+        return resource, self._last_upload
+
+    @only_if_not_destroyed
+    def update_yuv(self, y: Any, u: Any, v: Any) -> UploadStats:
+        """Copy a frame's separate Y, U and V planes into a `'YUV420'`
+        object's buffer and upload it
+
+        For frames from cameras and video decoders, which often hand out each
+        plane with its own row stride. The planes are copied into the padded
+        layout the firmware reads (vectorized with [NumPy][numpy] if it's
+        available), then the hardware scaler converts them to RGB on screen,
+        so no color conversion happens on the CPU.
+
+        Example:
+            ```python
+            display = DispmanX(pixel_format="YUV420", render_size=(1280, 720))
+            for frame in av.open("video.mp4").decode(video=0):
+                y, u, v = (numpy.frombuffer(plane, numpy.uint8).reshape(plane.height, -1) for plane in frame.planes)
+                display.update_yuv(y, u, v)
+            ```
+
+        Arguments:
+            y: The luma plane, `height` rows of at least `width` samples.
+            u: The blue difference plane, at half the width and height
+                (rounded up).
+            v: The red difference plane, likewise.
+
+                Each plane is a 2D uint8 [NumPy array][numpy.array] (any
+                columns past the width are ignored), or a flat buffer of
+                equally spaced rows.
+
+        Returns:
+            [UploadStats][dispmanx.dispmanx.UploadStats] describing what was
+                uploaded.
+
         Raises:
+            DispmanXError: Raised if the pixel format isn't `'YUV420'`, a plane
+                has the wrong size, or there's no buffer to copy into.
             DispmanXRuntimeError: Raises if there's an error writing to the
                 video memory
         """
-        if isinstance(self._buffer, ctypes.Array):
-            buffer_ref = ctypes.byref(self._buffer)
+        if not self._planar:
+            raise DispmanXError(f"Pixel format {self._pixel_format.format} doesn't have planes")
+        self._copy_yuv420_planes(y, u, v)
+        return self.update()
+
+    def _yuv420_source_ref(self, source: Any) -> BufferRef:
+        # Frames in the padded layout are uploaded from directly, packed I420 ones are copied into the buffer first
+        try:
+            view = memoryview(source)
+        except TypeError:
+            raise DispmanXError(f"Buffer doesn't support the buffer protocol: {type(source).__name__}")
+        if view.nbytes == self._pitch * self._buffer_rows or view.nbytes != _i420_size(self._size):
+            return self._make_buffer_ref(source)
+        if not view.c_contiguous:
+            raise DispmanXError("Packed I420 frames must be C-contiguous")
+
+        flat = view.cast("B") if view.ndim != 1 or view.format != "B" else view
+        chroma_bytes = -(-self._size.width // 2) * -(-self._size.height // 2)
+        luma_bytes = self._size.width * self._size.height
+        self._copy_yuv420_planes(
+            flat[:luma_bytes], flat[luma_bytes : luma_bytes + chroma_bytes], flat[luma_bytes + chroma_bytes :]
+        )
+        return self._buffer_ref  # type: ignore
+
+    def _copy_yuv420_planes(self, y: Any, u: Any, v: Any) -> None:
+        if self._buffer_ref is None:
+            raise DispmanXError("No buffer to copy planes into")
+        luma_bytes, chroma_bytes, chroma_width, chroma_height = self._yuv420_geometry()
+        for name, plane, offset, pitch, width, height in (
+            ("Y", y, 0, self._pitch, self._size.width, self._size.height),
+            ("U", u, luma_bytes, self._pitch // 2, chroma_width, chroma_height),
+            ("V", v, luma_bytes + chroma_bytes, self._pitch // 2, chroma_width, chroma_height),
+        ):
+            self._copy_plane(name, plane, self._buffer_ref.data[offset : offset + pitch * height], pitch, width, height)
+
+    @staticmethod
+    def _copy_plane(name: str, plane: Any, dst: memoryview, pitch: int, width: int, height: int) -> None:
+        invalid = DispmanXError(f"{name} plane must be {height} rows of at least {width} uint8 samples")
+        if HAVE_NUMPY:
+            try:
+                rows = plane if isinstance(plane, numpy.ndarray) else numpy.frombuffer(plane, dtype=numpy.uint8)
+            except (TypeError, ValueError):
+                raise invalid
+            if rows.ndim == 1 and rows.size % height == 0:
+                rows = rows.reshape(height, -1)
+            if rows.dtype != numpy.uint8 or rows.ndim != 2 or rows.shape[0] != height or rows.shape[1] < width:
+                raise invalid
+            numpy.frombuffer(dst, dtype=numpy.uint8).reshape(height, pitch)[:, :width] = rows[:, :width]
+            return
+
+        try:
+            view = memoryview(plane).cast("B")
+        except TypeError:
+            raise invalid
+        stride = view.nbytes // height
+        if view.nbytes % height != 0 or stride < width:
+            raise invalid
+        for row in range(height):
+            dst[row * pitch : row * pitch + width] = view[row * stride : row * stride + width]
+
+    @only_if_not_destroyed
+    def mark_damaged(self, *rects: RectType) -> None:
+        """Report regions of the buffer that were drawn to, for the next
+        [update()][dispmanx.DispmanX.update] to upload when `damage_tracking`
+        is `'manual'`
+
+        With other damage tracking modes, this does nothing.
+
+        Example:
+            ```python
+            display = DispmanX(damage_tracking="manual")
+            display.buffer[100:120, 40:240] = (255, 0, 0, 255)
+            display.mark_damaged((40, 100, 200, 20))
+            display.update()  # Uploads only those rows
+            ```
+
+        Arguments:
+            *rects: Regions as [Rects][dispmanx.dispmanx.Rect] or
+                `(x, y, width, height)` tuples. They're clipped to the buffer.
+
+        Raises:
+            DispmanXError: Raised if any of the rectangles are invalid.
+        """
+        if self._damage_tracking == "manual":
+            self._marked_damage.extend(rect for rect in map(self._clip_rect, rects) if rect is not None)
+
+    def _back_resource(self) -> int:
+        # With a single buffer, the resource on screen is written to directly
+        return (self._front_resource + 1) % self._buffers
+
+    def _take_resource_damage(self, resource: int, rects: list[Rect]) -> list[Rect]:
+        # Off screen resources missed the frames uploaded while they weren't being written to, so they need to catch
+        # up on those regions along with the new ones
+        for i, pending in enumerate(self._resource_damage):
+            if i != resource:
+                pending.extend(rects)
+                if len(pending) > self._max_damage_rects:
+                    pending[:] = [self._bounding_rect(pending)]
+
+        rects, self._resource_damage[resource] = rects + self._resource_damage[resource], []
+        rects = [
+            rect
+            for i, rect in enumerate(rects)
+            if not any(self._contains_rect(other, rect) and (other != rect or j < i) for j, other in enumerate(rects))
+        ]
+        if len(rects) > self._max_damage_rects:
+            rects = [self._bounding_rect(rects)]
+        return rects
+
+    def _show_resource(self, update_handle: int, resource: int, force: bool = False) -> None:
+        if resource != self._front_resource or force:
+            if (
+                bcm_host.vc_dispmanx_element_change_source(
+                    update_handle, self._surface_element_handle, self._video_resource_handles[resource]
+                )
+                != 0
+            ):
+                raise DispmanXRuntimeError("Couldn't change surface element source")
+            self._front_resource = resource
+
+    @staticmethod
+    def _contains_rect(outer: Rect, inner: Rect) -> bool:
+        return (
+            outer.x <= inner.x
+            and outer.y <= inner.y
+            and outer.x + outer.width >= inner.x + inner.width
+            and outer.y + outer.height >= inner.y + inner.height
+        )
+
+    @staticmethod
+    def _bounding_rect(rects: list[Rect]) -> Rect:
+        x0, y0 = min(rect.x for rect in rects), min(rect.y for rect in rects)
+        x1, y1 = max(rect.x + rect.width for rect in rects), max(rect.y + rect.height for rect in rects)
+        return Rect(x0, y0, x1 - x0, y1 - y0)
+
+    @staticmethod
+    def _parse_rect(rect: RectType) -> Rect:
+        try:
+            return Rect(*(int(n) for n in rect))
+        except (TypeError, ValueError):
+            raise DispmanXError(f"Invalid rectangle: {rect!r}")
+
+    def _clip_rect(self, rect: RectType) -> Optional[Rect]:
+        x, y, width, height = self._parse_rect(rect)
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + width, self._size.width), min(y + height, self._size.height)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return Rect(x0, y0, x1 - x0, y1 - y0)
+
+    def _buffer_bytes(self, buffer_ref: BufferRef) -> Any:
+        # A (height, pitch) uint8 array when NumPy is available, otherwise a flat memoryview
+        if HAVE_NUMPY:
+            return numpy.frombuffer(buffer_ref.data, dtype=numpy.uint8).reshape(self._size.height, buffer_ref.pitch)
+        return buffer_ref.data
+
+    def _find_damage(self, buffer_ref: BufferRef) -> list[Rect]:
+        width, height = self._size
+        current = self._buffer_bytes(buffer_ref)
+
+        if self._damage_shadow is None or memoryview(self._damage_shadow).nbytes != memoryview(current).nbytes:
+            # First upload, or a source with a different pitch
+            self._damage_shadow = numpy.empty_like(current) if HAVE_NUMPY else bytearray(len(current))
+            return [Rect(0, 0, width, height)]
+
+        row_bytes = width * buffer_ref.pixel_format.byte_width
+        tile_width_bytes = self._damage_tile_size * buffer_ref.pixel_format.byte_width
+        if HAVE_NUMPY:
+            tile_rows = damage.damaged_tile_rows_numpy(
+                current, self._damage_shadow, row_bytes, tile_width_bytes, self._damage_tile_size
+            )
+        else:
+            tile_rows = damage.damaged_tile_rows_bytes(
+                current,
+                memoryview(self._damage_shadow),
+                height,
+                buffer_ref.pitch,
+                row_bytes,
+                tile_width_bytes,
+                self._damage_tile_size,
+            )
+
+        rects = damage.tiles_to_rects(tile_rows, width, height, self._damage_tile_size, self._max_damage_rects)
+        return [Rect(*rect) for rect in rects]
+
+    def _update_damage_shadow(self, rects: list[Rect], buffer_ref: BufferRef) -> None:
+        current, byte_width, pitch = (
+            self._buffer_bytes(buffer_ref),
+            buffer_ref.pixel_format.byte_width,
+            buffer_ref.pitch,
+        )
+
+        for x, y, width, height in rects:
+            start, end = x * byte_width, (x + width) * byte_width
+            if HAVE_NUMPY:
+                self._damage_shadow[y : y + height, start:end] = current[y : y + height, start:end]
+            else:
+                for offset in range(y * pitch, (y + height) * pitch, pitch):
+                    self._damage_shadow[offset + start : offset + end] = current[offset + start : offset + end]
+
+    @only_if_not_destroyed
+    def attach_buffer(self, buffer: Any) -> None:
+        """Upload from an external buffer from now on, without copying it
+
+        Use this to have [update()][dispmanx.DispmanX.update] read pixels
+        straight out of another library's memory, like a pygame
+        [Surface](https://www.pygame.org/docs/ref/surface.html) or a cairo
+        [ImageSurface](https://pycairo.readthedocs.io/en/latest/reference/surfaces.html#class-imagesurface-surface).
+        The object is kept as this object's `buffer` and `buffer_type` becomes
+        `"external"`.
+
+        Example:
+            ```python
+            display = DispmanX(pixel_format="RGBA", buffer_type="external")
+            surface = pygame.Surface(display.size, pygame.SRCALPHA)
+            display.attach_buffer(surface.get_view("1"))
+            ```
+
+        Arguments:
+            buffer: Any object supporting the buffer protocol, holding exactly
+                one frame in this object's pixel format with tightly packed
+                rows, or rows `pitch` bytes apart (a [NumPy array][numpy.array]
+                with that row stride, or a flat buffer including the padding).
+                Read-only buffers other than [bytes][] require [NumPy][numpy].
+                With `'YUV420'`, it must hold the three planes in the padded
+                layout described by [YUVPlanes][dispmanx.dispmanx.YUVPlanes].
+
+        Raises:
+            DispmanXError: Raised if the buffer has the wrong size, stride or
+                format for this object.
+        """
+        self._buffer_ref = self._make_buffer_ref(buffer)
+        self._buffer, self._buffer_type = buffer, "external"
+        self._marked_damage = [Rect(0, 0, *self._size)]
+
+    @staticmethod
+    def _allocate_memory(size: int) -> Any:
+        return numpy.zeros(size, dtype=numpy.uint8) if HAVE_NUMPY else ctypes.create_string_buffer(size)
+
+    def _allocate_buffer(
+        self, buffer_type: Literal["numpy", "ctypes"], size: Size, pixel_format: Optional[PixelFormat] = None
+    ) -> Any:
+        pixel_format = self._buffer_format if pixel_format is None else pixel_format
+        if buffer_type == "numpy":
+            dtype = numpy.dtype(pixel_format.numpy_dtype_name).type
+            pixel_shape = pixel_format.byte_width // dtype().nbytes
+            array_shape = (size.height, size.width, pixel_shape)
+            return numpy.zeros(shape=array_shape, dtype=dtype)
+        return ctypes.create_string_buffer(size.width * size.height * pixel_format.byte_width)
+
+    def _make_buffer_ref(
+        self,
+        buffer: Any,
+        height: Optional[int] = None,
+        pitch: Optional[int] = None,
+        writable: bool = False,
+        pixel_format: Optional[PixelFormat] = None,
+    ) -> BufferRef:
+        try:
+            view = memoryview(buffer)
+        except TypeError:
+            raise DispmanXError(f"Buffer doesn't support the buffer protocol: {type(buffer).__name__}")
+        shape, strides = view.shape, view.strides
+        if shape is None or strides is None:
+            raise DispmanXError(f"Buffer doesn't expose its shape and strides: {type(buffer).__name__}")
+
+        pixel_format = self._buffer_format if pixel_format is None else pixel_format
+        height = self._buffer_rows if height is None else height
+        if pitch is None and self._planar:
+            pitch = self._pitch  # Only the padded layout the firmware reads
+        elif pitch is None:
+            # Buffers from elsewhere can be padded like ours, or tightly packed
+            pitch = self._pitch if pixel_format is self._pixel_format else self._buffer_pitch
+            row_bytes = self._size.width * pixel_format.byte_width
+            packed = strides[0] == row_bytes if view.ndim >= 2 else view.nbytes == row_bytes * height
+            if packed:
+                pitch = row_bytes
+        if pixel_format.byte_width % view.itemsize != 0:
+            raise DispmanXError(f"Buffer format {view.format!r} doesn't match pixel format {pixel_format.format}")
+        rows_contiguous = self._rows_contiguous(view)
+        if not (view.c_contiguous or rows_contiguous) or (view.ndim >= 2 and strides[0] != pitch):
+            raise DispmanXError(f"Buffer rows must be C-contiguous with a row stride of {pitch} bytes")
+        if view.ndim >= 2 and shape[0] != height or view.c_contiguous and view.nbytes != pitch * height:
+            raise DispmanXError(f"Buffer must be {pitch * height} bytes ({height} rows of {pitch} bytes)")
+        if writable and view.readonly:
+            raise DispmanXError("Buffer must be writable")
+
+        keepalive = buffer
+        if not view.c_contiguous:
+            # A strided view of padded rows, for example, another DispmanX object's buffer. The flat view spans the
+            # padding, which is never read.
+            if not (HAVE_NUMPY and isinstance(buffer, numpy.ndarray)):
+                raise DispmanXError("Buffers with padded rows must be NumPy arrays")
+            address = buffer.ctypes.data
+            flat = (ctypes.c_char * (pitch * height)).from_address(address)
+            return BufferRef(address, memoryview(flat).cast("B"), (buffer, flat), pitch, pixel_format)
+        elif isinstance(buffer, ctypes.Array):
+            address = ctypes.addressof(buffer)
+        elif HAVE_NUMPY and isinstance(buffer, numpy.ndarray):
+            address = buffer.ctypes.data
+        elif not view.readonly:
+            keepalive = ctypes.c_char.from_buffer(buffer)
+            address = ctypes.addressof(keepalive)
+        elif isinstance(buffer, bytes):
+            address = ctypes.cast(ctypes.c_char_p(buffer), ctypes.c_void_p).value or 0
+        elif HAVE_NUMPY:
+            keepalive = numpy.frombuffer(buffer, dtype=numpy.uint8)
+            address = keepalive.ctypes.data
+        else:
+            raise DispmanXError("Read-only buffers other than bytes require NumPy")
+
+        data = view.cast("B") if view.ndim != 1 or view.format != "B" else view
+        return BufferRef(address, data, keepalive, pitch, pixel_format)
+
+    @staticmethod
+    def _rows_contiguous(view: memoryview) -> bool:
+        # Whether each row is C-contiguous, even if there's padding between them
+        shape, strides = view.shape, view.strides
+        if view.ndim < 2 or shape is None or strides is None:
+            return False
+        expected = view.itemsize
+        for length, stride in reversed(list(zip(shape[1:], strides[1:]))):
+            if stride != expected and length > 1:
+                return False
+            expected *= length
+        return True
+
+    @only_if_not_destroyed
+    def snapshot(self, out: Any = None, rect: Optional[RectType] = None) -> Any:
+        """Read back what's currently shown on this object's display
+
+        Captures the composited display, including every layer, with
+        `vc_dispmanx_snapshot` and reads it back from video memory. The
+        resource used for capturing is allocated on the first call and reused
+        after that, so passing in the same `out` every time samples the screen
+        without allocating anything.
+
+        The library only reads back whole rows, so full width regions are read
+        straight into `out`, and anything narrower is read into a scratch
+        buffer (also allocated once) and cropped from there.
+
+        Example:
+            ```python
+            out = numpy.zeros((100, 100, 4), dtype=numpy.uint8)
+            while True:
+                display.snapshot(out=out, rect=(0, 0, 100, 100))
+                check_health(out)
+                time.sleep(0.2)
+            ```
+
+        Arguments:
+            out: Where to read the pixels into, in this object's pixel format.
+                Any writable object supporting the buffer protocol with tightly
+                packed rows the size of `rect` works, for example a
+                [NumPy array][numpy.array] or [ctypes][] [Array][ctypes.Array].
+                If `None`, a new one is allocated like this object's `buffer`
+                is (a [ctypes][] [Array][ctypes.Array] for `"external"`
+                buffers).
+            rect: The region of the display to read, clipped to the display.
+                If `None`, the whole display is read.
+
+        Returns:
+            `out`, filled with the pixels on screen.
+
+        Raises:
+            DispmanXError: Raised if `rect` is empty, `out` has the wrong
+                size, stride or format, or this object's pixel format is
+                `'8BPP'` or `'YUV420'` (which snapshots can't be taken in)
+            DispmanXRuntimeError: Raised if there's an error capturing the
+                display or reading it back from video memory
+        """
+        if self._palette is not None or self._planar:
+            raise DispmanXError(f"Snapshots can't be taken in the {self._pixel_format.format} pixel format")
+        display_width, display_height = self._display.size
+        if rect is None:
+            rect = Rect(0, 0, display_width, display_height)
         else:
-            buffer_ref = numpy.ctypeslib.as_ctypes(self._buffer)
+            x, y, width, height = self._parse_rect(rect)
+            x0, y0 = max(x, 0), max(y, 0)
+            x1, y1 = min(x + width, display_width), min(y + height, display_height)
+            if x1 <= x0 or y1 <= y0:
+                raise DispmanXError(f"Rectangle is outside of the display: {rect!r}")
+            rect = Rect(x0, y0, x1 - x0, y1 - y0)
+
+        if out is None:
+            default_type = "numpy" if HAVE_NUMPY else "ctypes"
+            buffer_type = {"external": "ctypes", "shared": default_type, "mmap": default_type}.get(
+                self._buffer_type, self._buffer_type
+            )
+            out = self._allocate_buffer(buffer_type, Size(rect.width, rect.height), self._pixel_format)  # type: ignore
+        pitch = rect.width * self._pixel_format.byte_width
+        out_ref = self._make_buffer_ref(
+            out, height=rect.height, pitch=pitch, writable=True, pixel_format=self._pixel_format
+        )
 
+        if self._snapshot_resource_handle == 0:
+            unused = ctypes.c_uint32()
+            self._snapshot_resource_handle = bcm_host.vc_dispmanx_resource_create(
+                self._pixel_format.vc_image_type, display_width, display_height, ctypes.byref(unused)
+            )
+            if self._snapshot_resource_handle == 0:
+                raise DispmanXRuntimeError("Error creating snapshot resource")
+
+        if (
+            bcm_host.vc_dispmanx_snapshot(
+                self._display_handle, self._snapshot_resource_handle, bcm_host.DISPMANX_NO_ROTATE
+            )
+            != 0
+        ):
+            raise DispmanXRuntimeError("Error taking snapshot of display")
+
+        # Like resource_write_data(), the library ignores rect.x and rect.width, copying whole rows, and offsets the
+        # address by rect.y rows
+        row_pitch = display_width * self._pixel_format.byte_width
+        full_width = rect.width == display_width
+        if full_width:
+            rows_address = out_ref.address
+        else:
+            if self._snapshot_rows is None:
+                self._snapshot_rows = ctypes.create_string_buffer(row_pitch * display_height)
+            rows_address = ctypes.addressof(self._snapshot_rows)
         if (
-            bcm_host.vc_dispmanx_resource_write_data(
-                self._video_resource_handle,
-                self._pixel_format.vc_image_type,
-                self._display.size.width * self._pixel_format.byte_width,
-                buffer_ref,
-                ctypes.byref(self._dest_rect),
+            bcm_host.vc_dispmanx_resource_read_data(
+                self._snapshot_resource_handle,
+                ctypes.byref(bcm_host.VC_RECT_T(*rect)),
+                rows_address - rect.y * row_pitch,
+                row_pitch,
             )
             != 0
         ):
-            raise DispmanXRuntimeError("Error writing buffer to video memory")
+            raise DispmanXRuntimeError("Error reading snapshot from video memory")
 
-        with self._start_and_submit_update():
-            pass
+        if not full_width:
+            start = rect.x * self._pixel_format.byte_width
+            for row in range(rect.height):
+                ctypes.memmove(out_ref.address + row * pitch, rows_address + row * row_pitch + start, pitch)
+        return out
 
-    @contextmanager
-    def _start_and_submit_update(self) -> Generator[int, None, None]:
+    @staticmethod
+    def _start_update() -> int:
         update_handle = bcm_host.vc_dispmanx_update_start(0)
 
         if update_handle == bcm_host.DISPMANX_NO_HANDLE:
             raise DispmanXRuntimeError("Couldn't get update handle")
 
+        return update_handle
+
+    @staticmethod
+    @contextmanager
+    def _start_and_submit_update() -> Generator[int, None, None]:
+        update_handle = DispmanX._start_update()
+
         yield update_handle
 
         if bcm_host.vc_dispmanx_update_submit_sync(update_handle) != 0:
             raise DispmanXRuntimeError("Error submitting update")
 
+    def _on_vsync(self) -> None:
+        now = time.monotonic()
+        with self._vsync_condition:
+            if self._vsync_time is not None:
+                interval = now - self._vsync_time
+                # Exponential moving average smooths out callback jitter
+                self._vsync_interval = (
+                    interval if self._vsync_interval is None else self._vsync_interval * 0.9 + interval * 0.1
+                )
+            self._vsync_time = now
+            self._vsync_count += 1
+            self._vsync_condition.notify_all()
+
+    def _enable_vsync_callback(self) -> None:
+        # One callback per display handle, shared by every object using it (for example, a Screen's layers)
+        listeners = _vsync_listeners.setdefault(self._display_handle, [])
+        if self not in listeners:
+            if not listeners and (
+                bcm_host.vc_dispmanx_vsync_callback(self._display_handle, _vsync_callback, self._display_handle) != 0
+            ):
+                raise DispmanXRuntimeError("Error registering vsync callback")
+            listeners.append(self)
+
+    def _disable_vsync_callback(self) -> None:
+        listeners = _vsync_listeners.get(self._display_handle, [])
+        if self in listeners:
+            listeners.remove(self)
+            if not listeners:
+                del _vsync_listeners[self._display_handle]
+                if (
+                    bcm_host.vc_dispmanx_vsync_callback(self._display_handle, bcm_host.DISPMANX_CALLBACK_FUNC_T(), None)
+                    != 0
+                ):
+                    raise DispmanXRuntimeError("Error unregistering vsync callback")
+
+    def _wait_for_vsync_count(self, count: int, timeout: Optional[float] = None) -> int:
+        self._enable_vsync_callback()
+        with self._vsync_condition:
+            if not self._vsync_condition.wait_for(lambda: self._vsync_count >= count, timeout):
+                raise DispmanXRuntimeError("Timed out waiting for vsync")
+            return self._vsync_count
+
+    @only_if_not_destroyed
+    def wait_vsync(self, timeout: Optional[float] = None) -> int:
+        """Block until the next vertical blank of this object's display
+
+        The first call starts listening for vertical blanks with
+        `vc_dispmanx_vsync_callback`, which lasts until this object is
+        destroyed. Waiting doesn't busy-wait.
+
+        Arguments:
+            timeout: Maximum time to wait in seconds, or `None` to wait forever.
+
+        Returns:
+            The `vsync_count` after the vertical blank.
+
+        Raises:
+            DispmanXRuntimeError: Raised if the vsync callback can't be
+                registered, or `timeout` elapsed.
+        """
+        return self._wait_for_vsync_count(self._vsync_count + 1, timeout)
+
+    @only_if_not_destroyed
+    def run(
+        self,
+        render_fn: Callable[["DispmanX"], Optional[bool]],
+        fps: Optional[float] = None,
+        frames: Optional[int] = None,
+    ) -> None:
+        """Render and present frames paced by the display's vertical blank
+
+        Calls `render_fn` once per vertical blank (or once per every few
+        vertical blanks, see `fps`) followed by [update()][dispmanx.DispmanX.update].
+        Frames that take too long to render and update skip ahead to the next
+        vertical blank they can make, adding to `missed_vsyncs`.
+
+        Example:
+            ```python
+            def render(display):
+                draw(display.buffer)
+
+            display.run(render, fps=30)
+            ```
+
+        Arguments:
+            render_fn: Called with this object to draw a frame into its buffer.
+                Return `False` to stop, in which case the frame isn't presented.
+            fps: Target frame rate. The display's refresh rate is divided by the
+                nearest whole number that gets it to `fps` or under, for
+                example, `30` on a 60Hz display renders every other vertical
+                blank. If `None`, renders every vertical blank.
+            frames: Number of frames to render before returning, or `None` to
+                keep going until `render_fn` returns `False`.
+
+        Raises:
+            DispmanXError: Raised if `fps` isn't positive
+            DispmanXRuntimeError: Raised if the vsync callback can't be
+                registered, or there's an error updating the display.
+        """
+        if fps is not None and fps <= 0:
+            raise DispmanXError(f"Invalid frame rate: {fps}")
+
+        target = self.wait_vsync()
+        divisor = 1
+        if fps is not None:
+            while self._vsync_interval is None:
+                target = self.wait_vsync()
+            divisor = max(1, math.ceil(1 / self._vsync_interval / fps - 0.01))
+
+        for _ in itertools.repeat(None) if frames is None else range(frames):
+            if render_fn(self) is False:
+                break
+            self.update()
+
+            missed = (self._vsync_count - target) // divisor
+            self._missed_vsyncs += missed * divisor
+            target = self._wait_for_vsync_count(target + (missed + 1) * divisor)
+
+    @only_if_not_destroyed
+    def play(
+        self,
+        source: Union[Iterable[Any], BinaryIO, "mmap.mmap", str, "os.PathLike[str]"],
+        fps: Optional[float] = None,
+        prefetch: int = 4,
+    ) -> "PlaybackStats":
+        """Play a sequence of pre-rendered frames
+
+        Frames are read ahead on a background thread into a queue of at most
+        `prefetch` frames, and each one is uploaded with
+        [update()][dispmanx.DispmanX.update] straight from where it was read,
+        without copying it into this object's buffer. Frames are in this
+        object's `staging_format` if it has one, otherwise its `pixel_format`.
+        With `'YUV420'`, they're packed I420 frames, for example from
+        `ffmpeg -i video.mp4 -pix_fmt yuv420p -f rawvideo video.yuv`, which
+        are copied into the buffer's padded planes.
+
+        Example:
+            ```python
+            display = DispmanX(pixel_format="RGB565")
+            stats = display.play("animation.rgb565", fps=30)
+            print(f"Played {stats.played} frames, dropped {stats.dropped}")
+            ```
+
+        Arguments:
+            source: Where to read frames from. Choices:
+
+                * A path or file object of raw frames concatenated together.
+                    Regular files are [memory mapped][mmap], and other files
+                    (for example, a pipe from a camera or `ffmpeg`) are read a
+                    frame at a time.
+                * An [mmap][mmap.mmap] of raw frames concatenated together.
+                * An iterable of frames (for example, a generator) that each
+                    support the buffer protocol and are validated like
+                    [attach_buffer()][dispmanx.DispmanX.attach_buffer]. Since
+                    frames are read ahead, they mustn't be reused.
+
+            fps: Frame rate to play at. A frame that would be shown late,
+                because the following frame is already due and has been read,
+                is dropped. If
+                `None`, frames are played as fast as they can be uploaded and
+                none are dropped.
+            prefetch: Maximum number of frames read ahead.
+
+        Returns:
+            [PlaybackStats][dispmanx.player.PlaybackStats] with the number of
+                frames played and dropped.
+
+        Raises:
+            DispmanXError: Raised if `fps` or `prefetch` aren't positive, a
+                file doesn't hold a whole number of frames, or a frame is
+                invalid.
+            DispmanXRuntimeError: Raised if there's an error updating the
+                display.
+        """
+        from .player import play  # Only imported when needed, to keep importing dispmanx fast
+
+        return play(self, source, fps, prefetch)
+
     @classmethod
     def list_displays(cls) -> list[Display]:
         """Get a list of available [Displays][dispmanx.dispmanx.Display].
 
+        The list is cached after it's first fetched, and is fetched again
+        after a display is plugged in, unplugged or changes modes, or
+        [refresh_displays()][dispmanx.DispmanX.refresh_displays] is called.
+
         Example:
             ```python
             for display in DispmanX.list_display():
@@ -380,6 +2356,58 @@ class DispmanX:
             DispmanXRuntimeError: Raised if no devices are found, or there's an
                 error while getting the list of displays.
         """
+        displays = cls._displays
+        if displays is None:
+            displays = cls._fetch_displays()
+        return list(displays)
+
+    @classmethod
+    def refresh_displays(cls) -> list[Display]:
+        """Fetch the list of available [Displays][dispmanx.dispmanx.Display]
+        again, bypassing the cache
+
+        This happens automatically when a display is plugged in, unplugged or
+        changes modes, so it's rarely necessary to call it.
+
+        Returns:
+            List of available [Displays][dispmanx.dispmanx.Display].
+
+        Raises:
+            DispmanXRuntimeError: Raised if there's an error while getting the
+                list of displays.
+        """
+        return list(cls._fetch_displays())
+
+    @classmethod
+    def add_display_change_callback(cls, callback: Callable[[list[Display]], Any]) -> None:
+        """Call a function when the list of available displays changes
+
+        The function is called with the new list of
+        [Displays][dispmanx.dispmanx.Display], from a background thread after a
+        display is plugged in, unplugged or changes resolution (or from
+        whichever thread fetches the list first afterwards). Existing
+        [DispmanX][dispmanx.DispmanX] objects aren't changed, but this is a
+        good place to recreate them.
+
+        Arguments:
+            callback: The function to call.
+        """
+        with cls._displays_lock:
+            cls._display_change_callbacks.append(callback)
+
+    @classmethod
+    def remove_display_change_callback(cls, callback: Callable[[list[Display]], Any]) -> None:
+        """Stop calling a function added with
+        [add_display_change_callback()][dispmanx.DispmanX.add_display_change_callback]
+
+        Arguments:
+            callback: The function to stop calling.
+        """
+        with cls._displays_lock:
+            cls._display_change_callbacks.remove(callback)
+
+    @classmethod
+    def _fetch_displays(cls) -> list[Display]:
         cls._bcm_host_init()
         devices = bcm_host.TV_ATTACHED_DEVICES_T()
 
@@ -393,8 +2421,29 @@ class DispmanX:
             size = cls._get_display_size(display_id)
             response.append(Display(display_id, devices.get_display_text(display_id), size))
 
+        with cls._displays_lock:
+            changed = cls._last_displays is not None and response != cls._last_displays
+            cls._displays = cls._last_displays = response
+            callbacks = list(cls._display_change_callbacks) if changed else []
+
+        for callback in callbacks:
+            callback(list(response))
         return response
 
+    @classmethod
+    def _resolve_display(cls, display: Union[None, int, Display]) -> Display:
+        device_id = display.device_id if isinstance(display, Display) else display
+
+        # Select a display (first one by default)
+        if device_id is None:
+            return cls.get_default_display()
+
+        for display in cls.list_displays():
+            if display.device_id == device_id:
+                return display
+
+        raise DispmanXError(f"No display with device ID #{device_id} found!")
+
     @classmethod
     def get_default_display(cls) -> Display:
         """Get the default [Display][dispmanx.dispmanx.Display].
@@ -412,7 +2461,6 @@ class DispmanX:
 
     @classmethod
     def _get_display_size(cls, display_id) -> Size:
-        cls._bcm_host_init()
         width, height = ctypes.c_uint32(), ctypes.c_uint32()
         if bcm_host.graphics_get_display_size(display_id, ctypes.byref(width), ctypes.byref(height)) < 0:
             raise DispmanXRuntimeError(f"Error getting display #{display_id} size")
@@ -429,13 +2477,43 @@ class DispmanX:
                 the underlying resources for the object
         """
         if self._needs_destroying:
+            self._disable_vsync_callback()
+
             with self._start_and_submit_update() as update_handle:
-                if bcm_host.vc_dispmanx_element_remove(update_handle, self._surface_element_handle) != 0:
+                if self._pools_element:
+                    # Hidden by making it transparent and moving it off screen, then returned to the pool
+                    self._change_attributes(
+                        update_handle,
+                        bcm_host.DISPMANX_ELEMENT_CHANGE_OPACITY | bcm_host.DISPMANX_ELEMENT_CHANGE_DEST_RECT,
+                        opacity=0,
+                        dest_rect=Rect(*self._display.size, 1, 1),
+                    )
+                elif bcm_host.vc_dispmanx_element_remove(update_handle, self._surface_element_handle) != 0:
                     raise DispmanXRuntimeError("Couldn't destroy surface element")
 
-            if bcm_host.vc_dispmanx_resource_delete(self._video_resource_handle) != 0:
-                raise DispmanXRuntimeError("Error destroying image resource")
-
-            self._buffer = None
+            if self._pools_element:
+                self._pool._give_element(  # type: ignore
+                    self._display_handle,
+                    self._surface_element_handle,
+                    self._video_resource_handles[self._front_resource],
+                )
+            self._delete_video_resource_handles()
+
+            if self._snapshot_resource_handle != 0:
+                if bcm_host.vc_dispmanx_resource_delete(self._snapshot_resource_handle) != 0:
+                    raise DispmanXRuntimeError("Error destroying snapshot resource")
+                self._snapshot_resource_handle = 0
+            self._snapshot_rows = None
+
+            if self._owns_display_handle and bcm_host.vc_dispmanx_display_close(self._display_handle) != 0:
+                raise DispmanXRuntimeError(f"Error closing device ID #{self._display.device_id}")
+            if self._screen is not None:
+                self._screen._remove_layer(self)
+
+            self._buffer = self._buffer_ref = self._packed_ref = None
+            self._free_shared_memory()
+            self._free_mapped_memory()
+            if self._pool is not None:
+                self._pool._users.discard(self)
             self._needs_destroying = False
             self._destroyed = True
@@ -0,0 +1,194 @@
+from collections import OrderedDict
+import functools
+from typing import Any, Iterable, Optional, Sequence
+
+from .convert import STAGING_FORMATS
+from .exceptions import DispmanXError
+
+
+try:
+    import numpy
+except ImportError:
+    HAVE_NUMPY = False
+else:
+    HAVE_NUMPY = True
+
+
+PALETTE_SIZE = 256
+ENTRY_BYTES = 4  # So a full palette is 1 KB
+MAX_CACHED_LUTS = 16  # Per object with a staging buffer, 64 KB each
+
+Color = tuple[int, int, int, int]
+
+
+def default_palette() -> list[Color]:
+    """Get the palette `"8BPP"` objects start with
+
+    Returns:
+        256 opaque `(red, green, blue, alpha)` colors, with 3 bits of red, 3 of
+            green and 2 of blue, so index `0b11100000` is red.
+    """
+    return [((i >> 5) * 255 // 7, ((i >> 2) & 0x7) * 255 // 7, (i & 0x3) * 255 // 3, 255) for i in range(PALETTE_SIZE)]
+
+
+def normalize_palette(colors: Iterable[Sequence[int]]) -> list[Color]:
+    """Validate colors, adding an opaque alpha to `(red, green, blue)` ones
+
+    Arguments:
+        colors: `(red, green, blue)` or `(red, green, blue, alpha)` colors,
+            with channels from 0 to 255.
+
+    Returns:
+        The colors as `(red, green, blue, alpha)` tuples.
+
+    Raises:
+        DispmanXError: Raised if a color is invalid.
+    """
+    normalized = []
+    for color in colors:
+        try:
+            channels = tuple(int(channel) for channel in color)
+        except (TypeError, ValueError):
+            raise DispmanXError(f"Invalid palette color: {color!r}")
+        if len(channels) == 3:
+            channels += (255,)
+        if len(channels) != 4 or not all(0 <= channel <= 255 for channel in channels):
+            raise DispmanXError(f"Invalid palette color: {color!r}")
+        normalized.append(channels)
+    return normalized  # type: ignore
+
+
+def pack_palette(colors: Iterable[Color]) -> bytes:
+    """Pack colors into palette entries as passed to
+    `vc_dispmanx_resource_set_palette`, each a little-endian 32-bit
+    `0xAARRGGBB` value"""
+    return b"".join(bytes((blue, green, red, alpha)) for red, green, blue, alpha in colors)
+
+
+def _build_lut(colors: tuple[Color, ...]) -> tuple[Any, Optional[int]]:
+    # A table of the nearest palette index for every 16-bit (5 bits red, 6 green, 5 blue) color, and the index that
+    # transparent pixels map to. Takes around 100 ms, so it's cached by its callers.
+    palette = numpy.array(colors, dtype=numpy.int32)
+    opaque = numpy.flatnonzero(palette[:, 3] >= 128)
+    candidates = opaque if len(opaque) else numpy.arange(len(palette))
+    transparent = int(numpy.argmin(palette[:, 3])) if palette[:, 3].min() < 128 else None
+
+    reds = numpy.arange(32) * 255 // 31
+    greens = numpy.arange(64) * 255 // 63
+    blues = numpy.arange(32) * 255 // 31
+    grid = numpy.stack(numpy.meshgrid(greens, blues, indexing="ij"), axis=-1).reshape(-1, 1, 2)
+    targets = palette[candidates, :3]
+
+    lut = numpy.empty((32, 64 * 32), dtype=numpy.uint8)
+    for red in range(32):  # One plane at a time keeps the distance matrix small
+        distances = (reds[red] - targets[None, :, 0]) ** 2
+        distances = distances + (grid[..., 0] - targets[None, :, 1]) ** 2 + (grid[..., 1] - targets[None, :, 2]) ** 2
+        lut[red] = candidates[numpy.argmin(distances, axis=1)]
+    return lut.reshape(-1), transparent
+
+
+# For quantize(), so switching between a few palettes (for example, themes) stays cheap
+_cached_lut = functools.lru_cache(maxsize=4)(_build_lut)
+
+
+def _quantize_pixels(src: Any, src_format: str, out: Any, lut: Any, transparent: Optional[int]) -> None:
+    red, green, blue, alpha = STAGING_FORMATS[src_format]
+    keys = (src[..., red] >> 3).astype(numpy.uint16) << 11
+    keys |= (src[..., green] >> 2).astype(numpy.uint16) << 5
+    keys |= src[..., blue] >> 3
+    indices = lut[keys]
+    if alpha is not None and transparent is not None:
+        indices[src[..., alpha] < 128] = transparent
+    out[...] = indices
+
+
+def quantize(
+    src: Any,
+    colors: Optional[Iterable[Sequence[int]]] = None,
+    src_format: str = "RGBA",
+    out: Any = None,
+) -> Any:
+    """Map 32-bit pixels to the indices of the nearest colors in a palette
+
+    Vectorized with a lookup table of the nearest index for each color (at 16
+    bits of precision), built once per palette. Pixels with an alpha below
+    `128` map to the palette's most transparent color if it has one with an
+    alpha below `128`, otherwise alpha is ignored. Requires [NumPy][numpy].
+
+    ```python
+    from dispmanx import palette
+
+    indices = palette.quantize(rgba_array, colors=[(0, 0, 0, 0), (255, 255, 255), (255, 0, 0)])
+    ```
+
+    Arguments:
+        src: A `(height, width, 4)` uint8 array (or anything
+            [numpy.asarray()][numpy.asarray] accepts) of pixels.
+        colors: The palette, as in
+            [set_palette()][dispmanx.DispmanX.set_palette], or `None` for
+            [default_palette()][dispmanx.palette.default_palette].
+        src_format: The layout of `src`'s pixels. One of `"RGBA"`, `"RGBX"`,
+            `"ARGB"` or `"XRGB"`.
+        out: A `(height, width)` or `(height, width, 1)` uint8 array to write
+            the indices to, or `None` to allocate one.
+
+    Returns:
+        The indices, `out` if it was passed.
+
+    Raises:
+        DispmanXError: Raised if NumPy isn't available, or an argument is
+            invalid.
+    """
+    if not HAVE_NUMPY:
+        raise DispmanXError("Quantizing requires NumPy")
+    if src_format not in STAGING_FORMATS:
+        raise DispmanXError(f"Invalid source format: {src_format}")
+    palette = tuple(default_palette() if colors is None else normalize_palette(colors))
+    if not palette:
+        raise DispmanXError("Palette has no colors")
+
+    src = numpy.asarray(src, dtype=numpy.uint8)
+    if src.ndim != 3 or src.shape[2] != 4:
+        raise DispmanXError(f"Source must have a shape of (height, width, 4), not {src.shape}")
+    if out is None:
+        out = numpy.empty(src.shape[:2], dtype=numpy.uint8)
+    elif out.shape[:2] != src.shape[:2]:
+        raise DispmanXError(f"Output shape {out.shape} doesn't match source shape {src.shape}")
+    _quantize_pixels(src, src_format, out.reshape(src.shape[:2]), *_cached_lut(palette))
+    return out
+
+
+class _Quantizer:
+    # Stands in for convert.convert() when packing a staging buffer into an "8BPP" one, with the same arguments. Keeps
+    # its own tables, so an object cycling through up to MAX_CACHED_LUTS palettes only builds each one once, however
+    # many other objects are quantizing.
+    def __init__(self, colors: list[Color]):
+        self.colors = tuple(colors)
+        self._luts: "OrderedDict[tuple[Color, ...], tuple[Any, Optional[int]]]" = OrderedDict()
+
+    def _lut(self) -> tuple[Any, Optional[int]]:
+        lut = self._luts.get(self.colors)
+        if lut is None:
+            lut = self._luts[self.colors] = _build_lut(self.colors)
+            if len(self._luts) > MAX_CACHED_LUTS:
+                self._luts.popitem(last=False)
+        else:
+            self._luts.move_to_end(self.colors)
+        return lut
+
+    def __call__(
+        self,
+        src: Any,
+        src_format: str,
+        src_pitch: int,
+        dst: Any,
+        dst_format: str,
+        dst_pitch: int,
+        rect: tuple[int, int, int, int],
+        dither: bool = False,
+    ) -> None:
+        x, y, width, height = rect
+        src_rows = numpy.frombuffer(src, dtype=numpy.uint8)[: src_pitch * (y + height)].reshape(-1, src_pitch)
+        dst_rows = numpy.frombuffer(dst, dtype=numpy.uint8)[: dst_pitch * (y + height)].reshape(-1, dst_pitch)
+        pixels = src_rows[y:, x * 4 : (x + width) * 4].reshape(height, width, 4)
+        _quantize_pixels(pixels, src_format, dst_rows[y:, x : x + width], *self._lut())
@@ -0,0 +1,211 @@
+import itertools
+import mmap
+import os
+import queue
+import stat
+import threading
+import time
+from typing import TYPE_CHECKING, Any, BinaryIO, Iterable, Iterator, NamedTuple, Optional, Union
+
+from .dispmanx import PIXEL_FORMATS, _i420_size
+from .exceptions import DispmanXError
+
+
+if TYPE_CHECKING:
+    from .dispmanx import DispmanX
+
+
+DEFAULT_PREFETCH = 4
+JOIN_TIMEOUT = 1.0  # Seconds to wait for the prefetch thread to stop once playback is done
+
+_END = object()  # Put on the queue by the prefetch thread when the source is exhausted
+
+
+class PlaybackStats(NamedTuple):
+    """Counts of frames handled by [play()][dispmanx.DispmanX.play].
+
+    Not instantiated directly.
+
+    Attributes:
+        played int: Number of frames uploaded and shown.
+        dropped int: Number of frames skipped because they would have been
+            shown late, and a later frame was ready to replace them.
+        elapsed float: Seconds spent playing.
+    """
+
+    played: int
+    dropped: int
+    elapsed: float
+
+
+def _frame_size(display: "DispmanX") -> int:
+    if display.pixel_format == "YUV420":
+        return _i420_size(display.size)  # Raw yuv420p video, copied into the padded planes on upload
+    pixel_format = PIXEL_FORMATS[display.staging_format or display.pixel_format]
+    return display.width * display.height * pixel_format.byte_width
+
+
+def _iter_mmap(mapped: mmap.mmap, frame_size: int) -> Iterator[memoryview]:
+    if len(mapped) % frame_size != 0:
+        raise DispmanXError(f"Source size of {len(mapped)} bytes isn't a whole number of {frame_size} byte frames")
+
+    view = memoryview(mapped)
+    madvise = getattr(mapped, "madvise", None)
+    for offset in range(0, len(mapped), frame_size):
+        if madvise is not None:
+            # Start reading the frame in from disk now, rather than page faulting on it during the upload
+            madvise(mmap.MADV_WILLNEED, offset - offset % mmap.PAGESIZE, frame_size + offset % mmap.PAGESIZE)
+        yield view[offset : offset + frame_size]
+
+
+def _iter_stream(file: BinaryIO, frame_size: int) -> Iterator[bytearray]:
+    while True:
+        frame, filled = bytearray(frame_size), 0
+        with memoryview(frame) as view:
+            while filled < frame_size:
+                count = file.readinto(view[filled:])  # type: ignore
+                if not count:
+                    break
+                filled += count
+        if filled == 0:
+            return
+        if filled < frame_size:
+            raise DispmanXError(f"Source ended with an incomplete frame of {filled} bytes")
+        yield frame
+
+
+def _is_regular_file(file: Any) -> bool:
+    try:
+        return stat.S_ISREG(os.fstat(file.fileno()).st_mode)
+    except (AttributeError, OSError, ValueError):
+        return False
+
+
+def _open_source(source: Any, frame_size: int) -> tuple[Iterable[Any], list[Any]]:
+    # Returns the frames, and anything that needs closing once playback is done (in order)
+    if isinstance(source, mmap.mmap):
+        frames = _iter_mmap(source, frame_size)
+        return frames, [frames]
+
+    to_close = []
+    if isinstance(source, (str, bytes, os.PathLike)):
+        source = open(source, "rb")
+        to_close.append(source)
+    if _is_regular_file(source):
+        if os.fstat(source.fileno()).st_size == 0:
+            return [], to_close
+        # Copy on write, so slices are writable and can be uploaded without NumPy or copying
+        mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_COPY)
+        frames = _iter_mmap(mapped, frame_size)
+        return frames, [frames, mapped] + to_close
+    if hasattr(source, "readinto"):
+        stream = _iter_stream(source, frame_size)
+        return stream, [stream] + to_close
+    return source, to_close
+
+
+class _SharedClose:
+    # Closes the source once both playback and the prefetch thread are done with it, since the thread may still be
+    # blocked reading from a pipe or terminal after playback stops
+    def __init__(self, to_close: list[Any]):
+        self._to_close = to_close
+        self._users = 2
+        self._lock = threading.Lock()
+
+    def release(self) -> None:
+        with self._lock:
+            self._users -= 1
+            if self._users > 0:
+                return
+        for item in self._to_close:
+            try:
+                item.close()
+            except BufferError:
+                pass  # A frame is still referenced, so the mapping is closed when it's garbage collected
+
+
+def _prefetch(
+    frames: Iterable[Any], frame_queue: "queue.Queue[Any]", stop: threading.Event, closer: _SharedClose
+) -> None:
+    def put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                frame_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    try:
+        for frame in frames:
+            if not put(frame):
+                return
+    except BaseException as e:
+        put(e)
+    else:
+        put(_END)
+    finally:
+        closer.release()
+
+
+def play(
+    display: "DispmanX",
+    source: Union[Iterable[Any], BinaryIO, mmap.mmap, str, "os.PathLike[str]"],
+    fps: Optional[float] = None,
+    prefetch: int = DEFAULT_PREFETCH,
+) -> PlaybackStats:
+    """Play a sequence of frames on a [DispmanX][dispmanx.DispmanX] object
+
+    See [play()][dispmanx.DispmanX.play], which calls this.
+    """
+    if fps is not None and fps <= 0:
+        raise DispmanXError(f"Invalid frame rate: {fps}")
+    if prefetch < 1:
+        raise DispmanXError(f"Invalid prefetch: {prefetch}")
+
+    frames, to_close = _open_source(source, _frame_size(display))
+    frame_queue: "queue.Queue[Any]" = queue.Queue(maxsize=prefetch)
+    stop, closer = threading.Event(), _SharedClose(to_close)
+    thread = threading.Thread(
+        target=_prefetch, args=(frames, frame_queue, stop, closer), name="dispmanx-prefetch", daemon=True
+    )
+
+    played = dropped = 0
+    start = time.perf_counter()
+    origin: Optional[float] = None  # When the first frame was due, which the rest are scheduled from
+    thread.start()
+    try:
+        frame = frame_queue.get()
+        for index in itertools.count():
+            if frame is _END:
+                break
+            if isinstance(frame, BaseException):
+                raise frame
+            try:
+                following = frame_queue.get_nowait()
+            except queue.Empty:
+                following = None
+
+            if fps is not None:
+                now = time.perf_counter()
+                if origin is None:
+                    origin = now
+                if now >= origin + (index + 1) / fps and following is not None and following is not _END:
+                    # The next frame is already due and read, so this one would only be shown late
+                    dropped += 1
+                    frame = following
+                    continue
+                time.sleep(max(origin + index / fps - now, 0))
+
+            display.update(source=frame)
+            played += 1
+            frame = frame_queue.get() if following is None else following
+    finally:
+        stop.set()
+        while not frame_queue.empty():
+            frame_queue.get_nowait()
+        # If it's blocked on a read, it stops after the read returns, and being a daemon won't hold up exiting
+        thread.join(JOIN_TIMEOUT)
+        closer.release()
+
+    return PlaybackStats(played, dropped, time.perf_counter() - start)
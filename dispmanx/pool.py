@@ -0,0 +1,225 @@
+from collections import OrderedDict
+import threading
+from typing import TYPE_CHECKING, Optional
+import weakref
+
+from . import bcm_host
+from .exceptions import DispmanXError, DispmanXRuntimeError
+
+
+if TYPE_CHECKING:
+    from .dispmanx import DispmanX
+
+
+DEFAULT_MAX_RESOURCES = 16
+DEFAULT_MAX_ELEMENTS = 8
+
+ResourceKey = tuple[int, int, int]  # (vc_image_type, width, height)
+
+
+class ResourcePool:
+    _display_handles: dict[int, int]
+    _elements: "OrderedDict[int, tuple[int, int]]"
+    _resources: "OrderedDict[int, ResourceKey]"
+    _users: "weakref.WeakSet[DispmanX]"
+
+    def __init__(self, max_resources: int = DEFAULT_MAX_RESOURCES, max_elements: int = DEFAULT_MAX_ELEMENTS):
+        """The ResourcePool Class
+
+        Keeps the video resources and elements of destroyed
+        [DispmanX][dispmanx.DispmanX] objects around to be reused by new ones,
+        instead of deleting and creating them again. This avoids hitches and
+        video memory fragmentation when overlays come and go often, for
+        example, notifications.
+
+        ```python
+        from dispmanx import DispmanX, ResourcePool
+
+        pool = ResourcePool()
+        for message in notifications:
+            overlay = DispmanX(layer=10, render_size=(400, 100), pool=pool)
+            draw(overlay.buffer, message)
+            overlay.update()
+            time.sleep(3)
+            overlay.destroy()  # Returned to the pool, not deleted
+        pool.close()
+        ```
+
+        Resources are reused by objects with the same pixel format and render
+        size. Elements are hidden when they're returned, and reused by objects
+        on the same display (except for [Screen][dispmanx.Screen] layers, which
+        use their screen's display handle). Once the pool holds more than its
+        limit, the least recently returned resources and elements are deleted.
+        Reused resources are cleared before they're shown.
+
+        Arguments:
+            max_resources: Maximum number of unused resources kept.
+            max_elements: Maximum number of unused (hidden) elements kept.
+
+        Raises:
+            DispmanXError: Raised if either maximum is negative.
+
+        Attributes:
+            max_resources int: As above.
+            max_elements int: As above.
+            resources int: Number of unused resources in the pool.
+            elements int: Number of unused elements in the pool.
+            hits int: Number of resources and elements reused.
+            misses int: Number of resources and elements that had to be
+                created because the pool had none to reuse.
+            closed bool: Whether or not this pool has been closed.
+        """
+        if max_resources < 0 or max_elements < 0:
+            raise DispmanXError(f"Invalid pool size: {max_resources} resources, {max_elements} elements")
+        self._max_resources, self._max_elements = max_resources, max_elements
+        self._lock = threading.RLock()
+        self._resources = OrderedDict()  # Unused resource -> key, least recently returned first
+        self._elements = OrderedDict()  # Hidden element -> (display handle, resource it last showed)
+        self._display_handles = {}  # Device ID -> display handle, kept open for the pooled elements on it
+        self._users = weakref.WeakSet()  # Objects borrowing from the pool that haven't been destroyed
+        self.hits = self.misses = 0
+        self._closed = False
+
+    def __repr__(self):
+        if self._closed:
+            return f"<{self.__class__.__name__} (closed)>"
+        return (
+            f"<{self.__class__.__name__} {len(self._resources)}/{self._max_resources} resource(s),"
+            f" {len(self._elements)}/{self._max_elements} element(s), {self.hits} hit(s), {self.misses} miss(es)>"
+        )
+
+    def __del__(self):
+        if not getattr(self, "_closed", True) and not self._users:
+            self.close()
+
+    def __enter__(self) -> "ResourcePool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @property
+    def max_resources(self) -> int:
+        return self._max_resources
+
+    @property
+    def max_elements(self) -> int:
+        return self._max_elements
+
+    @property
+    def resources(self) -> int:
+        return len(self._resources)
+
+    @property
+    def elements(self) -> int:
+        return len(self._elements)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def clear(self) -> None:
+        """Delete every unused resource and element in the pool
+
+        Raises:
+            DispmanXRuntimeError: Raised if there's an error deleting them.
+        """
+        with self._lock:
+            self._evict(0, 0)
+
+    def close(self) -> None:
+        """Delete every unused resource and element, and close the display
+        handles held by the pool
+
+        If the pool is _already_ closed, the operation will do nothing.
+
+        Raises:
+            DispmanXError: Raised if [DispmanX][dispmanx.DispmanX] objects
+                using the pool haven't been destroyed.
+            DispmanXRuntimeError: Raised if there's an error deleting any of
+                the underlying resources.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            if self._users:
+                raise DispmanXError(f"{len(self._users)} DispmanX object(s) using the pool haven't been destroyed")
+            self._evict(0, 0)
+            failed = False
+            for handle in self._display_handles.values():
+                failed = bcm_host.vc_dispmanx_display_close(handle) != 0 or failed
+            self._display_handles = {}
+            self._closed = True
+            if failed:
+                raise DispmanXRuntimeError("Error closing display")
+
+    def _open_display(self, device_id: int) -> int:
+        with self._lock:
+            if self._closed:
+                raise DispmanXError(f"{self.__class__.__name__} has already been closed.")
+            handle = self._display_handles.get(device_id)
+            if handle is None:
+                handle = bcm_host.vc_dispmanx_display_open(device_id)
+                if handle == 0:
+                    raise DispmanXRuntimeError(f"Error opening device ID #{device_id}")
+                self._display_handles[device_id] = handle
+            return handle
+
+    def _take_resource(self, key: ResourceKey) -> Optional[int]:
+        with self._lock:
+            for resource in reversed(self._resources):  # Most recently returned first, since it's likely cached
+                if self._resources[resource] == key:
+                    del self._resources[resource]
+                    self.hits += 1
+                    return resource
+            self.misses += 1
+            return None
+
+    def _give_resources(self, key: ResourceKey, resources: list[int]) -> None:
+        with self._lock:
+            for resource in resources:
+                self._resources[resource] = key
+            self._evict(self._max_resources, self._max_elements)
+
+    def _take_element(self, display_handle: int) -> Optional[int]:
+        with self._lock:
+            for element in reversed(self._elements):
+                if self._elements[element][0] == display_handle:
+                    del self._elements[element]
+                    self.hits += 1
+                    return element
+            self.misses += 1
+            return None
+
+    def _give_element(self, display_handle: int, element: int, resource: int) -> None:
+        # The element must already be hidden
+        with self._lock:
+            self._elements[element] = (display_handle, resource)
+            self._evict(self._max_resources, self._max_elements)
+
+    def _evict(self, max_resources: int, max_elements: int) -> None:
+        evicted_resources = set()
+        while len(self._resources) > max_resources:
+            evicted_resources.add(self._resources.popitem(last=False)[0])
+
+        # Hidden elements still showing an evicted resource go too, so it isn't deleted out from under them
+        evicted_elements = [
+            element for element, (_, resource) in self._elements.items() if resource in evicted_resources
+        ]
+        for element in evicted_elements:
+            del self._elements[element]
+        while len(self._elements) > max_elements:
+            evicted_elements.append(self._elements.popitem(last=False)[0])
+
+        failed = False
+        if evicted_elements:
+            update_handle = bcm_host.vc_dispmanx_update_start(0)
+            if update_handle == bcm_host.DISPMANX_NO_HANDLE:
+                raise DispmanXRuntimeError("Couldn't get update handle")
+            for element in evicted_elements:
+                failed = bcm_host.vc_dispmanx_element_remove(update_handle, element) != 0 or failed
+            failed = bcm_host.vc_dispmanx_update_submit_sync(update_handle) != 0 or failed
+        for resource in evicted_resources:
+            failed = bcm_host.vc_dispmanx_resource_delete(resource) != 0 or failed
+        if failed:
+            raise DispmanXRuntimeError("Error deleting pooled resources")
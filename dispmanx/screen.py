@@ -0,0 +1,228 @@
+from contextlib import contextmanager
+from typing import Any, Callable, Generator, Union
+import weakref
+
+from . import bcm_host
+from .dispmanx import Display, DispmanX, Size
+from .exceptions import DispmanXError, DispmanXRuntimeError
+
+
+class Screen:
+    _closed: bool
+    _display: Display
+    _display_handle: int
+    _frame_depth: int
+    _layers: "weakref.WeakSet[DispmanX]"
+    _pending_changes: list[tuple[DispmanX, Callable[[int], None]]]
+    _pending_updates: dict[DispmanX, int]
+
+    def __init__(self, display: Union[None, int, Display] = None):
+        """The Screen Class
+
+        A Screen owns a single handle to a display and hands out multiple
+        [DispmanX][dispmanx.DispmanX] objects, one per layer, that share it.
+        Updates to all of them can be committed to the display together in a
+        single update transaction with [frame()][dispmanx.Screen.frame],
+        rather than paying for a blocking round-trip per layer.
+
+        ```python
+        from dispmanx import Screen
+
+        screen = Screen()
+        background = screen.create_layer(layer=0, pixel_format="RGB")
+        hud = screen.create_layer(layer=1, pixel_format="RGBA")
+
+        with screen.frame():
+            draw_background(background.buffer)
+            background.update()
+            draw_hud(hud.buffer)
+            hud.update()
+        # Both layers change on screen at the same time
+        ```
+
+        Arguments:
+            display: Which display to use, as in [DispmanX][dispmanx.DispmanX].
+
+        Raises:
+            DispmanXError: A user error occured by specifying an incorrect
+                argument.
+            DispmanXRuntimeError: A serious error occured with the underlying
+                DispmanX layer on your PI.
+
+        Attributes:
+            display Display: The display this screen is attached to
+            size Size: The [Size][dispmanx.dispmanx.Size] of the display.
+            layers list[DispmanX]: The [DispmanX][dispmanx.DispmanX] objects
+                created on this screen that haven't been destroyed, ordered by
+                layer.
+            closed bool: Whether or not this screen has been closed.
+        """
+        self._closed = True
+        self._display = DispmanX._resolve_display(display)
+
+        handle = bcm_host.vc_dispmanx_display_open(self._display.device_id)
+        if handle == 0:
+            raise DispmanXRuntimeError(f"Error opening device ID #{self._display.device_id}")
+
+        self._display_handle = handle
+        self._frame_depth = 0
+        self._layers = weakref.WeakSet()
+        self._pending_changes = []
+        self._pending_updates = {}
+        self._closed = False
+
+    def __repr__(self):
+        if self._closed:
+            return f"<{self.__class__.__name__} (closed)>"
+        return (
+            f"<{self.__class__.__name__} on {self._display.name}"
+            f" ({self._display.size.width}x{self._display.size.height}), {len(self._layers)} layer(s)>"
+        )
+
+    def __del__(self):
+        self.close()
+
+    def __enter__(self) -> "Screen":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @property
+    def display(self) -> Display:
+        return self._display
+
+    @property
+    def size(self) -> Size:
+        return self._display.size
+
+    @property
+    def layers(self) -> list[DispmanX]:
+        return sorted(self._layers, key=lambda layer: layer.layer)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def _in_frame(self) -> bool:
+        return self._frame_depth > 0
+
+    def create_layer(self, layer: int = 0, **kwargs: Any) -> DispmanX:
+        """Create a [DispmanX][dispmanx.DispmanX] object on this screen
+
+        Layers are double buffered (`buffers=2`) unless you ask otherwise, so
+        that updates inside a [frame()][dispmanx.Screen.frame] are written off
+        screen and only shown when it's committed.
+
+        Arguments:
+            layer: What layer to choose, as in [DispmanX][dispmanx.DispmanX].
+            **kwargs: Any other arguments accepted by [DispmanX][dispmanx.DispmanX],
+                except `display` and `screen`. `buffers` defaults to `2`.
+
+        Returns:
+            A [DispmanX][dispmanx.DispmanX] object sharing this screen's display
+                handle.
+
+        Raises:
+            DispmanXError: Raised if this screen is closed, or an argument is
+                incorrect.
+        """
+        if self._closed:
+            raise DispmanXError(f"{self.__class__.__name__} object has already been closed.")
+
+        kwargs.setdefault("buffers", 2)
+        dispmanx = DispmanX(layer=layer, screen=self, **kwargs)
+        self._layers.add(dispmanx)
+        return dispmanx
+
+    @contextmanager
+    def frame(self) -> Generator["Screen", None, None]:
+        """Commit every layer updated in this block to the display at once
+
+        Inside the block, calling [update()][dispmanx.DispmanX.update] on any
+        of this screen's layers uploads its buffer immediately, but the new
+        pixels are only shown when the block exits, in one
+        `vc_dispmanx_update_start`/`vc_dispmanx_update_submit_sync` transaction
+        for all of them. Moving layers with [move_to()][dispmanx.DispmanX.move_to]
+        and [resize()][dispmanx.DispmanX.resize] is committed the same way.
+        Frames can be nested, in which case only the outermost one commits. If
+        the block raises an exception, nothing is committed.
+
+        Note:
+            This relies on each layer having an off screen resource to upload
+            to, which [create_layer()][dispmanx.Screen.create_layer] gives them
+            by default. A layer created with `buffers=1` is written to while
+            it's on screen, so its new pixels can show up (and tear) before
+            the block exits.
+
+        Raises:
+            DispmanXError: Raised if this screen is closed
+            DispmanXRuntimeError: Raised if there's an error committing the
+                update.
+        """
+        if self._closed:
+            raise DispmanXError(f"{self.__class__.__name__} object has already been closed.")
+
+        self._frame_depth += 1
+        try:
+            yield self
+        except BaseException:
+            if self._frame_depth == 1:
+                self._pending_changes.clear()
+                self._pending_updates.clear()
+            raise
+        finally:
+            self._frame_depth -= 1
+
+        if self._frame_depth == 0:
+            self.commit()
+
+    def commit(self) -> None:
+        """Commit layers updated in a frame now, without waiting for it to end
+
+        Raises:
+            DispmanXRuntimeError: Raised if there's an error committing the
+                update.
+        """
+        changes, self._pending_changes = self._pending_changes, []
+        pending, self._pending_updates = self._pending_updates, {}
+        if changes or pending:
+            with DispmanX._start_and_submit_update() as update_handle:
+                for layer, change in changes:
+                    if not layer.destroyed:
+                        change(update_handle)
+                for layer, resource in pending.items():
+                    if not layer.destroyed:
+                        layer._show_resource(update_handle, resource)
+
+    def _defer_update(self, layer: DispmanX, resource: int) -> None:
+        self._pending_updates[layer] = resource
+
+    def _defer_change(self, layer: DispmanX, change: Callable[[int], None]) -> None:
+        # Changes to a layer's element, like moving it, applied in order when the frame is committed
+        self._pending_changes.append((layer, change))
+
+    def _remove_layer(self, layer: DispmanX) -> None:
+        self._layers.discard(layer)
+        self._pending_changes = [(other, change) for other, change in self._pending_changes if other is not layer]
+        self._pending_updates.pop(layer, None)
+
+    def close(self) -> None:
+        """Destroy all of this screen's layers and close its display handle
+
+        If the screen is _already_ closed, the operation will do nothing.
+
+        Raises:
+            DispmanXRuntimeError: Raised if there's an error destroying any of
+                the layers, or closing the display handle
+        """
+        if not self._closed:
+            for layer in list(self._layers):
+                layer.destroy()
+            self._pending_changes.clear()
+            self._pending_updates.clear()
+
+            if bcm_host.vc_dispmanx_display_close(self._display_handle) != 0:
+                raise DispmanXRuntimeError(f"Error closing device ID #{self._display.device_id}")
+            self._closed = True
@@ -0,0 +1,430 @@
+import os
+import selectors
+import socket
+import stat
+import struct
+import sys
+import threading
+from typing import Any, Optional
+
+from . import damage
+from .dispmanx import PIXEL_FORMATS, DispmanX, Rect, Size
+from .exceptions import DispmanXError
+
+
+DEFAULT_SOCKET_PATH = "/tmp/dispmanx.sock"
+
+MAGIC = b"DX"
+VERSION = 1
+
+# Sent by the server when a client connects: magic, version, bytes per pixel, width, height, pixel format (ASCII,
+# NUL padded)
+HELLO = struct.Struct("<2sBBHH8s")
+
+# Sent by the client before each patch's pixels: magic, version, flags, x, y, width, height
+PATCH = struct.Struct("<2sBBHHHH")
+
+# Keep the patch in the buffer, but wait for a patch without this flag before showing it
+FLAG_HOLD = 1
+
+# Receives per readable event before moving on to the next client, so one busy client can't starve the others
+_MAX_RECEIVES = 64
+
+
+class _Client:
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.header = bytearray(PATCH.size)
+        self.filled = 0
+        self.rect: Optional[Rect] = None
+        self.hold = False
+        self.rows: list[memoryview] = []  # Where the current patch's pixels go, in the display's buffer
+        self.row = self.offset = 0
+        self.pending: list[Rect] = []  # Held patches
+
+
+class FrameServer:
+    clients: int
+    patches: int
+    updates: int
+
+    def __init__(self, display: DispmanX, path: str = DEFAULT_SOCKET_PATH, backlog: int = 8):
+        """The FrameServer Class
+
+        Lets other processes draw to a [DispmanX][dispmanx.DispmanX] object
+        by sending it frames over a Unix domain socket. Pixels are received
+        straight into the object's buffer, and updates are coalesced so at
+        most one is submitted per vertical blank, however many patches arrive.
+        Before each update, the changed parts of the buffer are copied to a
+        second buffer that the update uploads from, so clients can keep
+        sending while it uploads and waits for the vertical blank. That costs
+        one extra copy of the changed pixels, but without it receiving would
+        either stall for the whole update or tear patches across frames.
+        This is what `python -m dispmanx serve` runs. See
+        [Frame Server][frame-server] for the protocol, and
+        [FrameClient][dispmanx.server.FrameClient] for a client.
+
+        ```python
+        from dispmanx import DispmanX
+        from dispmanx.server import FrameServer
+
+        display = DispmanX(layer=10, pixel_format="RGB565")
+        with FrameServer(display, "/tmp/overlay.sock") as server:
+            server.serve_forever()
+        ```
+
+        Arguments:
+            display: The object to draw to. Its `buffer_type` can't be
+                `"external"`.
+            path: Path of the socket to listen on. A stale socket left at the
+                path is removed.
+            backlog: Maximum number of connections waiting to be accepted.
+
+        Raises:
+            DispmanXError: Raised if `display` has an external buffer, no
+                buffer or the `'YUV420'` pixel format, or there's already
+                something other than a socket at `path`.
+
+        Attributes:
+            display DispmanX: As above.
+            path str: As above.
+            clients int: Number of clients connected.
+            patches int: Number of patches received.
+            updates int: Number of updates submitted.
+        """
+        if display.buffer_type == "external":
+            raise DispmanXError("FrameServer can't serve a DispmanX object with an external buffer")
+        if display.pixel_format == "YUV420":
+            raise DispmanXError("FrameServer can't serve a DispmanX object with the planar YUV420 pixel format")
+        buffer_ref = display._buffer_ref
+        if buffer_ref is None:
+            raise DispmanXError("FrameServer can't serve a DispmanX object without a buffer")
+        if os.path.lexists(path):
+            if not stat.S_ISSOCK(os.lstat(path).st_mode):
+                raise DispmanXError(f"Path exists and isn't a socket: {path}")
+            os.unlink(path)
+
+        self.display = display
+        self.path = path
+        self.clients = self.patches = self.updates = 0
+        self._buffer_format = PIXEL_FORMATS[display.staging_format or display.pixel_format]
+        self._buffer_pitch = display.pitch
+        self._data = buffer_ref.data  # Flat, including any padding between rows
+        # What the next update uploads from. The dirty parts of the buffer are copied here under the lock, so
+        # receives can keep writing to the buffer while the update reads this (and then waits for the vertical
+        # blank, a frame at most). Uploading from the buffer itself would mean holding the lock for all that time,
+        # stalling every client, or letting rows of a patch still arriving (or held) reach the screen early. The
+        # resource ring doesn't help: it's in GPU memory, and update() still has to read from host memory.
+        self._snapshot = bytearray(self._data)
+        self._hello = HELLO.pack(
+            MAGIC,
+            VERSION,
+            self._buffer_format.byte_width,
+            display.width,
+            display.height,
+            self._buffer_format.format.encode("ascii"),
+        )
+
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(path)
+        self._listener.listen(backlog)
+        self._listener.setblocking(False)
+        self._wakeup_read, self._wakeup_write = socket.socketpair()
+        self._wakeup_read.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._listener, selectors.EVENT_READ, "listener")
+        self._selector.register(self._wakeup_read, selectors.EVENT_READ, "wakeup")
+
+        self._condition = threading.Condition()
+        self._dirty: list[Rect] = []
+        self._error: Optional[BaseException] = None
+        self._shutdown = self._closed = False
+        self._flusher = threading.Thread(target=self._flush, name="dispmanx-serve-flush", daemon=True)
+
+    def __enter__(self) -> "FrameServer":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def serve_forever(self) -> None:
+        """Accept clients and receive patches until
+        [shutdown()][dispmanx.server.FrameServer.shutdown] is called
+
+        Raises:
+            DispmanXError: Raised if the server is closed.
+            DispmanXRuntimeError: Raised if there's an error updating the
+                display.
+        """
+        if self._closed:
+            raise DispmanXError(f"{self.__class__.__name__} object has already been closed.")
+        if not self._flusher.is_alive():
+            self._flusher.start()
+
+        try:
+            while not self._shutdown:
+                for key, _ in self._selector.select():
+                    if key.data == "listener":
+                        self._accept()
+                    elif key.data == "wakeup":
+                        self._wakeup_read.recv(4096)
+                    else:
+                        self._receive(key.data)
+        finally:
+            with self._condition:
+                self._shutdown = True
+                self._condition.notify_all()
+            self._flusher.join()
+
+        if self._error is not None:
+            raise self._error
+
+    def shutdown(self) -> None:
+        """Stop [serve_forever()][dispmanx.server.FrameServer.serve_forever]
+
+        Safe to call from other threads and signal handlers.
+        """
+        self._shutdown = True
+        self._wakeup_write.send(b"\0")
+
+    def close(self) -> None:
+        """Disconnect every client, stop listening and remove the socket
+
+        The display isn't destroyed. If the server is _already_ closed, the
+        operation will do nothing.
+        """
+        if not self._closed:
+            self._closed = True
+            for key in list(self._selector.get_map().values()):
+                if isinstance(key.data, _Client):
+                    self._disconnect(key.data)
+            self._selector.close()
+            self._listener.close()
+            self._wakeup_read.close()
+            self._wakeup_write.close()
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    def handle_error(self, client: Any, error: Exception) -> None:
+        """Called when a client is disconnected because of an error. Prints
+        it to [stderr][sys.stderr] by default, override to change that.
+
+        Arguments:
+            client: The client's [socket][socket.socket].
+            error: The error.
+        """
+        print(f"dispmanx: disconnected client: {error}", file=sys.stderr)
+
+    def _accept(self) -> None:
+        try:
+            sock, _ = self._listener.accept()
+        except BlockingIOError:
+            return
+        try:
+            sock.sendall(self._hello)  # Fits in the socket's send buffer, so this doesn't block
+        except OSError:
+            sock.close()
+            return
+        sock.setblocking(False)
+        self._selector.register(sock, selectors.EVENT_READ, _Client(sock))
+        self.clients += 1
+
+    def _disconnect(self, client: _Client) -> None:
+        self._selector.unregister(client.sock)
+        client.sock.close()
+        client.rows = []
+        self.clients -= 1
+
+    def _receive(self, client: _Client) -> None:
+        try:
+            for _ in range(_MAX_RECEIVES):
+                if client.rect is None:
+                    count = client.sock.recv_into(memoryview(client.header)[client.filled :])
+                    if count == 0:
+                        break
+                    client.filled += count
+                    if client.filled == PATCH.size:
+                        self._start_patch(client)
+                else:
+                    row = client.rows[client.row]
+                    with self._condition:  # Keeps updates from reading a row while it's being written
+                        count = client.sock.recv_into(row[client.offset :])
+                    if count == 0:
+                        break
+                    client.offset += count
+                    if client.offset == len(row):
+                        client.row, client.offset = client.row + 1, 0
+                        if client.row == len(client.rows):
+                            self._finish_patch(client)
+            else:
+                return
+        except BlockingIOError:
+            return
+        except (DispmanXError, OSError) as e:
+            self._disconnect(client)
+            self.handle_error(client.sock, e)
+            return
+
+        # The client hung up
+        if client.filled or client.rect is not None:
+            self._disconnect(client)
+            self.handle_error(client.sock, DispmanXError("Connection closed in the middle of a patch"))
+        else:
+            self._disconnect(client)
+
+    def _start_patch(self, client: _Client) -> None:
+        magic, version, flags, x, y, width, height = PATCH.unpack(client.header)
+        if magic != MAGIC or version != VERSION:
+            raise DispmanXError(f"Invalid patch header: {bytes(client.header)!r}")
+        if x + width > self.display.width or y + height > self.display.height:
+            raise DispmanXError(f"Patch out of bounds: {(x, y, width, height)}")
+
+        client.filled = 0
+        client.rect, client.hold = Rect(x, y, width, height), bool(flags & FLAG_HOLD)
+        byte_width = self._buffer_format.byte_width
+        if width * byte_width == self._buffer_pitch:
+            # Full width patches are contiguous in an unpadded buffer, so they're received in one go
+            start = y * self._buffer_pitch
+            client.rows = [self._data[start : start + height * self._buffer_pitch]] if height else []
+        else:
+            client.rows = [
+                self._data[row * self._buffer_pitch + x * byte_width :][: width * byte_width]
+                for row in range(y, y + height)
+            ]
+        client.row = client.offset = 0
+        if not client.rows or not width:
+            self._finish_patch(client)
+
+    def _finish_patch(self, client: _Client) -> None:
+        assert client.rect is not None
+        if client.rect.width and client.rect.height:
+            client.pending.append(client.rect)
+        self.patches += 1
+        if not client.hold and client.pending:
+            with self._condition:
+                self._dirty.extend(client.pending)
+                self._condition.notify_all()
+            client.pending = []
+        client.rect, client.rows = None, []
+
+    def _flush(self) -> None:
+        # Waits for patches, then submits them all in one update. Updates wait for the vertical blank, and patches
+        # that arrive in the meantime are coalesced into the next one.
+        try:
+            while True:
+                with self._condition:
+                    self._condition.wait_for(lambda: self._dirty or self._shutdown)
+                    if self._shutdown:
+                        return
+                    rects, self._dirty = self._dirty, []
+                    if len(rects) > damage.DEFAULT_MAX_RECTS:
+                        rects = [DispmanX._bounding_rect(rects)]
+                    self._copy_to_snapshot(rects)
+                self.display.update(rects=rects, source=self._snapshot)
+                self.updates += 1
+        except BaseException as e:
+            self._error = e
+            self.shutdown()
+
+    def _copy_to_snapshot(self, rects: list[Rect]) -> None:
+        byte_width = self._buffer_format.byte_width
+        with memoryview(self._snapshot) as snapshot:
+            for x, y, width, height in rects:
+                if width * byte_width == self._buffer_pitch:
+                    start, end = y * self._buffer_pitch, (y + height) * self._buffer_pitch
+                    snapshot[start:end] = self._data[start:end]
+                    continue
+                for row in range(y, y + height):
+                    start = row * self._buffer_pitch + x * byte_width
+                    snapshot[start : start + width * byte_width] = self._data[start : start + width * byte_width]
+
+
+class FrameClient:
+    size: Size
+    pixel_format: str
+    byte_width: int
+
+    def __init__(self, path: str = DEFAULT_SOCKET_PATH, timeout: Optional[float] = None):
+        """The FrameClient Class
+
+        A reference client for [FrameServer][dispmanx.server.FrameServer] (and
+        `python -m dispmanx serve`), which can run in a process without
+        access to the DispmanX library.
+
+        ```python
+        from dispmanx.server import FrameClient
+
+        with FrameClient("/tmp/overlay.sock") as client:
+            client.send(frame)  # A full frame
+            client.send(clock_pixels, rect=(0, 0, 300, 80))  # Just a patch
+        ```
+
+        Arguments:
+            path: Path of the server's socket.
+            timeout: Socket timeout in seconds, or `None` to block.
+
+        Raises:
+            DispmanXError: Raised if the server doesn't speak the protocol.
+
+        Attributes:
+            size Size: The size of the server's frames.
+            pixel_format str: The pixel format of the server's frames.
+            byte_width int: The number of bytes per pixel.
+        """
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._sock.settimeout(timeout)
+            self._sock.connect(path)
+            hello = bytearray(HELLO.size)
+            with memoryview(hello) as view:
+                filled = 0
+                while filled < HELLO.size:
+                    count = self._sock.recv_into(view[filled:])
+                    if count == 0:
+                        raise DispmanXError("Server closed the connection")
+                    filled += count
+            magic, version, self.byte_width, width, height, pixel_format = HELLO.unpack(hello)
+            if magic != MAGIC or version != VERSION:
+                raise DispmanXError(f"Invalid server hello: {bytes(hello)!r}")
+        except BaseException:
+            self._sock.close()
+            raise
+        self.size = Size(width, height)
+        self.pixel_format = pixel_format.rstrip(b"\0").decode("ascii")
+
+    def __enter__(self) -> "FrameClient":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def send(self, data: Any, rect: Optional[tuple[int, int, int, int]] = None, hold: bool = False) -> None:
+        """Send a full frame or a patch
+
+        Arguments:
+            data: Object supporting the buffer protocol holding the pixels, in
+                the server's pixel format with tightly packed rows.
+            rect: Region of the frame to draw to as `(x, y, width, height)`,
+                or `None` for the full frame.
+            hold: If `True`, the server waits for a patch sent without it
+                before showing this one, so several patches can be shown
+                together.
+
+        Raises:
+            DispmanXError: Raised if `rect` is out of bounds, or `data` is the
+                wrong size.
+        """
+        x, y, width, height = (0, 0, *self.size) if rect is None else rect
+        if x < 0 or y < 0 or width < 0 or height < 0 or x + width > self.size.width or y + height > self.size.height:
+            raise DispmanXError(f"Patch out of bounds: {(x, y, width, height)}")
+        with memoryview(data) as view:
+            if view.nbytes != width * height * self.byte_width:
+                raise DispmanXError(f"Patch must be {width * height * self.byte_width} bytes, not {view.nbytes}")
+            self._sock.sendall(PATCH.pack(MAGIC, VERSION, FLAG_HOLD if hold else 0, x, y, width, height))
+            self._sock.sendall(view)
+
+    def close(self) -> None:
+        """Disconnect from the server"""
+        self._sock.close()
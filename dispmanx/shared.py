@@ -0,0 +1,251 @@
+import multiprocessing
+import os
+import traceback
+from typing import Any, Callable, Literal, NamedTuple, Optional
+
+from .dispmanx import HAVE_NUMPY, PIXEL_FORMATS, DispmanX, Size, _buffer_view
+from .exceptions import DispmanXError, DispmanXRuntimeError
+
+
+class Band(NamedTuple):
+    """A horizontal band of a shared frame, passed to the render function of
+    a [BandRenderer][dispmanx.shared.BandRenderer] worker.
+
+    Not instantiated directly.
+
+    Attributes:
+        number int: Which band this is, from `0` at the top.
+        y int: The first row of the frame in this band.
+        height int: The number of rows in this band.
+        width int: The width of the frame.
+        buffer: The band's pixels, which the render function draws into. A
+            [NumPy array][numpy.array] of shape `(height, width, channels)` if
+            [NumPy][numpy] is available, otherwise a flat
+            [memoryview][memoryview] of its bytes.
+    """
+
+    number: int
+    y: int
+    height: int
+    width: int
+    buffer: Any
+
+
+def split_bands(height: int, count: int) -> list[tuple[int, int]]:
+    """Split rows into `count` contiguous `(y, height)` bands of nearly equal
+    height"""
+    return [(height * i // count, height * (i + 1) // count - height * i // count) for i in range(count)]
+
+
+def _attach(name: str) -> Any:
+    from multiprocessing.shared_memory import SharedMemory
+
+    # Workers share their parent's resource tracker, where the segment is already registered by its owner, so
+    # attaching doesn't make the tracker remove it when a worker exits
+    return SharedMemory(name=name)
+
+
+def _worker_main(
+    name: str,
+    size: Size,
+    pitch: int,
+    pixel_format: str,
+    number: int,
+    y: int,
+    height: int,
+    render_fn: Callable[[Band, int], Any],
+    start: Any,
+    done: Any,
+    frame: Any,
+    errors: Any,
+) -> None:
+    shared_memory = _attach(name)
+    if HAVE_NUMPY:
+        buffer = _buffer_view(shared_memory.buf, size, PIXEL_FORMATS[pixel_format], pitch)[y : y + height]
+    else:
+        buffer = shared_memory.buf[y * pitch : (y + height) * pitch]
+    band = Band(number, y, height, size.width, buffer)
+
+    while True:
+        start.acquire()
+        if frame.value < 0:
+            break
+        try:
+            render_fn(band, frame.value)
+        except Exception:
+            errors.put((number, traceback.format_exc()))
+        done.release()
+
+    del band, buffer
+    try:
+        shared_memory.close()
+    except BufferError:
+        pass  # The render function kept a reference to the buffer
+
+
+class BandRenderer:
+    _done: Any
+    _errors: Any
+    _frame: Any
+    _processes: list[Any]
+    _starts: list[Any]
+
+    def __init__(
+        self,
+        display: DispmanX,
+        render_fn: Callable[[Band, int], Any],
+        workers: Optional[int] = None,
+        context: Optional[Literal["fork", "spawn", "forkserver"]] = None,
+    ):
+        """The BandRenderer Class
+
+        Renders frames of a [DispmanX][dispmanx.DispmanX] object's
+        `"shared"` buffer in parallel, with worker processes that each own a
+        horizontal [Band][dispmanx.shared.Band] of it. This sidesteps the GIL
+        for CPU-bound rendering, while the owning process is left to handle
+        input and networking and to call
+        [update()][dispmanx.DispmanX.update].
+
+        ```python
+        from dispmanx import DispmanX
+        from dispmanx.shared import BandRenderer
+
+        def render(band, frame):
+            # Runs in a worker process
+            band.buffer[:] = (frame % 256, band.number * 64, 0, 255)
+
+        display = DispmanX(buffer_type="shared")
+        with BandRenderer(display, render, workers=4) as renderer:
+            for _ in range(100):
+                renderer.render()  # Returns once every band is drawn
+                display.update()
+        ```
+
+        Arguments:
+            display: A [DispmanX][dispmanx.DispmanX] object created with
+                `buffer_type="shared"`.
+            render_fn: Function called in a worker process to draw each frame,
+                with the worker's [Band][dispmanx.shared.Band] and the frame
+                number. It must be picklable if the `"spawn"` or
+                `"forkserver"` start method is used.
+            workers: Number of worker processes (and bands). Defaults to the
+                number of CPUs.
+            context: The [multiprocessing start method][multiprocessing-start-methods]
+                to use, or `None` for the default.
+
+        Raises:
+            DispmanXError: Raised if `display` doesn't have a shared buffer,
+                there are more workers than rows, or the start method is
+                invalid.
+        """
+        name = display.shared_memory_name
+        if name is None:
+            raise DispmanXError('BandRenderer requires a DispmanX object created with buffer_type="shared"')
+        workers = (os.cpu_count() or 1) if workers is None else workers
+        if not 1 <= workers <= display.height:
+            raise DispmanXError(f"Invalid number of workers: {workers}")
+
+        if context not in (None, "fork", "spawn", "forkserver"):
+            raise DispmanXError(f"Invalid start method: {context}")
+        ctx = multiprocessing.get_context(context)
+        self._frame = ctx.Value("q", 0, lock=False)
+        self._done = ctx.Semaphore(0)
+        self._errors = ctx.SimpleQueue()  # Written synchronously, so errors arrive before their worker is done
+        self._starts, self._processes = [], []
+        self._pending = 0  # Bands of the last frame that workers haven't reported done yet
+        self._closed = False
+
+        pixel_format = display.staging_format or display.pixel_format
+        for number, (y, height) in enumerate(split_bands(display.height, workers)):
+            start = ctx.Semaphore(0)
+            process = ctx.Process(
+                target=_worker_main,
+                args=(name, display.size, display.pitch, pixel_format, number, y, height, render_fn)
+                + (start, self._done, self._frame, self._errors),
+                name=f"dispmanx-band-{number}",
+                daemon=True,
+            )
+            process.start()
+            self._starts.append(start)
+            self._processes.append(process)
+
+    def __enter__(self) -> "BandRenderer":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    @property
+    def workers(self) -> int:
+        return len(self._processes)
+
+    def render(self, timeout: Optional[float] = None) -> int:
+        """Have every worker draw its band of the next frame, and wait for
+        them all to finish
+
+        Arguments:
+            timeout: Maximum number of seconds to wait for each worker, or
+                `None` to wait forever.
+
+        Returns:
+            The frame number passed to the render function.
+
+        Raises:
+            DispmanXError: Raised if the renderer is closed.
+            DispmanXRuntimeError: Raised if a worker's render function raised
+                an exception, a worker died, or the timeout expired.
+        """
+        if self._closed:
+            raise DispmanXError(f"{self.__class__.__name__} object has already been closed.")
+
+        # If the last frame timed out, its stragglers must finish first, or they'd be counted as done with this one
+        self._wait_for_workers(self._frame.value, timeout)
+        self._drain_errors()
+
+        frame = self._frame.value = self._frame.value + 1
+        self._pending = len(self._processes)
+        for start in self._starts:
+            start.release()
+        self._wait_for_workers(frame, timeout)
+
+        errors = self._drain_errors()
+        if errors:
+            number, message = errors[0]
+            raise DispmanXRuntimeError(f"Worker for band {number} failed rendering frame {frame}:\n{message}")
+        return frame
+
+    def _wait_for_workers(self, frame: int, timeout: Optional[float]) -> None:
+        while self._pending:
+            if self._done.acquire(timeout=0.5 if timeout is None else timeout):
+                self._pending -= 1
+                continue
+            dead = [process.name for process in self._processes if not process.is_alive()]
+            if dead:
+                raise DispmanXRuntimeError(f"Worker process(es) died: {', '.join(dead)}")
+            if timeout is not None:
+                raise DispmanXRuntimeError(f"Timed out waiting for workers to render frame {frame}")
+
+    def _drain_errors(self) -> list[tuple[int, str]]:
+        errors = []
+        while not self._errors.empty():
+            errors.append(self._errors.get())
+        return errors
+
+    def close(self) -> None:
+        """Stop the worker processes
+
+        If the renderer is _already_ closed, the operation will do nothing.
+        """
+        if not getattr(self, "_closed", True):
+            self._closed = True
+            self._frame.value = -1
+            for start in self._starts:
+                start.release()
+            for process in self._processes:
+                process.join(timeout=1)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
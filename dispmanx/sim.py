@@ -0,0 +1,603 @@
+import ctypes as ct
+import itertools
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from . import convert
+
+
+try:
+    import numpy
+except ImportError:
+    HAVE_NUMPY = False
+else:
+    HAVE_NUMPY = True
+
+
+# A software stand-in for libbcm_host, selected by setting the environment variable DISPMANX_BACKEND=sim (or with
+# bcm_host.load(backend="sim")) before the library is first used. Every function bound by bcm_host.py is implemented
+# here with the same name and arguments, so the rest of the package runs unmodified on machines without a VideoCore
+# (CI boxes, laptops) for testing and benchmarking. Resources live in ordinary memory, updates are applied in order
+# when submitted, and vertical blanks are generated by a timer thread. The simulated hardware can be configured with
+# these environment variables,
+#
+#   DISPMANX_SIM_DISPLAYS      Comma separated device_id:WIDTHxHEIGHT pairs (default: "2:1920x1080", ie HDMI 0)
+#   DISPMANX_SIM_REFRESH_RATE  Vertical blanks per second (default: 60)
+#   DISPMANX_SIM_LATENCY_MS    Milliseconds before each submitted update completes (default: 0)
+#
+# or at runtime with configure().
+
+DEFAULT_DISPLAYS = "2:1920x1080"
+DEFAULT_REFRESH_RATE = 60.0
+
+_VC_IMAGE_RGB565 = 1
+_VC_IMAGE_YUV420 = 3
+_VC_IMAGE_RGB888 = 5
+_VC_IMAGE_8BPP = 6
+_VC_IMAGE_RGBA32 = 15
+_VC_IMAGE_RGBA16 = 18
+_VC_IMAGE_ARGB8888 = 43
+_VC_IMAGE_XRGB8888 = 44
+_VC_IMAGE_RGBX8888 = 50
+
+_DISPMANX_FLAGS_ALPHA_FIXED_ALL_PIXELS = 1
+_DISPMANX_ELEMENT_CHANGE_LAYER = 1 << 0
+_DISPMANX_ELEMENT_CHANGE_OPACITY = 1 << 1
+_DISPMANX_ELEMENT_CHANGE_DEST_RECT = 1 << 2
+_DISPMANX_ELEMENT_CHANGE_SRC_RECT = 1 << 3
+_DISPMANX_ELEMENT_CHANGE_TRANSFORM = 1 << 5
+_DISPMANX_FLIP_HRIZ = 1 << 16
+_DISPMANX_FLIP_VERT = 1 << 17
+_VC_HDMI_UNPLUGGED = 1 << 0
+_VC_HDMI_ATTACHED = 1 << 1
+
+# Bytes per pixel, and byte offsets of the (red, green, blue, alpha) channels for 32 and 24-bit formats, matching
+# the memory layouts used by convert.py
+_IMAGE_TYPES: dict[int, tuple[int, Optional[tuple[int, int, int, Optional[int]]]]] = {
+    _VC_IMAGE_RGB565: (2, None),
+    _VC_IMAGE_RGBA16: (2, None),
+    _VC_IMAGE_8BPP: (1, None),
+    _VC_IMAGE_YUV420: (1, None),  # Per byte of the luma plane
+    _VC_IMAGE_RGB888: (3, (0, 1, 2, None)),
+    _VC_IMAGE_RGBA32: (4, convert.STAGING_FORMATS["RGBA"]),
+    _VC_IMAGE_RGBX8888: (4, convert.STAGING_FORMATS["RGBX"]),
+    _VC_IMAGE_ARGB8888: (4, convert.STAGING_FORMATS["ARGB"]),
+    _VC_IMAGE_XRGB8888: (4, convert.STAGING_FORMATS["XRGB"]),
+}
+
+
+class _Resource:
+    def __init__(self, image_type: int, width: int, height: int, pitch: Optional[int] = None, rows: int = 0):
+        self.image_type = image_type
+        self.width = width
+        self.height = height
+        self.pitch = width * _IMAGE_TYPES[image_type][0] if pitch is None else pitch
+        self.rows = rows or height  # Planar resources hold their planes one after another
+        self.data = ct.create_string_buffer(self.pitch * self.rows)
+        self.bytes = memoryview(self.data).cast("B")  # Flat, unsigned bytes, for NumPy
+        self.palette = bytearray(256 * 4)  # Little-endian 0xAARRGGBB entries, only used by 8BPP resources
+
+
+class _Element:
+    def __init__(self, display: int, layer: int, dest_rect: tuple, resource: int, src_rect: tuple, alpha: tuple):
+        self.display = display
+        self.layer = layer
+        self.dest_rect = dest_rect
+        self.resource = resource
+        self.src_rect = src_rect
+        self.alpha = alpha  # (flags, opacity)
+        self.transform = 0
+
+
+class _State:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.handles = itertools.count(1)
+        self.displays: dict[int, tuple[int, int]] = {}  # device_id -> (width, height)
+        self.display_handles: dict[int, int] = {}  # display handle -> device_id
+        self.resources: dict[int, _Resource] = {}
+        self.elements: dict[int, _Element] = {}  # In the order they were added
+        self.updates: dict[int, list[Callable[[], None]]] = {}
+        self.vsync_listeners: dict[int, threading.Event] = {}
+        self.tv_callbacks: list[tuple[Callable, Any]] = []
+        self.refresh_rate = DEFAULT_REFRESH_RATE
+        self.latency = 0.0
+        self.callbacks: Optional[queue.Queue] = None
+
+
+_state = _State()
+
+
+def _parse_displays(value: str) -> dict[int, tuple[int, int]]:
+    displays = {}
+    for entry in filter(None, (entry.strip() for entry in value.split(","))):
+        device_id, size = entry.split(":")
+        width, height = size.lower().split("x")
+        displays[int(device_id)] = (int(width), int(height))
+    return displays
+
+
+def configure(
+    displays: Optional[dict[int, tuple[int, int]]] = None,
+    refresh_rate: Optional[float] = None,
+    latency: Optional[float] = None,
+) -> None:
+    """Change the simulated hardware
+
+    Changing the displays notifies TV service callbacks, like plugging or
+    unplugging a display would.
+
+    Arguments:
+        displays: Attached displays, mapping device IDs to `(width, height)`
+        refresh_rate: Vertical blanks per second
+        latency: Seconds before each submitted update completes
+    """
+    with _state.lock:
+        if displays is not None and displays != _state.displays:
+            reason = _VC_HDMI_UNPLUGGED if len(displays) < len(_state.displays) else _VC_HDMI_ATTACHED
+            _state.displays = dict(displays)
+            for callback, arg in _state.tv_callbacks:
+                # Like the real library, the callback is called from another thread
+                threading.Thread(target=callback, args=(arg, reason, 0, 0), daemon=True).start()
+        if refresh_rate is not None:
+            _state.refresh_rate = refresh_rate
+        if latency is not None:
+            _state.latency = latency
+
+
+def reset() -> None:
+    """Forget all display handles, resources and elements, and reload the
+    configuration from the environment"""
+    with _state.lock:
+        for stop in _state.vsync_listeners.values():
+            stop.set()
+        _state.vsync_listeners.clear()
+        _state.display_handles.clear()
+        _state.resources.clear()
+        _state.elements.clear()
+        _state.updates.clear()
+        configure(
+            displays=_parse_displays(os.environ.get("DISPMANX_SIM_DISPLAYS", DEFAULT_DISPLAYS)),
+            refresh_rate=float(os.environ.get("DISPMANX_SIM_REFRESH_RATE", DEFAULT_REFRESH_RATE)),
+            latency=float(os.environ.get("DISPMANX_SIM_LATENCY_MS", 0)) / 1000,
+        )
+
+
+reset()
+
+
+def _deref(pointer: Any) -> Any:
+    # Arguments arrive as ctypes.byref() or ctypes.pointer() objects
+    return pointer._obj if hasattr(pointer, "_obj") else pointer.contents
+
+
+def _address(pointer: Any) -> int:
+    if isinstance(pointer, int):
+        return pointer
+    if isinstance(pointer, ct.c_void_p):
+        return pointer.value or 0
+    return ct.addressof(_deref(pointer))
+
+
+def _rect(pointer: Any) -> tuple[int, int, int, int]:
+    rect = _deref(pointer)
+    return (rect.x, rect.y, rect.width, rect.height)
+
+
+def _new_handle() -> int:
+    return next(_state.handles)
+
+
+def _queue_change(update: int, change: Callable[[], None]) -> int:
+    with _state.lock:
+        if update not in _state.updates:
+            return -1
+        _state.updates[update].append(change)
+    return 0
+
+
+def _callback_loop(jobs: queue.Queue) -> None:
+    while True:
+        due, callback = jobs.get()
+        time.sleep(max(due - time.monotonic(), 0))
+        callback()
+
+
+def _submit(update: int) -> int:
+    # Changes are applied immediately and in order, the configured latency only delays their completion
+    with _state.lock:
+        changes = _state.updates.pop(update, None)
+        if changes is None:
+            return -1
+        for change in changes:
+            change()
+    return 0
+
+
+def bcm_host_init() -> None:
+    pass
+
+
+def vc_dispmanx_display_open(device: int) -> int:
+    with _state.lock:
+        if device not in _state.displays:
+            return 0
+        handle = _new_handle()
+        _state.display_handles[handle] = device
+        return handle
+
+
+def vc_dispmanx_display_close(display: int) -> int:
+    with _state.lock:
+        return 0 if _state.display_handles.pop(display, None) is not None else -1
+
+
+def vc_dispmanx_resource_create(image_type: int, width: int, height: int, native_image_handle: Any) -> int:
+    pitch, rows = None, 0
+    if image_type == _VC_IMAGE_YUV420:
+        # The luma pitch and aligned height are passed in the top 16 bits of the width and height
+        pitch, aligned_height, width, height = width >> 16, height >> 16, width & 0xFFFF, height & 0xFFFF
+        pitch, aligned_height = pitch or -(-width // 32) * 32, aligned_height or -(-height // 16) * 16
+        if pitch < width or pitch % 32 or aligned_height < height or aligned_height % 16:
+            return 0
+        rows = aligned_height * 3 // 2
+    if image_type not in _IMAGE_TYPES or width <= 0 or height <= 0:
+        return 0
+    with _state.lock:
+        handle = _new_handle()
+        _state.resources[handle] = _Resource(image_type, width, height, pitch, rows)
+        return handle
+
+
+def vc_dispmanx_resource_delete(resource: int) -> int:
+    with _state.lock:
+        return 0 if _state.resources.pop(resource, None) is not None else -1
+
+
+def vc_dispmanx_resource_set_palette(resource: int, src_address: Any, offset: int, size: int) -> int:
+    with _state.lock:
+        target = _state.resources.get(resource)
+        if target is None or offset < 0 or size < 0 or offset + size > len(target.palette):
+            return -1
+        target.palette[offset : offset + size] = ct.string_at(_address(src_address), size)
+    return 0
+
+
+def vc_dispmanx_resource_write_data(resource: int, src_type: int, src_pitch: int, src_address: Any, rect: Any) -> int:
+    x, y, width, height = _rect(rect)
+    with _state.lock:
+        dst = _state.resources.get(resource)
+    if dst is None or src_type != dst.image_type or y < 0 or height < 0 or y + height > dst.rows:
+        return -1
+
+    # Like the real library, the source address is offset by rect.y rows and whole rows are transferred
+    src, dst_address = _address(src_address), ct.addressof(dst.data)
+    if src_pitch == dst.pitch:
+        ct.memmove(dst_address + y * dst.pitch, src + y * src_pitch, dst.pitch * height)
+    else:
+        row_bytes = min(src_pitch, dst.pitch)
+        for row in range(y, y + height):
+            ct.memmove(dst_address + row * dst.pitch, src + row * src_pitch, row_bytes)
+    return 0
+
+
+def vc_dispmanx_resource_read_data(resource: int, rect: Any, dst_address: Any, dst_pitch: int) -> int:
+    x, y, width, height = _rect(rect)
+    with _state.lock:
+        src = _state.resources.get(resource)
+    if src is None or y < 0 or height < 0 or y + height > src.rows:
+        return -1
+
+    # Like the real library, the destination address is offset by rect.y rows and whole rows are transferred, so
+    # rect.x and rect.width are ignored
+    dst, src_address = _address(dst_address), ct.addressof(src.data)
+    if dst_pitch == src.pitch:
+        ct.memmove(dst + y * dst_pitch, src_address + y * src.pitch, src.pitch * height)
+    else:
+        row_bytes = min(dst_pitch, src.pitch)
+        for row in range(y, y + height):
+            ct.memmove(dst + row * dst_pitch, src_address + row * src.pitch, row_bytes)
+    return 0
+
+
+def vc_dispmanx_update_start(priority: int) -> int:
+    with _state.lock:
+        handle = _new_handle()
+        _state.updates[handle] = []
+        return handle
+
+
+def vc_dispmanx_update_submit_sync(update: int) -> int:
+    if _submit(update) != 0:
+        return -1
+    time.sleep(_state.latency)
+    return 0
+
+
+def vc_dispmanx_update_submit(update: int, callback: Any, arg: Any) -> int:
+    if _submit(update) != 0:
+        return -1
+    if callback:
+        # Like the real library, the callback is called from another thread
+        with _state.lock:
+            if _state.callbacks is None:
+                _state.callbacks = queue.Queue()
+                threading.Thread(target=_callback_loop, args=(_state.callbacks,), daemon=True).start()
+            _state.callbacks.put((time.monotonic() + _state.latency, lambda: callback(update, arg)))
+    return 0
+
+
+def vc_dispmanx_element_add(
+    update: int,
+    display: int,
+    layer: int,
+    dest_rect: Any,
+    src: int,
+    src_rect: Any,
+    protection: int,
+    alpha: Any,
+    clamp: Any,
+    transform: int,
+) -> int:
+    with _state.lock:
+        if display not in _state.display_handles:
+            return 0
+        alpha_struct = _deref(alpha)
+        element = _Element(
+            _state.display_handles[display],
+            layer,
+            _rect(dest_rect),
+            src,
+            _rect(src_rect),
+            (alpha_struct.flags, alpha_struct.opacity),
+        )
+        element.transform = transform
+        handle = _new_handle()
+
+    def change():
+        _state.elements[handle] = element
+
+    return handle if _queue_change(update, change) == 0 else 0
+
+
+def vc_dispmanx_element_remove(update: int, element: int) -> int:
+    def change() -> None:
+        _state.elements.pop(element, None)
+
+    return _queue_change(update, change)
+
+
+def vc_dispmanx_element_change_source(update: int, element: int, src: int) -> int:
+    def change():
+        if element in _state.elements:
+            _state.elements[element].resource = src
+
+    return _queue_change(update, change)
+
+
+def vc_dispmanx_element_change_attributes(
+    update: int,
+    element: int,
+    change_flags: int,
+    layer: int,
+    opacity: int,
+    dest_rect: Any,
+    src_rect: Any,
+    mask: int,
+    transform: int,
+) -> int:
+    new_dest_rect = _rect(dest_rect) if change_flags & _DISPMANX_ELEMENT_CHANGE_DEST_RECT else None
+    new_src_rect = _rect(src_rect) if change_flags & _DISPMANX_ELEMENT_CHANGE_SRC_RECT else None
+
+    def change():
+        target = _state.elements.get(element)
+        if target is None:
+            return
+        if change_flags & _DISPMANX_ELEMENT_CHANGE_LAYER:
+            target.layer = layer
+        if change_flags & _DISPMANX_ELEMENT_CHANGE_OPACITY:
+            target.alpha = (target.alpha[0], opacity)
+        if new_dest_rect is not None:
+            target.dest_rect = new_dest_rect
+        if new_src_rect is not None:
+            target.src_rect = new_src_rect
+        if change_flags & _DISPMANX_ELEMENT_CHANGE_TRANSFORM:
+            target.transform = transform
+
+    return _queue_change(update, change)
+
+
+def vc_dispmanx_vsync_callback(display: int, callback: Any, arg: Any) -> int:
+    with _state.lock:
+        if display not in _state.display_handles:
+            return -1
+        stop = _state.vsync_listeners.pop(display, None)
+        if stop is not None:
+            stop.set()
+        if not callback:
+            return 0
+        stop = _state.vsync_listeners[display] = threading.Event()
+
+    def run():
+        next_vsync = time.monotonic()
+        while True:
+            next_vsync += 1 / _state.refresh_rate
+            if stop.wait(max(next_vsync - time.monotonic(), 0)):
+                break
+            callback(0, arg)
+
+    threading.Thread(target=run, daemon=True).start()
+    return 0
+
+
+def vc_dispmanx_snapshot(display: int, snapshot_resource: int, transform: int) -> int:
+    with _state.lock:
+        device_id = _state.display_handles.get(display)
+        resource = _state.resources.get(snapshot_resource)
+        if not HAVE_NUMPY or device_id is None or resource is None:
+            return -1
+        image = _transform(compose(device_id), transform)
+        if image.shape[:2] != (resource.height, resource.width):
+            return -1
+        _encode(image, resource)
+    return 0
+
+
+def graphics_get_display_size(display_number: int, width: Any, height: Any) -> int:
+    with _state.lock:
+        if display_number not in _state.displays:
+            return -1
+        _deref(width).value, _deref(height).value = _state.displays[display_number]
+    return 0
+
+
+def vc_tv_get_attached_devices(devices: Any) -> int:
+    devices = _deref(devices)
+    with _state.lock:
+        device_ids = sorted(_state.displays)[: len(devices.display_number)]
+    devices.num_attached = len(device_ids)
+    for i, device_id in enumerate(device_ids):
+        devices.display_number[i] = device_id
+    return 0
+
+
+def vc_tv_register_callback(callback: Any, arg: Any) -> None:
+    with _state.lock:
+        _state.tv_callbacks.append((callback, arg))
+
+
+def _decode(resource: _Resource) -> Any:
+    """Returns a resource's pixels as a (height, width, 4) RGBA uint8 array"""
+    if resource.image_type == _VC_IMAGE_YUV420:
+        return _decode_yuv420(resource)
+    byte_width, offsets = _IMAGE_TYPES[resource.image_type]
+    pixels = numpy.frombuffer(resource.bytes, dtype=numpy.uint8).reshape(resource.height, resource.width, byte_width)
+    rgba = numpy.full((resource.height, resource.width, 4), 255, dtype=numpy.uint8)
+
+    if resource.image_type == _VC_IMAGE_8BPP:
+        palette = numpy.frombuffer(bytes(resource.palette), dtype=numpy.uint8).reshape(256, 4)
+        rgba[...] = palette[pixels[..., 0]][..., [2, 1, 0, 3]]
+    elif offsets is not None:
+        for channel, offset in enumerate(offsets):
+            if offset is not None:
+                rgba[..., channel] = pixels[..., offset]
+    else:
+        value = pixels.view("<u2")[..., 0].astype(numpy.uint32)
+        channels: tuple[Any, ...]
+        if resource.image_type == _VC_IMAGE_RGB565:
+            channels = ((value >> 11) * 255 // 31, ((value >> 5) & 0x3F) * 255 // 63, (value & 0x1F) * 255 // 31)
+        else:
+            channels = tuple(((value >> shift) & 0xF) * 17 for shift in (12, 8, 4, 0))
+        for channel, values in enumerate(channels):
+            rgba[..., channel] = values
+    return rgba
+
+
+def _decode_yuv420(resource: _Resource) -> Any:
+    # Limited range BT.601, like the HVS's default. Each chroma sample covers 2x2 luma samples.
+    width, height, pitch, aligned_height = resource.width, resource.height, resource.pitch, resource.rows * 2 // 3
+    planes = numpy.frombuffer(resource.bytes, dtype=numpy.uint8)
+    luma_bytes, chroma_bytes = pitch * aligned_height, pitch * aligned_height // 4
+    y = planes[:luma_bytes].reshape(aligned_height, pitch)[:height, :width].astype(numpy.float32) - 16
+    u, v = (
+        planes[offset : offset + chroma_bytes]
+        .reshape(aligned_height // 2, pitch // 2)
+        .repeat(2, axis=0)
+        .repeat(2, axis=1)[:height, :width]
+        .astype(numpy.float32)
+        - 128
+        for offset in (luma_bytes, luma_bytes + chroma_bytes)
+    )
+    rgba = numpy.full((height, width, 4), 255, dtype=numpy.uint8)
+    for channel, values in enumerate((1.164 * y + 1.596 * v, 1.164 * y - 0.392 * u - 0.813 * v, 1.164 * y + 2.017 * u)):
+        rgba[..., channel] = numpy.clip(values + 0.5, 0, 255)
+    return rgba
+
+
+def _encode(image: Any, resource: _Resource) -> None:
+    """Packs a (height, width, 3) RGB uint8 array into a resource"""
+    byte_width, offsets = _IMAGE_TYPES[resource.image_type]
+    pixels = numpy.frombuffer(resource.bytes, dtype=numpy.uint8).reshape(resource.height, resource.width, byte_width)
+
+    if offsets is not None:
+        pixels[...] = 255
+        for channel in range(3):
+            pixels[..., offsets[channel]] = image[..., channel]
+    else:
+        rgba = numpy.full((resource.height, resource.width, 4), 255, dtype=numpy.uint8)
+        rgba[..., :3] = image
+        target_format = "RGB565" if resource.image_type == _VC_IMAGE_RGB565 else "RGBA16"
+        convert.convert(
+            rgba.data.cast("B"),
+            "RGBA",
+            resource.width * 4,
+            resource.bytes,
+            target_format,  # type: ignore
+            resource.pitch,
+            (0, 0, resource.width, resource.height),
+        )
+
+
+def _transform(image: Any, transform: int) -> Any:
+    image = numpy.rot90(image, k=-(transform & 0x3))  # DISPMANX_ROTATE_90/180/270 turn clockwise
+    if transform & _DISPMANX_FLIP_HRIZ:
+        image = image[:, ::-1]
+    if transform & _DISPMANX_FLIP_VERT:
+        image = image[::-1]
+    return image
+
+
+def compose(device_id: Optional[int] = None) -> Any:
+    """Composite the elements shown on a simulated display
+
+    Elements are drawn from the lowest layer to the highest over a black
+    background, scaled from their source rectangle to their destination
+    rectangle (nearest neighbour), and blended using the alpha channel of their
+    resource and their opacity. Requires [NumPy][numpy].
+
+    Arguments:
+        device_id: The display's device ID, or `None` for the first display.
+
+    Returns:
+        A (height, width, 3) RGB [NumPy array][numpy.array] of the display's
+            current contents.
+    """
+    with _state.lock:
+        if device_id is None:
+            device_id = min(_state.displays)
+        width, height = _state.displays[device_id]
+        out = numpy.zeros((height, width, 3), dtype=numpy.float32)
+
+        elements = [element for element in _state.elements.values() if element.display == device_id]
+        for element in sorted(elements, key=lambda element: element.layer):  # Stable, so ties draw in add order
+            resource = _state.resources.get(element.resource)
+            x, y, dest_width, dest_height = element.dest_rect
+            if resource is None or dest_width <= 0 or dest_height <= 0:
+                continue
+
+            src_x, src_y, src_width, src_height = (value >> 16 for value in element.src_rect)
+            source = _decode(resource)[src_y : src_y + src_height, src_x : src_x + src_width]
+            source = _transform(source, element.transform)
+            if source.size == 0:
+                continue
+
+            # Nearest neighbour scaling, restricted to the part of the destination that's on the display
+            x0, y0, x1, y1 = max(x, 0), max(y, 0), min(x + dest_width, width), min(y + dest_height, height)
+            if x1 <= x0 or y1 <= y0:
+                continue
+            rows = (numpy.arange(y0, y1) - y) * source.shape[0] // dest_height
+            columns = (numpy.arange(x0, x1) - x) * source.shape[1] // dest_width
+            scaled = source[rows[:, None], columns[None, :]].astype(numpy.float32)
+
+            flags, opacity = element.alpha
+            if flags & _DISPMANX_FLAGS_ALPHA_FIXED_ALL_PIXELS:
+                alpha = numpy.float32(opacity / 255)
+            else:
+                alpha = scaled[..., 3:] * (opacity / 255 / 255)
+            region = out[y0:y1, x0:x1]
+            region += (scaled[..., :3] - region) * alpha
+
+        return out.round().astype(numpy.uint8)
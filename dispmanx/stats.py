@@ -0,0 +1,253 @@
+import bisect
+from collections import deque
+import itertools
+import math
+import time
+from typing import Any, Callable, NamedTuple, Optional
+
+from .exceptions import DispmanXError
+
+
+PHASES = ("render", "convert", "write", "submit", "python", "total")
+
+# Upper bounds in seconds of the histogram buckets (cumulative, like Prometheus histograms)
+HISTOGRAM_BUCKETS = (0.001, 0.002, 0.004, 0.008, 0.016, 0.033, 0.066, 0.1, 0.25, 0.5, 1.0, math.inf)
+
+DEFAULT_WINDOW = 120
+
+
+class FrameTiming(NamedTuple):
+    """Timings of a single update, passed to [FrameStats][dispmanx.FrameStats]
+    callbacks.
+
+    Not instantiated directly. All durations are in seconds.
+
+    Attributes:
+        timestamp float: When the update started, from
+            [time.perf_counter()][time.perf_counter].
+        render float: Time since the previous update returned, ie spent
+            rendering this frame. `0.0` for the first frame.
+        convert float: Time spent packing a staging buffer.
+        write float: Time spent in `vc_dispmanx_resource_write_data`.
+        submit float: Time spent submitting the update and waiting for it to
+            complete.
+        python float: The rest of the time spent in the update.
+        total float: Total time spent in the update.
+        interval float: Time since the previous update started. `0.0` for the
+            first frame.
+        bytes_uploaded int: Number of bytes transferred to video memory.
+        late bool: Whether `interval` exceeded the frame budget set by
+            `target_fps`.
+    """
+
+    timestamp: float
+    render: float
+    convert: float
+    write: float
+    submit: float
+    python: float
+    total: float
+    interval: float
+    bytes_uploaded: int
+    late: bool
+
+
+class FrameRecord:
+    # Internal object, not publicly exposed. The phases of one update in progress, kept per update so that several
+    # update_async() calls in flight don't mix up each other's timings.
+    __slots__ = ("start", "convert", "write", "upload_end")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.convert = self.write = 0.0
+        self.upload_end: Optional[float] = None
+
+
+class FrameStats:
+    _callbacks: list[Callable[[FrameTiming], Any]]
+    _histograms: dict[str, list[int]]
+    _last_end: Optional[float]
+    _last_start: Optional[float]
+    _windows: dict[str, "deque[float]"]
+
+    def __init__(
+        self,
+        window: int = DEFAULT_WINDOW,
+        target_fps: Optional[float] = None,
+        callback: Optional[Callable[[FrameTiming], Any]] = None,
+    ):
+        """The FrameStats Class
+
+        Times each phase of every [update()][dispmanx.DispmanX.update] (or
+        [update_async()][dispmanx.DispmanX.update_async]) of the
+        [DispmanX][dispmanx.DispmanX] object it's passed to, which makes it
+        available as its `stats` attribute.
+
+        ```python
+        from dispmanx import DispmanX, FrameStats
+
+        display = DispmanX(stats=FrameStats(target_fps=30, callback=exporter.observe))
+        ...
+        print(display.stats.fps, display.stats.percentile("write", 95))
+        ```
+
+        Phases are `"render"`, `"convert"`, `"write"`, `"submit"`,
+        `"python"` and `"total"`, as described in
+        [FrameTiming][dispmanx.stats.FrameTiming]. Objects created without
+        stats aren't instrumented at all, so they don't pay for it.
+
+        Arguments:
+            window: Number of recent frames kept for percentiles and frame
+                rate.
+            target_fps: Frame rate used to count late frames. If `None`, no
+                frames are counted as late.
+            callback: Function called with a
+                [FrameTiming][dispmanx.stats.FrameTiming] after each update,
+                for example to forward it to a metrics exporter. More can be
+                added with [add_callback()][dispmanx.FrameStats.add_callback].
+
+        Raises:
+            DispmanXError: Raised if `window` is less than 2.
+
+        Attributes:
+            frames int: Number of updates timed.
+            bytes_uploaded int: Total bytes transferred to video memory.
+            late_frames int: Number of updates that started later than the
+                frame budget set by `target_fps` after the previous one.
+            fps float: Frame rate over the recent window, or `None` if fewer
+                than two frames were timed.
+            last FrameTiming: Timings of the most recent update, or `None`.
+            target_fps float: As above.
+        """
+        if window < 2:
+            raise DispmanXError(f"Invalid stats window: {window}")
+        self.target_fps = target_fps
+        self._window = window
+        self._callbacks = [] if callback is None else [callback]
+        self.reset()
+
+    def __repr__(self):
+        fps = "n/a" if self.fps is None else f"{self.fps:.1f}"
+        return f"<{self.__class__.__name__} {self.frames} frame(s), {fps} fps, {self.late_frames} late>"
+
+    def reset(self) -> None:
+        """Forget all timings"""
+        self.frames = self.bytes_uploaded = self.late_frames = 0
+        self.last: Optional[FrameTiming] = None
+        self._windows = {phase: deque(maxlen=self._window) for phase in PHASES + ("timestamp",)}
+        self._histograms = {phase: [0] * len(HISTOGRAM_BUCKETS) for phase in PHASES}
+        self._last_start = self._last_end = None
+
+    def add_callback(self, callback: Callable[[FrameTiming], Any]) -> None:
+        """Call a function with a [FrameTiming][dispmanx.stats.FrameTiming]
+        after each update
+
+        Arguments:
+            callback: The function to call.
+        """
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback: Callable[[FrameTiming], Any]) -> None:
+        """Stop calling a function added with
+        [add_callback()][dispmanx.FrameStats.add_callback]
+
+        Arguments:
+            callback: The function to stop calling.
+        """
+        self._callbacks.remove(callback)
+
+    @property
+    def fps(self) -> Optional[float]:
+        timestamps = self._windows["timestamp"]
+        if len(timestamps) < 2 or timestamps[-1] == timestamps[0]:
+            return None
+        return (len(timestamps) - 1) / (timestamps[-1] - timestamps[0])
+
+    def percentile(self, phase: str, percent: float) -> Optional[float]:
+        """Get a percentile of a phase's duration over the recent window
+
+        Arguments:
+            phase: One of `"render"`, `"convert"`, `"write"`, `"submit"`,
+                `"python"` or `"total"`.
+            percent: The percentile, from 0 to 100.
+
+        Returns:
+            The duration in seconds (nearest rank), or `None` if no frames were
+                timed.
+        """
+        values = sorted(self._windows[phase])
+        if not values:
+            return None
+        return values[max(math.ceil(percent / 100 * len(values)) - 1, 0)]
+
+    def histogram(self, phase: str) -> dict[float, int]:
+        """Get a histogram of a phase's duration over all frames timed
+
+        Arguments:
+            phase: As in [percentile()][dispmanx.FrameStats.percentile].
+
+        Returns:
+            A mapping of each bucket's upper bound in seconds to the number of
+                frames that took at most that long (cumulative). The last bound
+                is [math.inf][].
+        """
+        return dict(zip(HISTOGRAM_BUCKETS, itertools.accumulate(self._histograms[phase])))
+
+    def summary(self) -> dict[str, Any]:
+        """Get a JSON serializable summary of these stats
+
+        Returns:
+            A dictionary with `frames`, `bytes_uploaded`, `late_frames` and
+                `fps`, and the mean, 50th, 95th and 99th percentile and maximum
+                of each phase in milliseconds over the recent window.
+        """
+        summary: dict[str, Any] = {
+            "frames": self.frames,
+            "bytes_uploaded": self.bytes_uploaded,
+            "late_frames": self.late_frames,
+            "fps": self.fps,
+        }
+        for phase in PHASES:
+            values = self._windows[phase]
+            if values:
+                summary[phase] = {
+                    "mean_ms": sum(values) / len(values) * 1000,
+                    **{f"p{p}_ms": self.percentile(phase, p) * 1000 for p in (50, 95, 99)},  # type: ignore
+                    "max_ms": max(values) * 1000,
+                }
+        return summary
+
+    def _start_frame(self) -> FrameRecord:
+        return FrameRecord()
+
+    def _end_frame(self, frame: FrameRecord, bytes_uploaded: int) -> None:
+        start, end = frame.start, time.perf_counter()
+        total = end - start
+        submit = 0.0 if frame.upload_end is None else end - frame.upload_end
+        interval = 0.0 if self._last_start is None else start - self._last_start
+        timing = FrameTiming(
+            timestamp=start,
+            render=0.0 if self._last_end is None else max(start - self._last_end, 0.0),  # Overlapping async updates
+            convert=frame.convert,
+            write=frame.write,
+            submit=submit,
+            python=max(total - frame.convert - frame.write - submit, 0.0),
+            total=total,
+            interval=interval,
+            bytes_uploaded=bytes_uploaded,
+            late=bool(self.target_fps and interval > 1 / self.target_fps),
+        )
+        self._last_start, self._last_end = start, end
+
+        self.frames += 1
+        self.bytes_uploaded += bytes_uploaded
+        self.late_frames += timing.late
+        self.last = timing
+        self._windows["timestamp"].append(start)
+        for phase in PHASES:
+            value = getattr(timing, phase)
+            self._windows[phase].append(value)
+            self._histograms[phase][bisect.bisect_left(HISTOGRAM_BUCKETS, value)] += 1
+
+        for callback in self._callbacks:
+            callback(timing)
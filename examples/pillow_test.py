@@ -1,18 +1,19 @@
-import time
 from random import randint
-import numpy
 from PIL import Image, ImageDraw
 from dispmanx import DispmanX
 
 def random_color_with_alpha():
     return tuple(randint(0, 0xFF) for _ in range(3)) + (randint(0x44, 0xFF),)
 
-display = DispmanX(pixel_format="RGBA", buffer_type="numpy")
+display = DispmanX(pixel_format="RGBA", buffer_type="external")
 image = Image.new(mode=display.pixel_format, size=display.size)
 draw = ImageDraw.Draw(image)
+pixels = bytearray(display.pitch * display.size.height)
+display.attach_buffer(pixels)  # Attached once, update() uploads straight from it
 
-for _ in range(20):
+def render(display):
     draw.rectangle(((0, 0), (image.size)), fill=random_color_with_alpha())
-    numpy.copyto(display.buffer, image)
-    display.update()
-    time.sleep(0.5)
+    # Pillow can't draw into outside memory, so each frame is still copied out of the image
+    pixels[:] = image.tobytes()
+
+display.run(render, fps=2, frames=20)
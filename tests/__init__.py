@@ -0,0 +1,5 @@
+import os
+
+
+# The tests run against the simulated library, so they don't need a Raspberry Pi
+os.environ.setdefault("DISPMANX_BACKEND", "sim")
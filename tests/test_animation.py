@@ -0,0 +1,58 @@
+import time
+import unittest
+from unittest import mock
+
+from dispmanx import Animator, DispmanX, sim
+from dispmanx.dispmanx import Rect
+
+
+class AnimatorTest(unittest.TestCase):
+    def setUp(self):
+        sim.reset()
+        sim.configure(displays={2: (40, 20)}, latency=0, refresh_rate=100)
+        DispmanX.refresh_displays()
+        self.display = DispmanX(pixel_format="RGB", rect=(0, 0, 10, 10))
+
+    def tearDown(self):
+        self.display.destroy()
+        sim.reset()
+        DispmanX.refresh_displays()
+
+    def count_steps(self, animator, timeout=None):
+        with mock.patch.object(animator, "_step", wraps=animator._step) as step:
+            start = time.monotonic()
+            animator.run(timeout=timeout)
+            return step.call_count, time.monotonic() - start
+
+    def test_run_sleeps_between_frames(self):
+        # The sim's submits return immediately, so without pacing this would spin
+        animator = Animator()
+        animator.animate(self.display, 0.25, opacity=0, easing="linear")
+        steps, elapsed = self.count_steps(animator)
+        self.assertEqual(self.display.opacity, 0)
+        self.assertGreaterEqual(elapsed, 0.25)
+        self.assertLessEqual(steps, 0.4 * 60)
+
+    def test_run_follows_vsync_callback(self):
+        self.display.wait_vsync(timeout=1)
+        self.display.wait_vsync(timeout=1)  # Two, so the refresh rate is measured
+        animator = Animator()
+        animator.animate(self.display, 0.3, dest_rect=(30, 10, 10, 10), easing="linear")
+        count = self.display.vsync_count
+        steps, elapsed = self.count_steps(animator)
+        self.assertEqual(self.display.dest_rect, Rect(30, 10, 10, 10))
+        self.assertGreater(steps, 0.3 * 60)  # 100Hz, faster than the fallback
+        self.assertLessEqual(steps, self.display.vsync_count - count + 1)
+
+    def test_run_during_delay(self):
+        animator = Animator()
+        animator.animate(self.display, 0.05, delay=0.2, opacity=128)
+        steps, elapsed = self.count_steps(animator, timeout=0.15)
+        self.assertEqual(self.display.opacity, 255)  # Still delayed
+        self.assertLessEqual(steps, 0.15 * 60 + 1)
+        self.assertGreaterEqual(elapsed, 0.15)
+        self.assertLess(elapsed, 0.3)
+
+
+if __name__ == "__main__":
+    unittest.main()
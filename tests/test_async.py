@@ -0,0 +1,69 @@
+import asyncio
+import time
+import unittest
+
+from dispmanx import DispmanX, DispmanXError, Screen, sim
+
+
+class UpdateAsyncTest(unittest.TestCase):
+    def setUp(self):
+        sim.reset()
+        sim.configure(latency=0.1)
+
+    def tearDown(self):
+        sim.reset()
+
+    def test_loop_runs_while_update_is_pending(self):
+        display = DispmanX(pixel_format="RGB", render_size=(4, 4))
+        ticks = []
+
+        async def tick():
+            while True:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        async def main():
+            ticker = asyncio.create_task(tick())
+            display.buffer[:] = 90
+            stats = await display.update_async()
+            ticker.cancel()
+            return stats
+
+        stats = asyncio.run(main())
+        self.assertEqual(stats.bytes_uploaded, 4 * 4 * 3)
+        self.assertGreater(len(ticks), 3)
+        self.assertEqual(tuple(sim.compose()[0, 0]), (90, 90, 90))
+        display.destroy()
+
+    def test_updates_in_flight_are_limited(self):
+        display = DispmanX(pixel_format="RGB", render_size=(4, 4), buffers=3, max_updates_in_flight=2)
+
+        async def main():
+            start = time.monotonic()
+            await asyncio.gather(*(display.update_async() for _ in range(4)))
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(main())
+        self.assertGreaterEqual(elapsed, 0.18)  # Two at a time, in two rounds of the simulated latency
+        self.assertLess(elapsed, 0.35)
+        display.destroy()
+
+    def test_invalid_in_flight_limit(self):
+        with self.assertRaises(DispmanXError):
+            DispmanX(render_size=(4, 4), buffers=2, max_updates_in_flight=2)
+
+    def test_not_allowed_in_screen_frame(self):
+        screen = Screen()
+        layer = screen.create_layer(render_size=(4, 4))
+
+        async def main():
+            with screen.frame():
+                await layer.update_async()
+
+        with self.assertRaises(DispmanXError):
+            asyncio.run(main())
+        screen.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from dispmanx import DispmanX, sim
+from dispmanx.dispmanx import Rect
+
+
+class BufferRingTest(unittest.TestCase):
+    def setUp(self):
+        sim.reset()
+
+    def resource_bytes(self, display):
+        return [bytes(sim._state.resources[handle].bytes) for handle in display._video_resource_handles]
+
+    def test_skipped_resources_catch_up(self):
+        for buffers in (2, 3):
+            with self.subTest(buffers=buffers):
+                display = DispmanX(pixel_format="RGB", render_size=(16, 16), buffers=buffers)
+                for _ in range(buffers):
+                    display.update()  # Every resource starts with the whole frame
+
+                # Disjoint rectangles, so each resource misses the ones uploaded to the others
+                rects = [Rect(x, y, 4, 4) for y in (0, 8) for x in (0, 4, 8, 12)]
+                for i, rect in enumerate(rects):
+                    display.buffer[rect.y : rect.y + rect.height, rect.x : rect.x + rect.width] = (i + 1) * 20
+                    uploaded = display.update(rects=[rect]).rects
+                    # Along with the new rectangle, the ones uploaded to the other resources since this one was last
+                    for expected in rects[max(i - buffers + 1, 0) : i + 1]:
+                        self.assertTrue(any(DispmanX._contains_rect(other, expected) for other in uploaded))
+                    if i >= buffers:  # But not one this resource already has
+                        self.assertFalse(any(DispmanX._contains_rect(other, rects[i - buffers]) for other in uploaded))
+
+                # One more write to every resource brings them all up to date
+                for _ in range(buffers):
+                    display.update(rects=[(0, 0, 1, 1)])
+                expected = display.buffer.tobytes()
+                self.assertEqual(self.resource_bytes(display), [expected] * buffers)
+                display.destroy()
+
+
+if __name__ == "__main__":
+    unittest.main()
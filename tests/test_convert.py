@@ -0,0 +1,90 @@
+import os
+import unittest
+
+from dispmanx import convert
+
+
+# Two pixels as (red, green, blue, alpha). The second is at x = 1, where the first row of the dithering matrix adds
+# half a step.
+PIXELS = ((0xFF, 0x80, 0x40, 0x20), (0x7C, 0x82, 0x86, 0x88))
+
+EXPECTED = {
+    # (target format, source has alpha, dither): packed bytes, little endian
+    ("RGB565", True, False): bytes([0x08, 0xFC, 0x10, 0x7C]),
+    ("RGB565", True, True): bytes([0x08, 0xFC, 0x31, 0x84]),
+    ("RGBA16", True, False): bytes([0x42, 0xF8, 0x88, 0x78]),
+    ("RGBA16", True, True): bytes([0x42, 0xF8, 0x89, 0x88]),
+    ("RGBA16", False, False): bytes([0x4F, 0xF8, 0x8F, 0x78]),  # Opaque, whatever's in the X byte
+    ("RGBA16", False, True): bytes([0x4F, 0xF8, 0x8F, 0x88]),
+    ("RGB", True, False): bytes([0xFF, 0x80, 0x40, 0x7C, 0x82, 0x86]),
+    ("RGB", True, True): bytes([0xFF, 0x80, 0x40, 0x7C, 0x82, 0x86]),  # Nothing to quantize
+}
+
+
+def staging_pixels(src_format, pixels):
+    red, green, blue, alpha = convert.STAGING_FORMATS[src_format]
+    data = bytearray()
+    for pixel in pixels:
+        packed = bytearray(4)
+        packed[red], packed[green], packed[blue] = pixel[:3]
+        packed[alpha if alpha is not None else 6 - red - green - blue] = pixel[3]  # Or the X byte, whichever is left
+        data += packed
+    return data
+
+
+class ConvertTest(unittest.TestCase):
+    def convert(self, src_format, dst_format, src, width, height, rect, dither, use_numpy, src_pitch, dst_pitch):
+        dst = bytearray(dst_pitch * height)
+        convert.convert(
+            memoryview(src),
+            src_format,
+            src_pitch,
+            memoryview(dst),
+            dst_format,
+            dst_pitch,
+            rect,
+            dither=dither,
+            band_rows=4,
+            use_numpy=use_numpy,
+        )
+        return bytes(dst)
+
+    def test_expected_bytes(self):
+        for src_format in convert.STAGING_FORMATS:
+            has_alpha = convert.STAGING_FORMATS[src_format][3] is not None
+            src = staging_pixels(src_format, PIXELS)
+            for dst_format in convert.TARGET_BYTE_WIDTHS:
+                for dither in (False, True):
+                    expected = EXPECTED.get((dst_format, has_alpha, dither)) or EXPECTED[(dst_format, True, dither)]
+                    for use_numpy in (False, True):
+                        with self.subTest(src_format=src_format, dst_format=dst_format, dither=dither, numpy=use_numpy):
+                            dst_pitch = 2 * convert.TARGET_BYTE_WIDTHS[dst_format]
+                            dst = self.convert(
+                                src_format, dst_format, src, 2, 1, (0, 0, 2, 1), dither, use_numpy, 8, dst_pitch
+                            )
+                            self.assertEqual(dst, expected)
+
+    def test_numpy_matches_pure_python(self):
+        width, height, rect = 37, 9, (3, 2, 30, 6)
+        src_pitch = width * 4 + 8  # Padded rows
+        src = os.urandom(src_pitch * height)
+        for src_format in convert.STAGING_FORMATS:
+            for dst_format, byte_width in convert.TARGET_BYTE_WIDTHS.items():
+                for dither in (False, True):
+                    with self.subTest(src_format=src_format, dst_format=dst_format, dither=dither):
+                        dst_pitch = width * byte_width + 6
+                        args = (src_format, dst_format, src, width, height, rect, dither)
+                        packed = self.convert(*args, True, src_pitch, dst_pitch)
+                        self.assertEqual(packed, self.convert(*args, False, src_pitch, dst_pitch))
+
+                        # Nothing outside the rectangle is written
+                        x, y, rect_width, rect_height = rect
+                        for row in range(height):
+                            line = packed[row * dst_pitch : (row + 1) * dst_pitch]
+                            if y <= row < y + rect_height:
+                                line = line[: x * byte_width] + line[(x + rect_width) * byte_width :]
+                            self.assertFalse(any(line))
+
+
+if __name__ == "__main__":
+    unittest.main()
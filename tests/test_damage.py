@@ -0,0 +1,53 @@
+import unittest
+
+from dispmanx import DispmanX, damage, sim
+from dispmanx.dispmanx import Rect
+
+
+class DamageTrackingTest(unittest.TestCase):
+    def setUp(self):
+        sim.reset()
+        sim.configure(displays={2: (128, 128)})  # So the buffer isn't scaled
+        DispmanX.refresh_displays()
+
+    def tearDown(self):
+        sim.reset()
+        DispmanX.refresh_displays()
+
+    def test_auto_uploads_changed_tiles(self):
+        display = DispmanX(pixel_format="RGB", damage_tracking="auto", damage_tile_size=32)
+        self.assertEqual(display.update().rects, (Rect(0, 0, 128, 128),))  # The first upload is always whole
+        self.assertEqual(display.update().rects, ())
+
+        display.buffer[40:50, 70:80] = 255
+        self.assertEqual(display.update().rects, (Rect(64, 32, 32, 32),))
+        self.assertEqual(tuple(sim.compose()[45, 75]), (255, 255, 255))
+        self.assertEqual(display.update().rects, ())
+        display.destroy()
+
+    def test_manual_uploads_marked_regions(self):
+        display = DispmanX(pixel_format="RGB", damage_tracking="manual")
+        display.buffer[:] = 10
+        display.mark_damaged((0, 0, 128, 128))
+        display.update()
+
+        display.buffer[:] = 20
+        display.mark_damaged((8, 8, 4, 4), (200, 200, 4, 4))  # The second is clipped away
+        stats = display.update()
+        self.assertEqual(stats.rects, (Rect(8, 8, 4, 4),))
+        self.assertEqual(tuple(sim.compose()[9, 9]), (20, 20, 20))
+        self.assertEqual(tuple(sim.compose()[0, 0]), (10, 10, 10))  # Drawn to, but not marked
+        display.destroy()
+
+    def test_merge_rects_limits_count(self):
+        rects = [(x * 10, 0, 5, 5) for x in range(20)]
+        merged = damage.merge_rects(rects, 4)
+        self.assertLessEqual(len(merged), 4)
+        for x, y, width, height in rects:
+            self.assertTrue(
+                any(mx <= x and x + width <= mx + mw and my <= y and y + height <= my + mh for mx, my, mw, mh in merged)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
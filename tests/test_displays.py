@@ -0,0 +1,56 @@
+import threading
+import unittest
+from unittest import mock
+
+from dispmanx import DispmanX, DispmanXError, bcm_host, sim
+from dispmanx.dispmanx import Size
+
+
+class DisplayListTest(unittest.TestCase):
+    def setUp(self):
+        sim.reset()
+        DispmanX.refresh_displays()
+
+    def tearDown(self):
+        sim.reset()
+        DispmanX.refresh_displays()
+
+    def test_list_is_cached(self):
+        with mock.patch.object(
+            bcm_host, "vc_tv_get_attached_devices", wraps=bcm_host.vc_tv_get_attached_devices
+        ) as get_attached:
+            displays = DispmanX.list_displays()
+            self.assertEqual(DispmanX.list_displays(), displays)
+            self.assertEqual(get_attached.call_count, 0)
+            DispmanX.refresh_displays()
+            self.assertEqual(get_attached.call_count, 1)
+        self.assertEqual([(display.device_id, display.size) for display in displays], [(2, Size(1920, 1080))])
+
+    def test_hotplug_refreshes_and_notifies(self):
+        changed = threading.Event()
+        seen = []
+
+        def callback(displays):
+            seen.append(displays)
+            changed.set()
+
+        DispmanX.add_display_change_callback(callback)
+        try:
+            sim.configure(displays={2: (1920, 1080), 7: (800, 600)})
+            self.assertTrue(changed.wait(5))
+        finally:
+            DispmanX.remove_display_change_callback(callback)
+        self.assertEqual([display.device_id for display in seen[0]], [2, 7])
+        self.assertEqual([display.device_id for display in DispmanX.list_displays()], [2, 7])
+
+        display = DispmanX(display=7, render_size=(4, 4))
+        self.assertEqual(display.display.size, Size(800, 600))
+        display.destroy()
+
+    def test_missing_display(self):
+        with self.assertRaises(DispmanXError):
+            DispmanX(display=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
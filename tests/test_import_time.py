@@ -0,0 +1,16 @@
+import unittest
+
+from dispmanx import bench
+
+
+class ImportTimeTest(unittest.TestCase):
+    def test_import_is_within_budget(self):
+        result = bench.benchmark_import()
+        self.assertLessEqual(result["import_ms"], bench.DEFAULT_IMPORT_BUDGET_MS)
+
+    def test_import_does_not_load_library(self):
+        self.assertFalse(bench.benchmark_import(repeat=1)["library_loaded"])
+
+
+if __name__ == "__main__":
+    unittest.main()
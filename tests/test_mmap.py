@@ -0,0 +1,52 @@
+import unittest
+
+from dispmanx import DispmanX, DispmanXError, sim
+
+
+class MmapBufferTest(unittest.TestCase):
+    def setUp(self):
+        sim.reset()
+        sim.configure(displays={2: (30, 10)})
+        DispmanX.refresh_displays()
+
+    def tearDown(self):
+        sim.reset()
+        DispmanX.refresh_displays()
+
+    def test_pitch_alignment(self):
+        for kwargs, pitch in (
+            ({}, 90),
+            ({"buffer_type": "mmap"}, 128),  # 30 RGB pixels padded to DEFAULT_MMAP_PITCH_ALIGNMENT
+            ({"buffer_type": "mmap", "pitch_alignment": 32}, 96),
+            ({"pitch_alignment": 16}, 96),
+        ):
+            with self.subTest(**kwargs):
+                display = DispmanX(pixel_format="RGB", **kwargs)
+                self.assertEqual(display.pitch, pitch)
+                self.assertEqual(display.buffer.shape, (10, 30, 3))
+                self.assertEqual(display.buffer.strides, (pitch, 3, 1))
+                display.destroy()
+
+    def test_upload_skips_padding(self):
+        display = DispmanX(pixel_format="RGB", buffer_type="mmap", hugepages=True)
+        self.assertEqual(display.buffer_type, "mmap")
+        display.buffer[:] = (10, 20, 30)
+        display.buffer[9, 29] = (255, 0, 0)
+        display.update()
+        image = sim.compose()
+        self.assertEqual(image.shape, (10, 30, 3))
+        self.assertEqual(tuple(image[0, 0]), (10, 20, 30))
+        self.assertEqual(tuple(image[9, 28]), (10, 20, 30))
+        self.assertEqual(tuple(image[9, 29]), (255, 0, 0))
+        display.destroy()
+
+    def test_invalid(self):
+        with self.assertRaisesRegex(DispmanXError, "Invalid pitch alignment"):
+            DispmanX(buffer_type="mmap", pitch_alignment=0)
+        for kwargs in ({"hugepages": True}, {"lock_memory": True}):
+            with self.subTest(**kwargs), self.assertRaisesRegex(DispmanXError, "require"):
+                DispmanX(buffer_type="numpy", **kwargs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+from dispmanx import DispmanX, DispmanXError, sim
+from dispmanx.dispmanx import Rect, Size
+
+
+class OverlayTest(unittest.TestCase):
+    def setUp(self):
+        sim.reset()
+        sim.configure(displays={2: (40, 20)})
+        DispmanX.refresh_displays()
+
+    def tearDown(self):
+        sim.reset()
+        DispmanX.refresh_displays()
+
+    def draw(self, display, color=(200, 100, 50)):
+        display.buffer[:] = color
+        display.update()
+
+    def test_window(self):
+        display = DispmanX(pixel_format="RGB", rect=(5, 4, 10, 6))
+        self.assertEqual(
+            (display.size, display.rect, display.dest_rect), (Size(10, 6), Rect(5, 4, 10, 6), Rect(5, 4, 10, 6))
+        )
+        self.draw(display)
+        image = sim.compose()
+        self.assertEqual(tuple(image[4, 5]), (200, 100, 50))
+        self.assertEqual(tuple(image[9, 14]), (200, 100, 50))
+        self.assertEqual(tuple(image[3, 5]), (0, 0, 0))
+        self.assertEqual(tuple(image[4, 15]), (0, 0, 0))
+        display.destroy()
+
+    def test_move_to(self):
+        display = DispmanX(pixel_format="RGB", rect=(0, 0, 4, 4))
+        self.draw(display)
+        buffer = display.buffer
+        display.move_to(30, 10)
+        self.assertIs(display.buffer, buffer)  # Nothing reallocated or uploaded again
+        self.assertEqual(display.rect, Rect(30, 10, 4, 4))
+        image = sim.compose()
+        self.assertEqual(tuple(image[0, 0]), (0, 0, 0))
+        self.assertEqual(tuple(image[12, 32]), (200, 100, 50))
+        display.destroy()
+
+    def test_resize(self):
+        display = DispmanX(pixel_format="RGB", rect=(0, 0, 4, 4))
+        display.resize(8, 6)  # The buffer follows the window's size
+        self.assertEqual((display.size, display.rect), (Size(8, 6), Rect(0, 0, 8, 6)))
+        self.draw(display)
+        self.assertEqual(tuple(sim.compose()[5, 7]), (200, 100, 50))
+        display.destroy()
+
+        display = DispmanX(pixel_format="RGB", rect=(0, 0, 4, 4), render_size=(2, 2))
+        self.draw(display)
+        buffer = display.buffer
+        display.resize(10, 10)  # The hardware scales the same buffer
+        self.assertIs(display.buffer, buffer)
+        self.assertEqual((display.size, display.dest_rect), (Size(2, 2), Rect(0, 0, 10, 10)))
+        self.assertEqual(tuple(sim.compose()[9, 9]), (200, 100, 50))
+        display.destroy()
+
+    def test_invalid(self):
+        with self.assertRaises(DispmanXError):
+            DispmanX(rect=(0, 0, 0, 10))
+        display = DispmanX(rect=(0, 0, 4, 4))
+        with self.assertRaises(DispmanXError):
+            display.resize(-1, 4)
+        display.destroy()
+
+
+if __name__ == "__main__":
+    unittest.main()
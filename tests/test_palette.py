@@ -0,0 +1,88 @@
+import unittest
+from unittest import mock
+
+import numpy
+
+from dispmanx import DispmanX, DispmanXError, palette, sim
+
+
+class PaletteTest(unittest.TestCase):
+    def test_pack_palette(self):
+        # Little-endian 0xAARRGGBB
+        self.assertEqual(
+            palette.pack_palette([(0x11, 0x22, 0x33, 0x44), (1, 2, 3, 255)]), bytes.fromhex("33221144030201ff")
+        )
+
+    def test_default_palette(self):
+        colors = palette.default_palette()
+        self.assertEqual(len(colors), 256)
+        self.assertEqual(colors[0b11100000], (255, 0, 0, 255))
+        self.assertEqual(colors[0b00011100], (0, 255, 0, 255))
+        self.assertEqual(colors[0b00000011], (0, 0, 255, 255))
+
+    def test_normalize_palette(self):
+        self.assertEqual(palette.normalize_palette([(1, 2, 3), [4, 5, 6, 7]]), [(1, 2, 3, 255), (4, 5, 6, 7)])
+        with self.assertRaises(DispmanXError):
+            palette.normalize_palette([(256, 0, 0)])
+
+    def test_quantize(self):
+        colors = [(0, 0, 0, 0), (255, 255, 255), (255, 0, 0)]
+        src = numpy.array([[(255, 255, 255, 255), (250, 10, 5, 255), (255, 255, 255, 0), (0, 0, 0, 255)]], numpy.uint8)
+        # Transparent pixels go to the transparent color, and opaque ones never do
+        numpy.testing.assert_array_equal(palette.quantize(src, colors), [[1, 2, 0, 2]])
+
+        argb = src[..., [3, 0, 1, 2]]
+        out = numpy.zeros((1, 4), dtype=numpy.uint8)
+        self.assertIs(palette.quantize(argb, colors, src_format="ARGB", out=out), out)
+        numpy.testing.assert_array_equal(out, [[1, 2, 0, 2]])
+        # Without alpha, transparency is ignored
+        numpy.testing.assert_array_equal(palette.quantize(src, colors, src_format="RGBX"), [[1, 2, 1, 2]])
+
+
+class EightBitTest(unittest.TestCase):
+    def setUp(self):
+        sim.reset()
+        sim.configure(displays={2: (16, 8)})  # So the buffer isn't scaled
+        DispmanX.refresh_displays()
+
+    def tearDown(self):
+        sim.reset()
+        DispmanX.refresh_displays()
+
+    def test_upload_and_set_palette(self):
+        display = DispmanX(pixel_format="8BPP", palette=[(0, 0, 0), (10, 20, 30)])
+        resource = sim._state.resources[display._video_resource_handles[0]]
+        self.assertEqual(bytes(resource.palette), palette.pack_palette(display.palette))
+
+        display.buffer[:, :8] = 1
+        display.buffer[:, 8:] = 0b11100000
+        display.update()
+        self.assertEqual(tuple(sim.compose()[0, 0]), (10, 20, 30))
+        self.assertEqual(tuple(sim.compose()[0, 15]), (255, 0, 0))
+
+        display.set_palette([(40, 50, 60)], offset=1)  # Shown without an update
+        self.assertEqual(bytes(resource.palette[4:8]), palette.pack_palette([(40, 50, 60, 255)]))
+        self.assertEqual(tuple(sim.compose()[0, 0]), (40, 50, 60))
+        display.destroy()
+
+    def test_staging_buffer_is_quantized(self):
+        display = DispmanX(pixel_format="8BPP", staging_format="RGBA", palette=[(0, 0, 0), (250, 250, 250)])
+        display.buffer[:] = (240, 255, 230, 255)
+        display.update()
+        self.assertEqual(tuple(sim.compose()[3, 3]), (250, 250, 250))
+        display.destroy()
+
+    def test_palette_tables_are_cached_per_object(self):
+        display = DispmanX(pixel_format="8BPP", staging_format="RGBA")
+        cycle = [[(i * 20, 0, 0)] for i in range(6)]  # More palettes than quantize() caches
+        with mock.patch.object(palette, "_build_lut", wraps=palette._build_lut) as build_lut:
+            for _ in range(3):
+                for colors in cycle:
+                    display.set_palette(colors, offset=1)
+                    display.update()
+        self.assertEqual(build_lut.call_count, len(cycle))
+        display.destroy()
+
+
+if __name__ == "__main__":
+    unittest.main()
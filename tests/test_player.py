@@ -0,0 +1,96 @@
+import os
+import tempfile
+import time
+import unittest
+
+from dispmanx import DispmanX, DispmanXError, sim
+
+
+FRAME_BYTES = 4 * 4 * 3
+
+
+def frame(value):
+    return bytes([value]) * FRAME_BYTES
+
+
+class PlayTest(unittest.TestCase):
+    def setUp(self):
+        sim.reset()
+        self.display = DispmanX(pixel_format="RGB", render_size=(4, 4))
+
+    def tearDown(self):
+        self.display.destroy()
+
+    def shown(self):
+        return tuple(sim.compose()[0, 0])
+
+    def test_iterable(self):
+        stats = self.display.play(frame(value) for value in (10, 20, 30))
+        self.assertEqual((stats.played, stats.dropped), (3, 0))
+        self.assertEqual(self.shown(), (30, 30, 30))
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "frames.rgb")
+            with open(path, "wb") as file:
+                file.write(frame(40) + frame(50))
+            self.assertEqual(self.display.play(path).played, 2)
+            self.assertEqual(self.shown(), (50, 50, 50))
+
+            with open(path, "ab") as file:
+                file.write(b"\0")
+            with self.assertRaises(DispmanXError):
+                self.display.play(path)
+
+    def test_pipe(self):
+        read, write = os.pipe()
+        with os.fdopen(read, "rb") as source:
+            with os.fdopen(write, "wb") as sink:
+                sink.write(frame(60) + frame(70))
+            self.assertEqual(self.display.play(source).played, 2)
+        self.assertEqual(self.shown(), (70, 70, 70))
+
+    def test_late_frames_are_dropped(self):
+        def frames():
+            yield frame(1)
+            time.sleep(0.2)  # Leaves the rest due at once
+            yield from (frame(value) for value in range(2, 12))
+
+        stats = self.display.play(frames(), fps=100, prefetch=16)
+        self.assertGreater(stats.dropped, 0)
+        self.assertEqual(stats.played + stats.dropped, 11)
+        self.assertEqual(self.shown(), (11, 11, 11))
+
+    def test_stops_without_waiting_on_a_blocked_reader(self):
+        read, write = os.pipe()
+        source = os.fdopen(read, "rb", buffering=0)
+        update = self.display.update
+
+        def failing_update(**kwargs):
+            update(**kwargs)
+            raise RuntimeError("Stop")
+
+        def frames():
+            yield frame(80)
+            source.read(1)  # Blocks until the pipe is written to
+
+        self.display.update = failing_update
+        start = time.monotonic()
+        with self.assertRaises(RuntimeError):
+            self.display.play(frames())
+        self.assertLess(time.monotonic() - start, 5)
+        del self.display.update
+
+        os.write(write, b"\0")  # Let the reader finish
+        os.close(write)
+        time.sleep(0.1)
+        source.close()
+
+    def test_invalid(self):
+        for kwargs in ({"fps": 0}, {"prefetch": 0}):
+            with self.subTest(**kwargs), self.assertRaises(DispmanXError):
+                self.display.play([], **kwargs)
+
+
+if __name__ == "__main__":
+    unittest.main()
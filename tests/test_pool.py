@@ -0,0 +1,72 @@
+import unittest
+
+from dispmanx import DispmanX, ResourcePool, sim
+
+
+class ResourcePoolTest(unittest.TestCase):
+    def setUp(self):
+        sim.reset()
+        self.pool = ResourcePool(max_resources=2)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def create(self, **kwargs):
+        kwargs.setdefault("pixel_format", "RGB")
+        kwargs.setdefault("render_size", (8, 8))
+        return DispmanX(pool=self.pool, **kwargs)
+
+    def test_hit(self):
+        display = self.create()
+        resource = display._video_resource_handles[0]
+        display.destroy()
+        self.assertEqual(self.pool.resources, 1)
+
+        display = self.create()
+        self.assertEqual(display._video_resource_handles[0], resource)
+        self.assertEqual(self.pool.resources, 0)
+        self.assertGreaterEqual(self.pool.hits, 1)
+        display.destroy()
+
+    def test_miss_on_different_format_or_size(self):
+        display = self.create()
+        resource = display._video_resource_handles[0]
+        display.destroy()
+
+        for kwargs in ({"pixel_format": "RGBA"}, {"render_size": (16, 8)}):
+            misses = self.pool.misses
+            display = self.create(**kwargs)
+            self.assertNotEqual(display._video_resource_handles[0], resource)
+            self.assertGreater(self.pool.misses, misses)
+            display.destroy()
+
+    def test_evicts_least_recently_returned(self):
+        displays = [self.create(render_size=(8, 8 + i)) for i in range(3)]
+        resources = [display._video_resource_handles[0] for display in displays]
+        for display in displays:
+            display.destroy()
+        self.assertEqual(self.pool.resources, 2)
+        self.assertNotIn(resources[0], sim._state.resources)
+        self.assertIn(resources[1], sim._state.resources)
+        self.assertIn(resources[2], sim._state.resources)
+
+        self.pool.clear()
+        self.assertEqual(self.pool.resources, 0)
+        self.assertFalse(set(resources) & set(sim._state.resources))
+
+    def test_reused_resource_is_cleared(self):
+        display = self.create()
+        display.buffer[:] = 200
+        display.update()
+        resource = display._video_resource_handles[0]
+        self.assertTrue(any(sim._state.resources[resource].bytes))
+        display.destroy()
+
+        display = self.create()
+        self.assertEqual(display._video_resource_handles[0], resource)
+        self.assertFalse(any(sim._state.resources[resource].bytes))
+        display.destroy()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from dispmanx import DispmanX, DispmanXError, sim
+from dispmanx.dispmanx import Rect, Size
+
+
+class ScalingTest(unittest.TestCase):
+    def setUp(self):
+        sim.reset()
+        DispmanX.refresh_displays()
+
+    def tearDown(self):
+        sim.reset()
+        DispmanX.refresh_displays()
+
+    def test_render_size_is_stretched(self):
+        display = DispmanX(render_size=(640, 480))
+        self.assertEqual(display.size, Size(640, 480))
+        self.assertEqual(display.dest_rect, Rect(0, 0, 1920, 1080))
+        display.destroy()
+
+    def test_letterbox(self):
+        for render_size, dest_rect in (
+            ((640, 480), Rect(240, 0, 1440, 1080)),  # Pillarboxed
+            ((1000, 250), Rect(0, 300, 1920, 480)),  # Letterboxed
+            ((320, 180), Rect(0, 0, 1920, 1080)),  # Same aspect ratio
+        ):
+            with self.subTest(render_size=render_size):
+                display = DispmanX(render_size=render_size, letterbox=True)
+                self.assertEqual(display.size, Size(*render_size))
+                self.assertEqual(display.dest_rect, dest_rect)
+                display.destroy()
+
+    def test_scale(self):
+        display = DispmanX(scale=0.25)
+        self.assertEqual(display.size, Size(480, 270))
+        self.assertEqual(display.dest_rect, Rect(0, 0, 1920, 1080))
+        display.destroy()
+
+    def test_invalid(self):
+        for kwargs in ({"scale": 0}, {"scale": 0.5, "render_size": (10, 10)}, {"render_size": (0, 10)}):
+            with self.subTest(**kwargs), self.assertRaises(DispmanXError):
+                DispmanX(**kwargs)
+
+    def test_composited_with_bars(self):
+        sim.configure(displays={2: (40, 20)})
+        DispmanX.refresh_displays()
+        display = DispmanX(pixel_format="RGB", render_size=(2, 2), letterbox=True)
+        display.buffer[:, 0] = (255, 0, 0)
+        display.buffer[:, 1] = (0, 0, 255)
+        display.update()
+        image = sim.compose()
+        self.assertEqual(display.dest_rect, Rect(10, 0, 20, 20))
+        self.assertEqual(tuple(image[10, 5]), (0, 0, 0))  # Bar
+        self.assertEqual(tuple(image[10, 12]), (255, 0, 0))
+        self.assertEqual(tuple(image[10, 27]), (0, 0, 255))
+        self.assertEqual(tuple(image[10, 35]), (0, 0, 0))
+        display.destroy()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from dispmanx import Screen, sim
+
+
+class ScreenFrameTest(unittest.TestCase):
+    def setUp(self):
+        sim.reset()
+        self.screen = Screen()
+
+    def tearDown(self):
+        self.screen.close()
+
+    def test_layers_are_double_buffered(self):
+        self.assertEqual(self.screen.create_layer(render_size=(4, 4)).buffers, 2)
+
+    def test_frame_is_shown_when_committed(self):
+        background = self.screen.create_layer(layer=1, pixel_format="RGB", render_size=(4, 4))
+        overlay = self.screen.create_layer(layer=2, pixel_format="RGBA", render_size=(4, 4))
+        with self.screen.frame():
+            background.buffer[:] = (200, 0, 0)
+            background.update()
+            self.assertEqual(tuple(sim.compose()[0, 0]), (0, 0, 0))
+            overlay.buffer[:] = (0, 0, 100, 255)
+            overlay.update()
+            self.assertEqual(tuple(sim.compose()[0, 0]), (0, 0, 0))
+        self.assertEqual(tuple(sim.compose()[0, 0]), (0, 0, 100))
+
+    def test_nested_frames_commit_once(self):
+        layer = self.screen.create_layer(pixel_format="RGB", render_size=(4, 4))
+        with self.screen.frame():
+            with self.screen.frame():
+                layer.buffer[:] = 50
+                layer.update()
+            self.assertEqual(tuple(sim.compose()[0, 0]), (0, 0, 0))
+        self.assertEqual(tuple(sim.compose()[0, 0]), (50, 50, 50))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from dispmanx import DispmanX, sim
+from dispmanx.server import FrameClient, FrameServer
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out")
+        time.sleep(0.005)
+
+
+class FrameServerTest(unittest.TestCase):
+    def setUp(self):
+        sim.reset()
+        sim.configure(displays={2: (64, 32)})  # So the buffer isn't scaled
+        DispmanX.refresh_displays()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "dispmanx.sock")
+        self.display = DispmanX(pixel_format="RGB")
+        self.server = FrameServer(self.display, self.path)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.close()
+        self.display.destroy()
+        self.directory.cleanup()
+        sim.reset()
+        DispmanX.refresh_displays()
+
+    def test_hello(self):
+        with FrameClient(self.path, timeout=5) as client:
+            self.assertEqual(client.size, (64, 32))
+            self.assertEqual(client.pixel_format, "RGB")
+            self.assertEqual(client.byte_width, 3)
+            wait_for(lambda: self.server.clients == 1)
+        wait_for(lambda: self.server.clients == 0)
+
+    def test_frame_and_patch(self):
+        with FrameClient(self.path, timeout=5) as client:
+            client.send(bytes([10]) * 64 * 32 * 3)
+            wait_for(lambda: self.server.updates >= 1 and tuple(sim.compose()[0, 0]) == (10, 10, 10))
+            client.send(bytes([200, 0, 0]) * 4 * 2, rect=(8, 4, 4, 2))
+            wait_for(lambda: tuple(sim.compose()[5, 11]) == (200, 0, 0))
+        self.assertEqual(tuple(sim.compose()[6, 11]), (10, 10, 10))
+        self.assertEqual(self.server.patches, 2)
+
+    def test_held_patches_are_shown_together(self):
+        with FrameClient(self.path, timeout=5) as client:
+            client.send(bytes([50]) * 3, rect=(0, 0, 1, 1), hold=True)
+            wait_for(lambda: self.server.patches == 1)
+            time.sleep(0.05)
+            self.assertEqual(self.server.updates, 0)
+            client.send(bytes([60]) * 3, rect=(1, 0, 1, 1))
+            wait_for(lambda: self.server.updates >= 1)
+            wait_for(lambda: tuple(sim.compose()[0, 1]) == (60, 60, 60))
+            self.assertEqual(tuple(sim.compose()[0, 0]), (50, 50, 50))
+
+    def test_patches_are_received_during_an_update(self):
+        sim.configure(latency=0.5)
+        with FrameClient(self.path, timeout=5) as client:
+            client.send(bytes([1]) * 3, rect=(0, 0, 1, 1))
+            wait_for(lambda: self.server.patches == 1)
+            time.sleep(0.1)  # The update is now waiting on the simulated latency
+            start = time.monotonic()
+            client.send(bytes([2]) * 3, rect=(1, 0, 1, 1))
+            wait_for(lambda: self.server.patches == 2)
+            self.assertLess(time.monotonic() - start, 0.3)
+            wait_for(lambda: tuple(sim.compose()[0, 1]) == (2, 2, 2))
+
+    def test_bad_header_disconnects(self):
+        errors = []
+        self.server.handle_error = lambda client, error: errors.append(error)
+        with FrameClient(self.path, timeout=5) as client:
+            client._sock.sendall(b"XX" + bytes(10))
+            wait_for(lambda: errors)
+        self.assertIn("Invalid patch header", str(errors[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
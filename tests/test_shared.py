@@ -0,0 +1,64 @@
+import time
+import unittest
+
+from dispmanx import DispmanX, DispmanXError, DispmanXRuntimeError, sim
+from dispmanx.shared import BandRenderer, split_bands
+
+
+def render_bands(band, frame):
+    band.buffer[:] = (band.number * 60, frame, 0)
+
+
+def render_slow_first_frame(band, frame):
+    if frame == 1 and band.number == 0:
+        time.sleep(1)
+    band.buffer[:] = (band.number * 60, frame, 0)
+
+
+def render_failing(band, frame):
+    if band.number == 1:
+        raise ValueError("Broken band")
+
+
+class SharedBufferTest(unittest.TestCase):
+    def setUp(self):
+        sim.reset()
+        self.display = DispmanX(pixel_format="RGB", render_size=(8, 10), buffer_type="shared")
+
+    def tearDown(self):
+        self.display.destroy()
+
+    def test_split_bands(self):
+        self.assertEqual(split_bands(10, 3), [(0, 3), (3, 3), (6, 4)])
+        self.assertEqual(split_bands(4, 4), [(0, 1), (1, 1), (2, 1), (3, 1)])
+
+    def test_workers_render_their_bands(self):
+        with BandRenderer(self.display, render_bands, workers=3) as renderer:
+            self.assertEqual(renderer.render(timeout=10), 1)
+            self.assertEqual(renderer.render(timeout=10), 2)
+        for number, (y, height) in enumerate(split_bands(10, 3)):
+            self.assertTrue((self.display.buffer[y : y + height] == (number * 60, 2, 0)).all())
+
+    def test_next_render_waits_out_a_timed_out_frame(self):
+        with BandRenderer(self.display, render_slow_first_frame, workers=2) as renderer:
+            with self.assertRaises(DispmanXRuntimeError):
+                renderer.render(timeout=0.2)
+            self.assertEqual(renderer.render(timeout=10), 2)
+        self.assertTrue((self.display.buffer[:5] == (0, 2, 0)).all())  # The slow band rendered frame 2 as well
+
+    def test_worker_errors_are_raised(self):
+        with BandRenderer(self.display, render_failing, workers=2) as renderer:
+            with self.assertRaisesRegex(DispmanXRuntimeError, "(?s)band 1.*Broken band"):
+                renderer.render(timeout=10)
+
+    def test_invalid(self):
+        with self.assertRaises(DispmanXError):
+            BandRenderer(DispmanX(render_size=(4, 4)), render_bands)
+        with self.assertRaises(DispmanXError):
+            BandRenderer(self.display, render_bands, workers=11)
+        with self.assertRaises(DispmanXError):
+            BandRenderer(self.display, render_bands, context="thread")
+
+
+if __name__ == "__main__":
+    unittest.main()
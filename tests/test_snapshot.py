@@ -0,0 +1,46 @@
+import ctypes
+import unittest
+
+import numpy
+
+from dispmanx import DispmanX, sim
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        sim.reset()
+        sim.configure(displays={2: (64, 32)})  # So the buffer isn't scaled
+        DispmanX.refresh_displays()
+        self.display = DispmanX(pixel_format="RGB")
+        ys, xs = numpy.mgrid[0:32, 0:64]
+        self.display.buffer[..., 0] = xs * 4
+        self.display.buffer[..., 1] = ys * 8
+        self.display.buffer[..., 2] = 7
+        self.display.update()
+
+    def tearDown(self):
+        self.display.destroy()
+        sim.reset()
+        DispmanX.refresh_displays()
+
+    def test_whole_display(self):
+        numpy.testing.assert_array_equal(self.display.snapshot(), self.display.buffer)
+
+    def test_offset_narrow_rect(self):
+        out = numpy.zeros((6, 10, 3), dtype=numpy.uint8)
+        self.assertIs(self.display.snapshot(out=out, rect=(5, 3, 10, 6)), out)
+        numpy.testing.assert_array_equal(out, self.display.buffer[3:9, 5:15])
+        self.assertEqual(tuple(out[0, 0]), (20, 24, 7))
+
+    def test_rect_is_clipped(self):
+        out = self.display.snapshot(rect=(60, 30, 10, 10))
+        numpy.testing.assert_array_equal(out, self.display.buffer[30:, 60:])
+
+    def test_full_width_band_into_ctypes(self):
+        out = (ctypes.c_uint8 * (64 * 4 * 3))()
+        self.display.snapshot(out=out, rect=(0, 10, 64, 4))
+        numpy.testing.assert_array_equal(numpy.frombuffer(out, dtype=numpy.uint8), self.display.buffer[10:14].ravel())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from unittest import mock
+
+from dispmanx import DispmanX, FrameStats, sim
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def perf_counter(self):
+        return self.now
+
+
+class FrameStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch("dispmanx.stats.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def add_frame(self, stats, convert, write, submit, render=0.0):
+        # One update with the given phase durations, starting after render seconds
+        self.clock.now += render
+        frame = stats._start_frame()
+        frame.convert, frame.write = convert, write
+        self.clock.now += convert + write
+        frame.upload_end = self.clock.now
+        self.clock.now += submit
+        stats._end_frame(frame, 1000)
+
+    def test_phases(self):
+        stats = FrameStats()
+        self.add_frame(stats, 0.002, 0.003, 0.010)
+        self.add_frame(stats, 0.001, 0.001, 0.005, render=0.020)
+        last = stats.last
+        self.assertEqual((stats.frames, stats.bytes_uploaded), (2, 2000))
+        self.assertAlmostEqual(last.render, 0.020)
+        self.assertAlmostEqual(last.submit, 0.005)
+        self.assertAlmostEqual(last.total, 0.007)
+        self.assertAlmostEqual(last.interval, 0.035)
+        self.assertAlmostEqual(last.python, 0.0)
+        self.assertAlmostEqual(stats.fps, 1 / 0.035)
+
+    def test_percentile_and_histogram(self):
+        stats = FrameStats(window=10)
+        for ms in range(1, 21):  # Only the last 10 are in the window
+            self.add_frame(stats, 0.0, ms / 1000, 0.0)
+        self.assertAlmostEqual(stats.percentile("write", 50), 0.015)
+        self.assertAlmostEqual(stats.percentile("write", 95), 0.020)
+        self.assertAlmostEqual(stats.percentile("write", 0), 0.011)
+
+        histogram = stats.histogram("write")  # Over every frame, cumulative
+        self.assertEqual(histogram[0.001], 1)
+        self.assertEqual(histogram[0.002], 2)
+        self.assertEqual(histogram[0.016], 16)
+        self.assertEqual(histogram[float("inf")], 20)
+        self.assertIsNone(FrameStats().percentile("write", 50))
+
+    def test_late_frames_and_callbacks(self):
+        timings = []
+        stats = FrameStats(target_fps=50, callback=timings.append)
+        self.add_frame(stats, 0.0, 0.001, 0.0)
+        self.add_frame(stats, 0.0, 0.001, 0.0, render=0.010)
+        self.add_frame(stats, 0.0, 0.001, 0.0, render=0.030)
+        self.assertEqual([timing.late for timing in timings], [False, False, True])
+        self.assertEqual(stats.late_frames, 1)
+        stats.reset()
+        self.assertEqual((stats.frames, stats.late_frames, stats.last), (0, 0, None))
+
+
+class UpdateStatsTest(unittest.TestCase):
+    def setUp(self):
+        sim.reset()
+
+    def test_updates_are_timed(self):
+        display = DispmanX(pixel_format="RGB565", staging_format="RGBA", render_size=(16, 8), stats=FrameStats())
+        display.update()
+        display.update(rects=[(0, 0, 16, 2)])
+        self.assertEqual(display.stats.frames, 2)
+        self.assertEqual(display.stats.bytes_uploaded, 16 * 2 * (8 + 2))  # Rows of packed RGB565
+        self.assertGreater(display.stats.last.convert, 0.0)
+        self.assertIsNone(DispmanX(render_size=(4, 4)).stats)
+        display.destroy()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from dispmanx import DispmanX, DispmanXError, sim
+from dispmanx.dispmanx import Rect, Size
+
+
+# Where the buffer's top left corner ends up on the 40x20 display
+CORNERS = {
+    "none": (0, 0),
+    "rotate_90": (0, 39),  # Clockwise
+    "rotate_180": (19, 39),
+    "rotate_270": (19, 0),
+    "flip_horizontal": (0, 39),
+    "flip_vertical": (19, 0),
+    "transpose": (0, 0),
+    "transverse": (19, 39),
+}
+
+
+class TransformTest(unittest.TestCase):
+    def setUp(self):
+        sim.reset()
+        sim.configure(displays={2: (40, 20)})
+        DispmanX.refresh_displays()
+
+    def tearDown(self):
+        sim.reset()
+        DispmanX.refresh_displays()
+
+    def draw_corner(self, display):
+        display.buffer[:] = 0
+        display.buffer[:2, :2] = (255, 0, 0)
+        display.update()
+
+    def test_transforms(self):
+        for transform, (y, x) in CORNERS.items():
+            with self.subTest(transform=transform):
+                display = DispmanX(pixel_format="RGB", transform=transform)
+                portrait = transform in ("rotate_90", "rotate_270", "transpose", "transverse")
+                self.assertEqual(display.size, Size(20, 40) if portrait else Size(40, 20))
+                self.assertEqual(display.dest_rect, Rect(0, 0, 40, 20))
+                self.draw_corner(display)
+                image = sim.compose()
+                self.assertEqual(tuple(image[y, x]), (255, 0, 0))
+                self.assertEqual(int(image.sum()), 4 * 255)
+                display.destroy()
+
+    def test_set_transform(self):
+        display = DispmanX(pixel_format="RGB")
+        buffer = display.buffer
+        display.set_transform("rotate_180")  # Same size, so only the element changes
+        self.assertIs(display.buffer, buffer)
+        self.draw_corner(display)
+        self.assertEqual(tuple(sim.compose()[19, 39]), (255, 0, 0))
+
+        display.set_transform("rotate_90")  # Portrait, so a new buffer
+        self.assertEqual((display.transform, display.size), ("rotate_90", Size(20, 40)))
+        self.draw_corner(display)
+        self.assertEqual(tuple(sim.compose()[0, 39]), (255, 0, 0))
+
+        with self.assertRaises(DispmanXError):
+            display.set_transform("rotate_45")
+        display.destroy()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import time
+import unittest
+
+from dispmanx import DispmanX, DispmanXError, sim
+
+
+class VsyncTest(unittest.TestCase):
+    def setUp(self):
+        sim.reset()
+        sim.configure(refresh_rate=100)
+        self.display = DispmanX(pixel_format="RGB", render_size=(4, 4))
+
+    def tearDown(self):
+        self.display.destroy()
+        sim.reset()
+
+    def test_wait_vsync(self):
+        first = self.display.wait_vsync(timeout=1)
+        for expected in range(first + 1, first + 6):
+            self.assertEqual(self.display.wait_vsync(timeout=1), expected)
+        self.assertEqual(self.display.vsync_count, first + 5)
+        self.assertAlmostEqual(self.display.refresh_rate, 100, delta=15)
+
+    def test_run_divides_refresh_rate(self):
+        frames = []
+        start = time.monotonic()
+        self.display.run(lambda display: frames.append(display.vsync_count), fps=50, frames=10)
+        elapsed = time.monotonic() - start
+        self.assertEqual(len(frames), 10)
+        self.assertGreaterEqual(elapsed, 0.17)  # 10 frames at every other vertical blank of 100 Hz
+        self.assertTrue(all(b - a >= 2 for a, b in zip(frames, frames[1:])))
+
+    def test_run_stops_when_render_returns_false(self):
+        frames = []
+
+        def render(display):
+            frames.append(None)
+            return len(frames) < 3
+
+        self.display.run(render)
+        self.assertEqual(len(frames), 3)
+
+    def test_slow_frames_count_missed_vsyncs(self):
+        self.display.run(lambda display: time.sleep(0.025), frames=4)
+        self.assertGreater(self.display.missed_vsyncs, 0)
+
+    def test_invalid_fps(self):
+        with self.assertRaises(DispmanXError):
+            self.display.run(lambda display: None, fps=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
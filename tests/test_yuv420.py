@@ -0,0 +1,65 @@
+import unittest
+
+import numpy
+
+from dispmanx import DispmanX, sim
+
+
+RED, WHITE = (81, 90, 240), (235, 128, 128)  # Limited range BT.601 (Y, U, V)
+
+
+class YUV420Test(unittest.TestCase):
+    def setUp(self):
+        sim.reset()
+        sim.configure(displays={2: (20, 10)})  # So the buffer isn't scaled, and rows and planes are padded
+        DispmanX.refresh_displays()
+
+    def tearDown(self):
+        sim.reset()
+        DispmanX.refresh_displays()
+
+    def assertColor(self, pixel, expected):
+        self.assertLessEqual(max(abs(int(a) - b) for a, b in zip(pixel, expected)), 2, f"{tuple(pixel)} != {expected}")
+
+    def test_plane_views(self):
+        display = DispmanX(pixel_format="YUV420")
+        self.assertEqual(display.pitch, 32)
+        y, u, v = display.buffer
+        self.assertEqual((y.shape, u.shape, v.shape), ((10, 20), (5, 10), (5, 10)))
+        self.assertEqual((y.strides, u.strides, v.strides), ((32, 1), (16, 1), (16, 1)))
+
+        base = display._buffer_ref.address
+        luma_bytes = 32 * 16  # Padded to 16 rows
+        offsets = [plane.__array_interface__["data"][0] - base for plane in (y, u, v)]
+        self.assertEqual(offsets, [0, luma_bytes, luma_bytes + luma_bytes // 4])
+        self.assertEqual((y.min(), u.min(), v.min()), (16, 128, 128))  # Starts out black
+        display.destroy()
+
+    def test_flat_plane_views(self):
+        display = DispmanX(pixel_format="YUV420", buffer_type="ctypes")
+        self.assertEqual([len(plane) for plane in display.buffer], [512, 128, 128])
+        display.destroy()
+
+    def test_round_trip(self):
+        display = DispmanX(pixel_format="YUV420")
+        y, u, v = display.buffer
+        for values, columns, chroma_columns in ((RED, slice(0, 10), slice(0, 5)), (WHITE, slice(10, 20), slice(5, 10))):
+            y[:, columns], u[:, chroma_columns], v[:, chroma_columns] = values
+        display.update()
+        image = sim.compose()
+        self.assertColor(image[5, 2], (255, 0, 0))
+        self.assertColor(image[5, 15], (255, 255, 255))
+
+        # The same frame, tightly packed, uploaded from bytes
+        packed = b"".join(numpy.ascontiguousarray(plane).tobytes() for plane in display.buffer)
+        self.assertEqual(len(packed), 20 * 10 + 2 * 10 * 5)
+        y[:], u[:], v[:] = 16, 128, 128
+        display.update()
+        self.assertColor(sim.compose()[5, 2], (0, 0, 0))
+        display.update(source=packed)
+        numpy.testing.assert_array_equal(sim.compose(), image)
+        display.destroy()
+
+
+if __name__ == "__main__":
+    unittest.main()